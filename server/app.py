@@ -1,40 +1,57 @@
+import os
+import time
+from collections import defaultdict
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Blueprint, current_app, g, request, jsonify
 from flask_cors import CORS
 from ortools.sat.python import cp_model
 
-app = Flask(__name__)
-CORS(app)
-
-def parse_timeslot(ts_str):
-    """
-    Parses a timeslot string like "08:30 AM - 09:30 AM"
-    Returns (start_minutes, end_minutes) from midnight.
-    """
-    try:
-        parts = ts_str.split('-')
-        if len(parts) != 2:
-            return 0, 0
-        
-        start_str = parts[0].strip()
-        end_str = parts[1].strip()
-        
-        fmt = "%I:%M %p"
-        start_dt = datetime.strptime(start_str, fmt)
-        end_dt = datetime.strptime(end_str, fmt)
-        
-        start_min = start_dt.hour * 60 + start_dt.minute
-        end_min = end_dt.hour * 60 + end_dt.minute
-        
-        return start_min, end_min
-    except Exception as e:
-        print(f"Error parsing timeslot '{ts_str}': {e}")
-        return 0, 0
-
-@app.route('/generate-timetable', methods=['POST'])
+import dataset_store
+import metrics
+import model_template
+import solve_control
+import warmup
+from portfolio import solve_portfolio
+from response_encoding import sort_schedule, encode_compact, wants_compact, json_response
+from solve_control import SolveControl, SolveCancelled, DeadlineExceeded
+from array_builder import ArrayModelBuilder
+from availability import intersect, session_slots, total_slots
+from dataset_store import DatasetError
+from day_symmetry import break_day_symmetry
+from decomposition import SessionPlanner
+from lexicographic import objective_tiers, solve_lexicographic
+from model_index import AssignIndex, weighted_sum
+from lab_preferences import compute_lab_masks
+from preprocess import preprocess
+from relaxation import Relaxation, relaxed_families
+from request_capture import RequestCapture
+from request_profiling import DEFAULT_PROFILE_DIR, profiled
+from room_eligibility import compute_room_eligibility
+from room_pools import assign_rooms, build_room_pools, pinned_rooms, pool_eligibility, single_room_pools
+from shared_lectures import cohort_id, lecture_members
+from tracing import DEFAULT_TRACE_DIR, traced
+from validation import collect_problems
+
+bp = Blueprint('timetable', __name__)
+
+
+@bp.route('/generate-timetable', methods=['POST'])
+@profiled
+@traced
 def generate_timetable():
+    control = None
+    data = None
+    outcome = 'crash'
+    request_started = time.monotonic()
+    timings = {}
+    # Request timeline, written on X-Timely-Trace / settings.trace (see tracing.py)
+    trace = g.trace
+    metrics.INFLIGHT_SOLVES.inc()
     try:
+        trace.step('parse request')
         data = request.get_json()
+        # Requests may reference a stored dataset ("dataset": "id@version") instead of sending it
+        data, prepared, dataset_ref = dataset_store.request_payload(data, current_app.config['DATASET_DB'])
         with open("server_debug.log", "a") as f:
             f.write(f"\n{datetime.now()} - Request received\n")
             f.write(f"Parsed JSON keys: {list(data.keys())}\n")
@@ -45,6 +62,18 @@ def generate_timetable():
         days = data.get('days', [])
         timeslots = data.get('timeslots', [])
         settings = data.get('settings', {})
+        if settings.get('trace'):
+            g.trace_requested = True
+
+        # Per-request deadline / cancellation token / stagnation stop
+        if not data.get('request_id') and request.headers.get('X-Request-ID'):
+            data['request_id'] = request.headers.get('X-Request-ID')
+        control = SolveControl.from_request(data, settings)
+        control.trace = trace
+        solve_control.register(control)
+
+        # Any 400 returned before the model is built is a validation failure
+        outcome = 'validation_error'
 
         # Open log file for this request
         with open("server_debug.log", "a") as f:
@@ -60,10 +89,15 @@ def generate_timetable():
         model = cp_model.CpModel()
 
         # --- DATA PREPARATION ---
-        all_instructors = {i['id']: i for i in instructors}
-        all_courses = {c['id']: c for c in courses}
-        all_rooms = {r['id']: r for r in rooms}
-        all_student_groups = {sg['id']: sg for sg in student_groups}
+        trace.step('preprocess', cached=prepared is not None)
+        # Entity maps, time grid, lab masks, availability bitmasks and room
+        # eligibility; cached per version for stored datasets
+        if prepared is None:
+            prepared = preprocess(data)
+        all_instructors = prepared['all_instructors']
+        all_courses = prepared['all_courses']
+        all_rooms = prepared['all_rooms']
+        all_student_groups = prepared['all_student_groups']
         all_days = days
         all_timeslots = timeslots
         
@@ -78,275 +112,65 @@ def generate_timetable():
 
         log(f"Received {len(student_groups)} student groups.")
 
-        # ts_parsed: list of (start, end)
-        ts_parsed = [parse_timeslot(ts) for ts in all_timeslots]
-        
-        # Calculate gaps between adjacent slots i and i+1
-        # gaps[i] = start[i+1] - end[i]
-        ts_gaps = []
-        for i in range(len(ts_parsed) - 1):
-            end_current = ts_parsed[i][1]
-            start_next = ts_parsed[i+1][0]
-            gap = start_next - end_current
-            ts_gaps.append(gap)
-            
-        # --- VALIDATION: PRE-CHECK CONSTRAINT SATISFACTION ---
-        # 1. Check if Student Groups have enough available slots for their requirements
-        for sg_id, group in all_student_groups.items():
-            enrolled_courses = group.get('enrolledCourses', [])
-            total_required_hours = 0
-            for c_id in enrolled_courses:
-                course = all_courses.get(c_id)
-                if not course: continue
-                try:
-                    total_required_hours += int(course.get('lectureHours', 0))
-                    total_required_hours += int(course.get('labHours', 0))
-                except (ValueError, TypeError):
-                    pass
-            
-            # Calculate available slots for this group
-            # Start with max possible
-            total_available_slots = len(all_days) * len(all_timeslots)
-            
-            # Subtract unavailable slots
-            availability = group.get('availability', {})
-            unavailable_count = 0
-            if availability:
-                for day in all_days:
-                    slots = availability.get(day, [])
-                    # Count 0s in valid range
-                    for i in range(min(len(slots), len(all_timeslots))):
-                         if slots[i] == 0:
-                             unavailable_count += 1
-            
-            total_available_slots -= unavailable_count
-            
-            # DEBUG: Log values for each group to trace the issue
-            print(f"DEBUG: Group {sg_id} - Required: {total_required_hours}, Available: {total_available_slots}")
-
-            if total_required_hours > total_available_slots:
-                msg = f"Scheduling Failed: Student Group '{group.get('id')}' requires {total_required_hours} hours, but only has {total_available_slots} available slots. Please increase availability or reduce course load."
-                log(msg)
-                return jsonify({
-                    'status': 'error', 
-                    'message': msg
-                }), 400
-
-            # 1.1 Check for Impossible Lab Constraints (Consecutive Slots & Instructor Availability)
-            # This checks for ALL labs, ensuring there are valid consecutive slots where both Group and Instructor are available.
-            lab_prefs = group.get('labTimingPreferences', {})
-            for c_id in enrolled_courses:
-                course = all_courses.get(c_id)
-                if not course: continue
-                try:
-                    lab_hours = int(course.get('labHours', 0))
-                except: lab_hours = 0
-                
-                # Check for labs (assuming they need at least 2 consecutive hours)
-                if lab_hours >= 2: 
-                    # Check preferences
-                    pref = lab_prefs.get(c_id)
-                    is_afternoon = (pref == 'Afternoon')
-                    
-                    specific_start_min = None
-                    if pref and not is_afternoon:
-                        # Heuristic to find start time from strings like "11:00 - 1:00", "2 to 4", "8:30 - 10:30"
-                        p_lower = pref.lower()
-                        if '8:30' in p_lower: specific_start_min = 510  # 8:30 AM
-                        elif '11' in p_lower: specific_start_min = 660  # 11:00 AM
-                        elif '2' in p_lower and '12' not in p_lower: specific_start_min = 840   # 2:00 PM
-                        elif '3' in p_lower and '13' not in p_lower: specific_start_min = 900   # 3:00 PM
-                        elif '1' in p_lower and '11' not in p_lower and '12' not in p_lower: specific_start_min = 780 # 1:00 PM
-
-
-                    disallow_830 = settings.get('disallow830Labs', False)
-
-                    valid_lab_starts = []
-                    for t_idx in range(len(all_timeslots) - 1): # Check for 2-hour blocks
-                        t_start_min = ts_parsed[t_idx][0]
-                        
-                        # Filtering
-                        if is_afternoon and t_start_min < 720: continue
-                        if specific_start_min is not None and t_start_min != specific_start_min: continue
-                        
-                        # New Global Setting: Disallow 8:30 AM Labs
-                        # 8:30 AM is 510 minutes from midnight
-                        if disallow_830 and t_start_min == 510:
-                            continue
-                        
-                        # Check if t_idx and t_idx+1 are continuous (gap must be 0)
-                        if ts_gaps[t_idx] == 0:
-                            valid_lab_starts.append(t_idx)
-
-                    if not valid_lab_starts:
-                         msg = f"Scheduling Failed: Course '{course['name']}' requires a {lab_hours}-hour lab ({pref if pref else 'Any Time'}), but no consecutive slots exist starting at the preferred time (check breaks or timeslots)."
-                         log(msg)
-                         return jsonify({'status': 'error', 'message': msg, 'debug_log': debug_log}), 400
-                    
-                    # Check Instructor Availability for these slots
-                    # Needs at least ONE valid start slot where instructor is available for BOTH hours
-                    
-                    # Get qualified/preferred instructor
-                    instructor_id = None
-                    inst_prefs = group.get('instructorPreferences', {})
-                    if c_id in inst_prefs:
-                        instructor_id = inst_prefs[c_id]
-                    
-                    instructors_to_check = []
-                    if instructor_id:
-                         instructors_to_check = [all_instructors.get(instructor_id)]
-                    else:
-                         q_ids = course.get('qualifiedInstructors', [])
-                         instructors_to_check = [all_instructors.get(qid) for qid in q_ids]
-                    
-                    instructors_to_check = [i for i in instructors_to_check if i] # Filter None
-
-                    if not instructors_to_check:
-                        log(f"Warning: No valid instructors found for {c_id}")
-                        continue
-
-                    can_schedule = False
-                    
-                    # Check if ANY instructor can teach in ANY valid slot on ANY day
-                    for inst in instructors_to_check:
-                        inst_avail = inst.get('availability', {})
-                        for day in all_days:
-                            # Group must also be available!
-                            group_avail = availability.get(day, [])
-                            inst_day_avail = inst_avail.get(day, [])
-                            
-                            for start_idx in valid_lab_starts:
-                                # Check slot 1 and slot 2 (indices start_idx and start_idx+1)
-                                
-                                # Check Group Avail
-                                g_ok = True
-                                if start_idx < len(group_avail) and group_avail[start_idx] == 0: g_ok = False
-                                if (start_idx+1) < len(group_avail) and group_avail[start_idx+1] == 0: g_ok = False
-                                
-                                if not g_ok: continue
-
-                                # Check Inst Avail
-                                i_ok = True
-                                if start_idx < len(inst_day_avail) and inst_day_avail[start_idx] == 0: i_ok = False
-                                if (start_idx+1) < len(inst_day_avail) and inst_day_avail[start_idx+1] == 0: i_ok = False
-
-                                if i_ok:
-                                    can_schedule = True
-                                    # log(f"Found VALID slot for {c_id}: Day {day}, Index {start_idx}")
-                                    break
-                            if can_schedule: break
-                        if can_schedule: break
-                    
-                    if not can_schedule:
-                         inst_names = ", ".join([i['name'] for i in instructors_to_check])
-                         msg = f"Scheduling Failed: Course '{course['name']}' ({group.get('id')}) requires a Lab{' (Afternoon)' if is_afternoon else ''}, but no assigned instructor ({inst_names}) is available for 2 consecutive slots where the group is also available."
-                         log(msg)
-                         log(f"Validation Detail: {c_id}, Group {group['id']}, Insts: {inst_names}")
-                         log(f"Valid Lab Starts: {valid_lab_starts}")
-                         return jsonify({
-                            'status': 'error', 
-                            'message': msg,
-                            'debug_log': debug_log
-                        }), 400
-
-            # 1.2 Check Per-Course Instructor-Group Availability Overlap
-            # Ensure that for each course, there are enough slots where BOTH Group and Instructor are available.
-            for c_id in enrolled_courses:
-                course = all_courses.get(c_id)
-                if not course: continue
-                
-                try:
-                    req_hours = int(course.get('lectureHours', 0)) + int(course.get('labHours', 0))
-                except: req_hours = 0
-                
-                if req_hours == 0: continue
-
-                # Get Instructors
-                inst_prefs = group.get('instructorPreferences', {})
-                instructor_id = inst_prefs.get(c_id)
-                
-                check_instructors = []
-                if instructor_id:
-                     check_instructors = [all_instructors.get(instructor_id)]
-                else:
-                     q_ids = course.get('qualifiedInstructors', [])
-                     check_instructors = [all_instructors.get(qid) for qid in q_ids]
-                
-                check_instructors = [i for i in check_instructors if i]
-                if not check_instructors: continue
-
-                # Calculate valid overlap count
-                overlap_count = 0
-                # We can sum overlap across all days/slots. 
-                # If ANY instructor is available at (day, slot), and Group is available, it counts.
-                
-                for day in all_days:
-                    group_day_avail = group.get('availability', {}).get(day, [])
-                    
-                    # Compute union of instructor availability for this day
-                    inst_union_avail = [0] * len(all_timeslots)
-                    for inst in check_instructors:
-                        inst_day_avail = inst.get('availability', {}).get(day, [])
-                        for i in range(min(len(inst_day_avail), len(all_timeslots))):
-                            if inst_day_avail[i] == 1:
-                                inst_union_avail[i] = 1
-                    
-                    # Intersect with Group
-                    for i in range(min(len(group_day_avail), len(all_timeslots))):
-                        if group_day_avail[i] == 1 and inst_union_avail[i] == 1:
-                            overlap_count += 1
-                
-                print(f"DEBUG: Course {c_id} ({course['name']}) Overlap: {overlap_count}, Required: {req_hours}")
-                
-                if overlap_count < req_hours:
-                     msg = f"Scheduling Failed: Course '{course['name']}' requires {req_hours} hours. Based on Student Group '{group.get('id')}' availability and Instructor availability, only {overlap_count} valid slots exist. Please increase availability."
-                     print(f"DEBUG: {msg}")
-                     return jsonify({
-                        'status': 'error', 
-                        'message': msg
-                    }), 400
+        if dataset_ref:
+            log(f"Using dataset {dataset_ref}")
+
+        # ts_parsed: list of (start, end); ts_gaps[i] = start[i+1] - end[i]
+        ts_parsed = prepared['ts_parsed']
+        ts_gaps = prepared['ts_gaps']
+        # Allowed lab start slots per (group, course), shared by validation and the model
+        lab_masks = prepared['lab_masks']
+        # Availability arrays as per-day bitmasks
+        avail = prepared['avail']
+        # Eligible rooms per (group, course, session type): capacity, equipment, room type, lab room preference
+        room_eligibility = prepared['room_eligibility']
+        # Groups attending a course's lectures together (course 'sharedLectureGroups')
+        lecture_cohorts = prepared['lecture_cohorts']
+
+        # Room pools: with settings.roomPools, interchangeable rooms share one model
+        # coordinate and concrete rooms are matched after solving
+        use_room_pools = settings.get('roomPools', False)
+        if use_room_pools:
+            room_pools = build_room_pools(all_rooms, avail, all_days, pinned_rooms(all_student_groups))
+            room_eligibility = pool_eligibility(room_eligibility, room_pools)
+            log(f"Room pools: {len(all_rooms)} rooms in {len(room_pools)} pools")
+        else:
+            room_pools = single_room_pools(all_rooms)
 
+        # settings.relaxedMode: selected hard constraint families become penalized
+        # violations instead of making the model infeasible (see relaxation.py)
+        relaxation = Relaxation(relaxed_families(settings), model)
 
-        # 2. Check Global Room Capacity vs Total Requirements
-        total_global_required_hours = 0
-        for sg_id, group in all_student_groups.items():
-            enrolled_courses = group.get('enrolledCourses', [])
-            for c_id in enrolled_courses:
-                course = all_courses.get(c_id)
-                if not course: continue
-                try:
-                    total_global_required_hours += int(course.get('lectureHours', 0))
-                    total_global_required_hours += int(course.get('labHours', 0))
-                except: pass
-        
-        total_global_room_slots = 0
-        for r_id, room in all_rooms.items():
-            room_slots = len(all_days) * len(all_timeslots)
-            availability = room.get('availability', {})
-            unavailable_count = 0
-            if availability:
-                for day in all_days:
-                    slots = availability.get(day, [])
-                    for i in range(min(len(slots), len(all_timeslots))):
-                        if slots[i] == 0:
-                            unavailable_count += 1
-            
-            total_global_room_slots += (room_slots - unavailable_count)
-            
-        print(f"DEBUG: Global Check - Required: {total_global_required_hours}, Room Capacity: {total_global_room_slots}")
-
-        if total_global_required_hours > total_global_room_slots:
-             msg = f"Scheduling Failed: Total class hours required ({total_global_required_hours}) exceed the total capacity of all rooms ({total_global_room_slots}). Please add more rooms or extend working hours."
-             print(f"DEBUG: {msg}")
-             return jsonify({
-                'status': 'error', 
-                'message': msg
+        # --- VALIDATION: PRE-CHECK CONSTRAINT SATISFACTION ---
+        # Group hours, lab slots, instructor overlap, global room capacity and
+        # instructor/room load as a max flow.
+        # All problems are collected; the first one is the headline message.
+        # Ambiguous joint lecture ids cannot be relaxed away.
+        trace.step('validation')
+        problems = collect_problems(data, log=log, lab_masks=lab_masks, avail=avail,
+                                    room_eligibility=prepared['room_eligibility'], trace=trace)
+        if problems and relaxation and not any(p['check'] == 'cohort_id' for p in problems):
+            log(f"Relaxed mode ({', '.join(sorted(relaxation.families))}): continuing despite {len(problems)} pre-check problems")
+        elif problems:
+            return jsonify({
+                'status': 'error',
+                'message': problems[0]['message'],
+                'problems': problems,
+                'debug_log': debug_log
             }), 400
 
+        control.checkpoint('validation')
+        # Until the solver reports a status
+        outcome = 'no_solution'
+        build_started = time.monotonic()
+        timings['validation'] = build_started - request_started
 
+        trace.step('tasks and candidates')
         # Create unique tasks for each required session (lecture or lab)
         # REFACTOR: Tasks are now specific to a Student Group.
         # Task ID format: {sg_id}_{c_id}_{type}_{index}
+        # Shared lectures get one joint task owned by the cohort: {sg_a+sg_b}_{c_id}_lec_{index}
+        # 'group_id' is the owner, 'group_ids' every group the task blocks.
         tasks = {}
         
         for sg_id, group in all_student_groups.items():
@@ -366,39 +190,54 @@ def generate_timetable():
                 except (ValueError, TypeError):
                     lab_hours = 0
 
-                for i in range(lec_hours):
-                    task_id = f'{sg_id}_{c_id}_lec_{i}'
-                    tasks[task_id] = {
-                        'course_id': c_id, 
-                        'type': 'lecture',
-                        'group_id': sg_id
-                    }
+                members = lecture_members(lecture_cohorts, sg_id, c_id)
+                # Joint lectures are created once, by the cohort's first group
+                if members[0] == sg_id:
+                    owner_id = cohort_id(members)
+                    for i in range(lec_hours):
+                        task_id = f'{owner_id}_{c_id}_lec_{i}'
+                        tasks[task_id] = {
+                            'course_id': c_id, 
+                            'type': 'lecture',
+                            'group_id': owner_id,
+                            'group_ids': members
+                        }
                 for i in range(lab_hours):
                     task_id = f'{sg_id}_{c_id}_lab_{i}'
+                    # Labs run in 2-slot pairs (i, i+1); an odd last hour is a single session
+                    if i % 2 == 1:
+                        lab_role = 'second'
+                    elif i + 1 < lab_hours:
+                        lab_role = 'first'
+                    else:
+                        lab_role = 'single'
                     tasks[task_id] = {
                         'course_id': c_id, 
                         'type': 'lab',
-                        'group_id': sg_id
+                        'group_id': sg_id,
+                        'group_ids': (sg_id,),
+                        'lab_role': lab_role
                     }
         msg_tasks = f"Created {len(tasks)} tasks."
         print(f"DEBUG: {msg_tasks}")
         with open("server_debug.log", "a") as f:
             f.write(f"{datetime.now()}: {msg_tasks}\n")
 
-        # --- CREATE VARIABLES ---
-        assign = {}
-        lab_vars = []
+        # --- SESSION CANDIDATES ---
+        # Instructors, rooms (or room pools) and attending-group availability per task
+        candidates = {}
         for task_id, task_info in tasks.items():
             course_id = task_info['course_id']
             course = all_courses[course_id]
             
-            # Check for group preference
+            # Check for group preference (the first member with one, for shared lectures)
             sg_id = task_info['group_id']
-            group = all_student_groups.get(sg_id)
             preferred_inst_id = None
-            if group:
-                preferences = group.get('instructorPreferences', {})
+            for member_id in task_info['group_ids']:
+                preferences = all_student_groups[member_id].get('instructorPreferences', {})
                 preferred_inst_id = preferences.get(course_id)
+                if preferred_inst_id:
+                    break
 
             qualified_instructors = course.get('qualifiedInstructors', [])
             
@@ -410,477 +249,384 @@ def generate_timetable():
                 # If preferred instructor is valid, only create vars for them
                 # If not in qualified list, maybe we should still allow? Let's assume valid.
                 target_instructors = [preferred_inst_id]
+            # Ids missing from `instructors` (e.g. stale qualifiedInstructors entries) get no variables
+            target_instructors = [inst_id for inst_id in target_instructors if inst_id in all_instructors]
 
-            for inst_id in target_instructors:
-                for room_id in all_rooms:
-                    for day in all_days:
-                        for timeslot in all_timeslots:
-                            v = model.NewBoolVar(f'assign_{task_id}_{inst_id}_{room_id}_{day}_{timeslot}')
-                            assign[(task_id, inst_id, room_id, day, timeslot)] = v
+            # Lab tasks only get variables in slots their timing mask allows
+            lab_mask = None
+            if task_info['type'] == 'lab':
+                lab_mask = lab_masks[(sg_id, course_id)]
+
+            candidates[task_id] = {
+                'instructors': target_instructors,
+                'rooms': room_eligibility[(sg_id, course_id, task_info['type'])],
+                'group_masks': intersect([avail['groups'][member_id] for member_id in task_info['group_ids']], all_days),
+                'lab_mask': lab_mask,
+            }
+
+        # Relaxed mode: variables also outside availability, room capacity and lab
+        # timing preferences, each violation penalized once the variables exist
+        model_avail = avail
+        if relaxation:
+            loose_rooms = compute_room_eligibility(all_rooms, all_student_groups, all_courses, lecture_cohorts,
+                                                   check_capacity=False)
+            if use_room_pools:
+                loose_rooms = pool_eligibility(loose_rooms, room_pools)
+            loose_lab_masks = compute_lab_masks(all_student_groups, all_courses, ts_parsed, ts_gaps,
+                                                with_preferences=False)
+            candidates, model_avail = relaxation.widen(tasks, candidates, avail, loose_rooms, loose_lab_masks, all_days)
+
+        # --- TWO-PHASE ENGINE ---
+        # settings.engine = 'decomposed': plan slots first and match instructors/rooms
+        # (see decomposition.py); the model below then only keeps the planned slots.
+        planned = None
+        if settings.get('engine') == 'decomposed' and not relaxation:
+            trace.step('two-phase plan')
+            plan_started = time.monotonic()
+            planner = SessionPlanner(tasks, candidates, avail, room_pools, all_student_groups,
+                                     all_days, all_timeslots, ts_parsed, ts_gaps, settings)
+            planned = planner.plan(control, log)
+            timings['plan'] = time.monotonic() - plan_started
+            if planned is None:
+                log("Two-phase planning failed, building the full model instead")
+            control.checkpoint('planning')
+
+        # --- MODEL TEMPLATE ---
+        # Variables and hard constraints only depend on the structural inputs, so
+        # requests that only change objective settings clone the model built by an
+        # earlier request (see model_template.py). Not used for planned or relaxed models.
+        template = None
+        template_key = None
+        if planned is None and not relaxation:
+            template_key = model_template.structural_key(data)
+            template = model_template.get_template(template_key)
+        if template is not None:
+            trace.step('instantiate template')
+            model, assign = template.instantiate()
+            index = AssignIndex(assign, tasks)
+            metrics.MODEL_TEMPLATE_LOOKUPS.inc(result='hit')
+            log("Reusing the cached model structure")
+        else:
+            # --- CREATE VARIABLES ---
+            trace.step('create variables')
+            array_builder = None
+            if settings.get('modelBuilder') == 'arrays' and planned is None and not relaxation:
+                # Variables and the bulk hard constraints written straight into the
+                # model proto from index arrays (see array_builder.py)
+                array_builder = ArrayModelBuilder(model, tasks, candidates, avail, room_pools, all_instructors,
+                                                  all_student_groups, all_days, all_timeslots, ts_gaps)
+                assign, lab_vars = array_builder.create_variables()
+            else:
+                assign = {}
+                lab_vars = []
+                for task_id, task_info in tasks.items():
+                    cand = candidates[task_id]
+                    lab_mask = cand['lab_mask']
+                    group_masks = cand['group_masks']
+                    for inst_id in cand['instructors']:
+                        inst_masks = model_avail['instructors'].get(inst_id)
+                        for room_id in cand['rooms']:
+                            # Pooled rooms share their availability
+                            room_masks = model_avail['rooms'][room_pools[room_id][0]]
+                            for day in all_days:
+                                # Slots where the group, instructor and room are all available
+                                open_slots = group_masks[day] & room_masks[day]
+                                if inst_masks is not None:
+                                    open_slots &= inst_masks[day]
+                                # Both halves of a lab pair must be available
+                                open_slots = session_slots(open_slots, task_info.get('lab_role'), lab_mask)
+                                if not open_slots:
+                                    continue
+                                for t_idx, timeslot in enumerate(all_timeslots):
+                                    if not (open_slots >> t_idx) & 1:
+                                        continue
+                                    if planned is not None:
+                                        # Two-phase engine: only the planned slot, hinted with the matched resources
+                                        if task_id not in planned or planned[task_id][2:] != (day, timeslot):
+                                            continue
+                                    v = model.NewBoolVar(f'assign_{task_id}_{inst_id}_{room_id}_{day}_{timeslot}')
+                                    assign[(task_id, inst_id, room_id, day, timeslot)] = v
+                                    if planned is not None:
+                                        model.AddHint(v, planned[task_id][:2] == (inst_id, room_id))
                             
-                            if task_info['type'] == 'lab':
-                                lab_vars.append(v)
+                                    if task_info['type'] == 'lab':
+                                        lab_vars.append(v)
         
-        # --- PRIORITIZE LAB ALLOCATION ---
-        # Force the solver to branch on lab variables first.
-        if lab_vars:
-             model.AddDecisionStrategy(lab_vars, cp_model.CHOOSE_FIRST, cp_model.SELECT_MIN_VALUE)
-
-        # --- INSTRUCTOR AVAILABILITY CONSTRAINT ---
-        # Enforce that instructors are not assigned to slots where they are unavailable.
-        # availability is a map: { "Monday": [1, 1, 0, ...], ... }
-        # The index in the list corresponds to the index in all_timeslots.
-        
-        # Map timeslots to indices for easier lookup
-        ts_to_index = {ts: i for i, ts in enumerate(all_timeslots)}
-        
-        for inst_id, instructor in all_instructors.items():
-            availability = instructor.get('availability', {})
-            if not availability:
-                continue
+            control.checkpoint('variable creation')
+
+            # --- PRIORITIZE LAB ALLOCATION ---
+            # Force the solver to branch on lab variables first.
+            if lab_vars:
+                 model.AddDecisionStrategy(lab_vars, cp_model.CHOOSE_FIRST, cp_model.SELECT_MIN_VALUE)
+
+            # --- AVAILABILITY ---
+            # Instructor, student group and room availability are enforced by not
+            # creating variables outside `open_slots` above.
+
+            control.checkpoint('availability constraints')
+
+            # Variables by task, instructor/room/group slot, ... (see model_index.py)
+            index = AssignIndex(assign, tasks)
+
+            # Relaxed mode: variables outside availability, capacity or lab timing cost a penalty
+            if relaxation:
+                relaxation.penalize_assignments(assign, room_pools, all_timeslots)
+
+            # --- HARD CONSTRAINTS ---
+            trace.step('hard constraints', variables=len(assign))
+
+            if array_builder is not None:
+                trace.step('1.-8. array builder', level=1)
+                array_builder.add_hard_constraints(control)
+            else:
+                trace.step('1. exactly once', level=1)
+                # 1. Each task must be scheduled exactly once
+                for task_id in tasks:
+                    # Check if any assignment variable exists for this task (it might not if no qualified instructor)
+                    possible_vars = index.by_task.get(task_id)
+                    if possible_vars:
+                        model.AddExactlyOne(possible_vars)
+
+                # 2. No double booking
+                trace.step('2. no double booking', level=1)
+                for day in all_days:
+                    for timeslot in all_timeslots:
+                        # Instructor conflict
+                        for inst_id in all_instructors:
+                            inst_vars = [var for _, var in index.by_inst_slot.get((inst_id, day, timeslot), ())]
+                            if len(inst_vars) > 1:
+                                model.AddAtMostOne(inst_vars)
                 
-            for day, slots in availability.items():
-                if day not in all_days:
-                    continue
+                        # Room conflict (a pool hosts at most as many sessions as it has rooms)
+                        for room_id, pool_room_ids in room_pools.items():
+                            room_vars = index.by_room_slot.get((room_id, day, timeslot), [])
+                            if len(room_vars) <= len(pool_room_ids):
+                                continue
+                            if len(pool_room_ids) == 1:
+                                model.AddAtMostOne(room_vars)
+                            else:
+                                model.Add(sum(room_vars) <= len(pool_room_ids))
                 
-                # Iterate through the availability slots
-                # Note: The length of slots should match all_timeslots. 
-                # If mismatch, we use the minimum length to avoid errors, or assume 1 (available) if missing.
-                for t_idx, is_available in enumerate(slots):
-                    if t_idx >= len(all_timeslots):
-                        break
-                        
-                    if is_available == 0: # Unavailable
-                        timeslot = all_timeslots[t_idx]
-                        
-                        # Forbid this instructor from being assigned to ANY task at this time
-                        for task_id in tasks:
-                            for room_id in all_rooms:
-                                if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                    model.Add(assign[(task_id, inst_id, room_id, day, timeslot)] == 0)
-
-        # --- STUDENT GROUP AVAILABILITY CONSTRAINT ---
-        # Enforce that student groups are not assigned to classes when they are unavailable.
-        for sg_id, group in all_student_groups.items():
-            availability = group.get('availability', {})
-            if not availability:
-                continue
-
-            # Identify all tasks belonging to this group
-            group_tasks = [tid for tid, t in tasks.items() if t['group_id'] == sg_id]
-
-            for day, slots in availability.items():
-                if day not in all_days:
-                    continue
-
-                for t_idx, is_available in enumerate(slots):
-                    if t_idx >= len(all_timeslots):
-                        break
-                    
-                    if is_available == 0: # Unavailable
-                        timeslot = all_timeslots[t_idx]
-
-                        # Forbid ANY task for this group to be scheduled at this time
-                        for task_id in group_tasks:
-                            for inst_id in all_instructors:
-                                for room_id in all_rooms:
-                                    if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                        model.Add(assign[(task_id, inst_id, room_id, day, timeslot)] == 0)
-
-        # --- ROOM AVAILABILITY CONSTRAINT ---
-        # Enforce that rooms are not assigned to classes when they are unavailable.
-        for r_id, room in all_rooms.items():
-            availability = room.get('availability', {})
-            if not availability:
-                continue
-
-            for day, slots in availability.items():
-                if day not in all_days:
-                    continue
-
-                for t_idx, is_available in enumerate(slots):
-                    if t_idx >= len(all_timeslots):
-                        break
-                    
-                    if is_available == 0: # Unavailable
-                        timeslot = all_timeslots[t_idx]
-
-                        # Forbid ANY task in this room at this time
-                        for task_id in tasks:
-                            for inst_id in all_instructors:
-                                if (task_id, inst_id, r_id, day, timeslot) in assign:
-                                    model.Add(assign[(task_id, inst_id, r_id, day, timeslot)] == 0)
-
-        # --- HARD CONSTRAINTS ---
-
-        # 1. Each task must be scheduled exactly once
-        for task_id in tasks:
-            # Check if any assignment variable exists for this task (it might not if no qualified instructor)
-            possible_vars = [assign[(task_id, inst_id, room_id, day, timeslot)]
-                                for inst_id in all_instructors for room_id in all_rooms
-                                for day in all_days for timeslot in all_timeslots
-                                if (task_id, inst_id, room_id, day, timeslot) in assign]
-            if possible_vars:
-                model.AddExactlyOne(possible_vars)
-
-        # 2. No double booking
-        for day in all_days:
-            for timeslot in all_timeslots:
-                # Instructor conflict
-                for inst_id in all_instructors:
-                    model.AddAtMostOne(assign.get((task_id, inst_id, room_id, day, timeslot))
-                                       for task_id in tasks for room_id in all_rooms
-                                       if assign.get((task_id, inst_id, room_id, day, timeslot)) is not None)
-                
-                # Room conflict
-                for room_id in all_rooms:
-                    model.AddAtMostOne(assign.get((task_id, inst_id, room_id, day, timeslot))
-                                       for task_id in tasks for inst_id in all_instructors
-                                       if assign.get((task_id, inst_id, room_id, day, timeslot)) is not None)
+                        # Student Group conflict
+                        # Since tasks are now group-specific, we just need to ensure that for a given group,
+                        # only one task is scheduled at a time.
+                        for sg_id in all_student_groups:
+                            group_vars = index.by_group_slot.get((sg_id, day, timeslot), [])
+                            if len(group_vars) > 1:
+                                model.AddAtMostOne(group_vars)
+
+                # 3./4. Room capacity and equipment: enforced by `room_eligibility`.
+
+                # 5. Guaranteed Lunch Break (Hard Constraint)
+                # Implicitly handled.
+
+                # 6. Lab Room Constraint
+                # Lab types, lab room preferences and keeping lectures out of labs are
+                # enforced by `room_eligibility`: no variables exist for other rooms.
+
+                control.checkpoint('hard constraints')
+
+                # --- NEW CONSTRAINTS ---
+
+                # 6. No Repeating Classes per Day for a Student Group (Lectures)
+                trace.step('6. no repeating lectures', level=1)
+                for sg_id, group in all_student_groups.items():
+                    enrolled_courses = group.get('enrolledCourses', [])
+                    for course_id in enrolled_courses:
+                        # Get all lecture tasks for this course AND this group
+                        course_lec_tasks = [tid for tid, t in tasks.items() 
+                                          if t['course_id'] == course_id and t['type'] == 'lecture' and sg_id in t['group_ids']]
                 
-                # Student Group conflict
-                # Since tasks are now group-specific, we just need to ensure that for a given group,
-                # only one task is scheduled at a time.
-                for sg_id in all_student_groups:
-                    # Filter tasks belonging to this group
-                    group_tasks = [tid for tid, t in tasks.items() if t['group_id'] == sg_id]
-                    
-                    model.AddAtMostOne(assign.get((task_id, inst_id, room_id, day, timeslot))
-                                       for task_id in group_tasks for inst_id in all_instructors for room_id in all_rooms
-                                       if assign.get((task_id, inst_id, room_id, day, timeslot)) is not None)
-
-        # 3. Room capacity constraint
-        for task_id, task_info in tasks.items():
-            sg_id = task_info['group_id']
-            group = all_student_groups[sg_id]
-            
-            try:
-                group_size = int(group.get('size', 0))
-            except (ValueError, TypeError):
-                group_size = 0
-            
-            for room_id, room in all_rooms.items():
-                try:
-                    capacity = int(room.get('capacity', 0))
-                except (ValueError, TypeError):
-                    capacity = 0
-                    
-                if group_size > capacity:
-                    for inst_id in all_instructors:
-                        for day in all_days:
-                            for timeslot in all_timeslots:
-                                if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                    model.Add(assign[(task_id, inst_id, room_id, day, timeslot)] == 0)
-
-        # 4. Equipment constraint
-        for task_id, task_info in tasks.items():
-            course = all_courses[task_info['course_id']]
-            required_equipment = set(course.get('equipment', []))
-            
-            if required_equipment:
-                for room_id, room in all_rooms.items():
-                    room_equipment = set(room.get('equipment', []))
-                    if not required_equipment.issubset(room_equipment):
-                        for inst_id in all_instructors:
-                             for day in all_days:
-                                for timeslot in all_timeslots:
-                                    if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                        model.Add(assign[(task_id, inst_id, room_id, day, timeslot)] == 0)
-
-        # 5. Guaranteed Lunch Break (Hard Constraint)
-        # Implicitly handled.
-
-        # 6. Lab Room Constraint
-        # Labs must be scheduled in rooms of type 'Lab' or 'Computer Lab'
-        for task_id, task_info in tasks.items():
-            if task_info['type'] == 'lab':
-                course = all_courses[task_info['course_id']]
-                lab_type = course.get('labType', 'Computer Lab') # Default to Computer Lab
-
-                # Check for specific room preference (Hard Constraint)
-                sg_id = task_info['group_id']
-                group = all_student_groups.get(sg_id)
-                preferred_room_id = None
-                if group:
-                     preferred_room_id = group.get('labRoomPreferences', {}).get(task_info['course_id'])
-
-                for room_id, room in all_rooms.items():
-                    # 1. Check Preference Constraint
-                    if preferred_room_id and room_id != preferred_room_id:
-                         # Block ALL slots for this room
-                         for inst_id in all_instructors:
-                             for day in all_days:
-                                 for timeslot in all_timeslots:
-                                     if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                         model.Add(assign[(task_id, inst_id, room_id, day, timeslot)] == 0)
-                         continue
-
-                    room_type = room.get('type', '').lower()
-                    
-                    is_valid_room = False
-                    if lab_type == 'Hardware Lab':
-                        if 'hardware' in room_type:
-                            is_valid_room = True
-                    else: # Computer Lab
-                        if 'computer' in room_type:
-                            is_valid_room = True
-                        if 'lab' in room_type and 'hardware' not in room_type:
-                             is_valid_room = True
-
-                    
-                    if not is_valid_room:
-                        for inst_id in all_instructors:
+                        if len(course_lec_tasks) > 1:
                             for day in all_days:
-                                for timeslot in all_timeslots:
-                                    if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                        model.Add(assign[(task_id, inst_id, room_id, day, timeslot)] == 0)
-            
-            elif task_info['type'] == 'lecture':
-                for room_id, room in all_rooms.items():
-                    # Check if room type indicates it's a lab
-                    room_type = room.get('type', '').lower()
-                    is_lab_room = 'lab' in room_type or 'computer' in room_type
-                    
-                    if is_lab_room:
-                        for inst_id in all_instructors:
-                            for day in all_days:
-                                for timeslot in all_timeslots:
-                                    if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                        model.Add(assign[(task_id, inst_id, room_id, day, timeslot)] == 0)
-
-        # --- NEW CONSTRAINTS ---
-
-        # 6. No Repeating Classes per Day for a Student Group (Lectures)
-        for sg_id, group in all_student_groups.items():
-            enrolled_courses = group.get('enrolledCourses', [])
-            for course_id in enrolled_courses:
-                # Get all lecture tasks for this course AND this group
-                course_lec_tasks = [tid for tid, t in tasks.items() 
-                                  if t['course_id'] == course_id and t['type'] == 'lecture' and t['group_id'] == sg_id]
-                
-                if len(course_lec_tasks) > 1:
-                    for day in all_days:
-                        # Sum of assignments for this course for this group on this day must be <= 1
-                        daily_assignments = []
-                        for task_id in course_lec_tasks:
-                            for inst_id in all_instructors:
-                                for room_id in all_rooms:
-                                    for timeslot in all_timeslots:
-                                        if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                            daily_assignments.append(assign[(task_id, inst_id, room_id, day, timeslot)])
-                        
-                        if daily_assignments:
-                            model.Add(sum(daily_assignments) <= 1)
-
-        # 7. Consecutive Labs
-        # Labs must be 2 hours long and cannot span across breaks.
+                                # Sum of assignments for this course for this group on this day must be <= 1
+                                daily_assignments = index.task_day_vars(course_lec_tasks, day)
+                                if daily_assignments:
+                                    model.Add(sum(daily_assignments) <= 1)
+
+                # 7. Consecutive Labs
+                trace.step('7. consecutive labs', level=1)
+                # Labs must be 2 hours long and cannot span across breaks.
         
-        for sg_id, group in all_student_groups.items():
-            enrolled_courses = group.get('enrolledCourses', [])
-            for course_id in enrolled_courses:
-                course = all_courses.get(course_id)
-                if not course: continue
+                for sg_id, group in all_student_groups.items():
+                    enrolled_courses = group.get('enrolledCourses', [])
+                    for course_id in enrolled_courses:
+                        course = all_courses.get(course_id)
+                        if not course: continue
 
-                try:
-                    lab_hours = int(course.get('labHours', 0))
-                except (ValueError, TypeError):
-                    lab_hours = 0
+                        try:
+                            lab_hours = int(course.get('labHours', 0))
+                        except (ValueError, TypeError):
+                            lab_hours = 0
                     
-                if lab_hours > 0:
-                    # Tasks are now: {sg_id}_{c_id}_lab_{i}
-                    for i in range(0, lab_hours, 2):
-                        if i + 1 < lab_hours:
-                            lab_task_1 = f'{sg_id}_{course_id}_lab_{i}'
-                            lab_task_2 = f'{sg_id}_{course_id}_lab_{i+1}'
+                        if lab_hours > 0:
+                            # Tasks are now: {sg_id}_{c_id}_lab_{i}
+                            for i in range(0, lab_hours, 2):
+                                if i + 1 < lab_hours:
+                                    lab_task_1 = f'{sg_id}_{course_id}_lab_{i}'
+                                    lab_task_2 = f'{sg_id}_{course_id}_lab_{i+1}'
                             
-                            if lab_task_1 in tasks and lab_task_2 in tasks:
-                                for day in all_days:
-                                    for inst_id in all_instructors: # Assuming same instructor for both hours
-                                        for room_id in all_rooms:   # Assuming same room for both hours
+                                    if lab_task_1 in tasks and lab_task_2 in tasks:
+                                        for day in all_days:
+                                            for inst_id in all_instructors: # Assuming same instructor for both hours
+                                                for room_id in room_pools:   # Assuming same room (pool) for both hours
                                             
-                                            # For each starting slot t, if we assign lab_1 at t, we MUST assign lab_2 at t+1
-                                            for t_idx in range(len(all_timeslots) - 1):
-                                                t1 = all_timeslots[t_idx]
-                                                t2 = all_timeslots[t_idx + 1]
+                                                    # For each starting slot t, if we assign lab_1 at t, we MUST assign lab_2 at t+1
+                                                    for t_idx in range(len(all_timeslots) - 1):
+                                                        t1 = all_timeslots[t_idx]
+                                                        t2 = all_timeslots[t_idx + 1]
                                                 
-                                                # Check if this pair is valid (continuous)
-                                                # Use calculated gaps
-                                                gap = ts_gaps[t_idx]
-                                                is_valid_pair = (gap == 0)
+                                                        # Check if this pair is valid (continuous)
+                                                        # Use calculated gaps
+                                                        gap = ts_gaps[t_idx]
+                                                        is_valid_pair = (gap == 0)
                                                 
-                                                if (lab_task_1, inst_id, room_id, day, t1) in assign and \
-                                                   (lab_task_2, inst_id, room_id, day, t2) in assign:
+                                                        if (lab_task_1, inst_id, room_id, day, t1) in assign and \
+                                                           (lab_task_2, inst_id, room_id, day, t2) in assign:
                                                     
-                                                    if is_valid_pair:
-                                                        # If lab_1 is at t1, lab_2 MUST be at t2
-                                                        model.Add(assign[(lab_task_2, inst_id, room_id, day, t2)] == 
-                                                                  assign[(lab_task_1, inst_id, room_id, day, t1)])
-                                                    else:
-                                                        # Invalid pair (spans break), forbid starting at t1
-                                                        model.Add(assign[(lab_task_1, inst_id, room_id, day, t1)] == 0)
+                                                            if is_valid_pair:
+                                                                # If lab_1 is at t1, lab_2 MUST be at t2
+                                                                model.Add(assign[(lab_task_2, inst_id, room_id, day, t2)] == 
+                                                                          assign[(lab_task_1, inst_id, room_id, day, t1)])
+                                                            else:
+                                                                # Invalid pair (spans break), forbid starting at t1
+                                                                model.Add(assign[(lab_task_1, inst_id, room_id, day, t1)] == 0)
                                             
-                                            # Boundary condition: lab_1 cannot start at the LAST slot
-                                            last_ts = all_timeslots[-1]
-                                            if (lab_task_1, inst_id, room_id, day, last_ts) in assign:
-                                                model.Add(assign[(lab_task_1, inst_id, room_id, day, last_ts)] == 0)
+                                                    # Boundary condition: lab_1 cannot start at the LAST slot
+                                                    last_ts = all_timeslots[-1]
+                                                    if (lab_task_1, inst_id, room_id, day, last_ts) in assign:
+                                                        model.Add(assign[(lab_task_1, inst_id, room_id, day, last_ts)] == 0)
                                                 
-                                            # Boundary condition: lab_2 cannot start at the FIRST slot
-                                            first_ts = all_timeslots[0]
-                                            if (lab_task_2, inst_id, room_id, day, first_ts) in assign:
-                                                model.Add(assign[(lab_task_2, inst_id, room_id, day, first_ts)] == 0)
+                                                    # Boundary condition: lab_2 cannot start at the FIRST slot
+                                                    first_ts = all_timeslots[0]
+                                                    if (lab_task_2, inst_id, room_id, day, first_ts) in assign:
+                                                        model.Add(assign[(lab_task_2, inst_id, room_id, day, first_ts)] == 0)
 
-        # 8. Faculty Break Constraint (Minimum 1 hour break between classes)
-        # Exception: Continuous Lab sessions (which are effectively one long class)
+                control.checkpoint('lab constraints')
+
+                # 8. Faculty Break Constraint (Minimum 1 hour break between classes)
+                trace.step('8. faculty break', level=1)
+                # Exception: Continuous Lab sessions (which are effectively one long class)
         
-        # First, identify all "paired" lab tasks that MUST be consecutive.
-        # We can store them as a set of tuples: (task_id_1, task_id_2)
-        paired_lab_tasks = set()
-        for sg_id, group in all_student_groups.items():
-            enrolled_courses = group.get('enrolledCourses', [])
-            for course_id in enrolled_courses:
-                course = all_courses.get(course_id)
-                if not course: continue
-                try:
-                    lab_hours = int(course.get('labHours', 0))
-                except:
-                    lab_hours = 0
+                # First, identify all "paired" lab tasks that MUST be consecutive.
+                # We can store them as a set of tuples: (task_id_1, task_id_2)
+                paired_lab_tasks = set()
+                for sg_id, group in all_student_groups.items():
+                    enrolled_courses = group.get('enrolledCourses', [])
+                    for course_id in enrolled_courses:
+                        course = all_courses.get(course_id)
+                        if not course: continue
+                        try:
+                            lab_hours = int(course.get('labHours', 0))
+                        except:
+                            lab_hours = 0
                 
-                if lab_hours > 0:
-                    for i in range(0, lab_hours, 2):
-                        if i + 1 < lab_hours:
-                            t1_id = f'{sg_id}_{course_id}_lab_{i}'
-                            t2_id = f'{sg_id}_{course_id}_lab_{i+1}'
-                            if t1_id in tasks and t2_id in tasks:
-                                paired_lab_tasks.add((t1_id, t2_id))
-
-        # Now apply the constraint for each instructor
-        for inst_id in all_instructors:
-            for day in all_days:
-                for t_idx in range(len(all_timeslots) - 1):
-                    t1 = all_timeslots[t_idx]
-                    t2 = all_timeslots[t_idx + 1]
-                    
-                    # Check gap. If gap >= 60 minutes, then they ALREADY have a break.
-                    # So we only enforce the constraint if gap < 60.
-                    gap = ts_gaps[t_idx]
-                    if gap >= 60:
-                        continue
-
-                    # Gather all assignments for this instructor at t1 and t2
-                    assigns_t1 = []
-                    assigns_t2 = []
+                        if lab_hours > 0:
+                            for i in range(0, lab_hours, 2):
+                                if i + 1 < lab_hours:
+                                    t1_id = f'{sg_id}_{course_id}_lab_{i}'
+                                    t2_id = f'{sg_id}_{course_id}_lab_{i+1}'
+                                    if t1_id in tasks and t2_id in tasks:
+                                        paired_lab_tasks.add((t1_id, t2_id))
+
+                paired_lab_starts = {t1_id for t1_id, _ in paired_lab_tasks}
+
+                # Now apply the constraint for each instructor
+                for inst_id in all_instructors:
+                    for day in all_days:
+                        for t_idx in range(len(all_timeslots) - 1):
+                            t1 = all_timeslots[t_idx]
+                            t2 = all_timeslots[t_idx + 1]
                     
-                    # Also track if a paired lab is starting at t1
-                    paired_lab_start_vars = []
-
-                    for task_id in tasks:
-                        for room_id in all_rooms:
-                            # Check t1 assignment
-                            if (task_id, inst_id, room_id, day, t1) in assign:
-                                var_t1 = assign[(task_id, inst_id, room_id, day, t1)]
-                                assigns_t1.append(var_t1)
-                                
-                                # Check if this task is the first part of a paired lab
-                                is_start_of_pair = False
-                                for (pt1, pt2) in paired_lab_tasks:
-                                    if pt1 == task_id:
-                                        is_start_of_pair = True
-                                        break
-                                
-                                if is_start_of_pair:
-                                    paired_lab_start_vars.append(var_t1)
-
-                            # Check t2 assignment
-                            if (task_id, inst_id, room_id, day, t2) in assign:
-                                assigns_t2.append(assign[(task_id, inst_id, room_id, day, t2)])
+                            # Check gap. If gap >= 60 minutes, then they ALREADY have a break.
+                            # So we only enforce the constraint if gap < 60.
+                            gap = ts_gaps[t_idx]
+                            if gap >= 60:
+                                continue
+
+                            # Gather all assignments for this instructor at t1 and t2
+                            assigns_t1 = [var for _, var in index.by_inst_slot.get((inst_id, day, t1), ())]
+                            assigns_t2 = [var for _, var in index.by_inst_slot.get((inst_id, day, t2), ())]
                     
-                    if assigns_t1 and assigns_t2:
-                        # Constraint: Sum(assigns_t1) + Sum(assigns_t2) <= 1 + Sum(paired_lab_start_vars)
-                        model.Add(sum(assigns_t1) + sum(assigns_t2) <= 1 + sum(paired_lab_start_vars))
+                            # Also track if a paired lab is starting at t1
+                            paired_lab_start_vars = [var for task_id, var in index.by_inst_slot.get((inst_id, day, t1), ())
+                                                     if task_id in paired_lab_starts]
 
-        # 9. Max One Lab Per Day per Student Group
-        for sg_id, group in all_student_groups.items():
-            enrolled_courses = group.get('enrolledCourses', [])
-            lab_courses = []
+                            if assigns_t1 and assigns_t2:
+                                # Constraint: Sum(assigns_t1) + Sum(assigns_t2) <= 1 + Sum(paired_lab_start_vars)
+                                no_break = relaxation.slack('facultyBreak', 1, instructor=inst_id, day=day, timeslots=[t1, t2])
+                                model.Add(sum(assigns_t1) + sum(assigns_t2) <= 1 + sum(paired_lab_start_vars) + no_break)
+
+            # 9. Max One Lab Per Day per Student Group
+            trace.step('9. one lab per day', level=1)
+            for sg_id, group in all_student_groups.items():
+                enrolled_courses = group.get('enrolledCourses', [])
+                lab_courses = []
             
-            # Identify which enrolled courses are labs
-            for c_id in enrolled_courses:
-                course = all_courses.get(c_id)
-                if not course: continue
-                try:
-                    lab_hours = int(course.get('labHours', 0))
-                except:
-                    lab_hours = 0
+                # Identify which enrolled courses are labs
+                for c_id in enrolled_courses:
+                    course = all_courses.get(c_id)
+                    if not course: continue
+                    try:
+                        lab_hours = int(course.get('labHours', 0))
+                    except:
+                        lab_hours = 0
                 
-                if lab_hours > 0:
-                    lab_courses.append(c_id)
+                    if lab_hours > 0:
+                        lab_courses.append(c_id)
             
-            if len(lab_courses) > 1:
-                # If group has multiple lab courses, ensure only 1 is scheduled per day
-                for day in all_days:
-                    course_active_vars = []
+                if len(lab_courses) > 1:
+                    # If group has multiple lab courses, ensure only 1 is scheduled per day
+                    for day in all_days:
+                        course_active_vars = []
                     
-                    for c_id in lab_courses:
-                        # Find all tasks for this lab course
-                        lab_tasks = [tid for tid, t in tasks.items() 
-                                     if t['group_id'] == sg_id and t['course_id'] == c_id and t['type'] == 'lab']
+                        for c_id in lab_courses:
+                            # Find all tasks for this lab course
+                            lab_tasks = [tid for tid, t in tasks.items() 
+                                         if t['group_id'] == sg_id and t['course_id'] == c_id and t['type'] == 'lab']
                         
-                        if not lab_tasks:
-                            continue
+                            if not lab_tasks:
+                                continue
                             
-                        # Gather actual assignment vars for this course on this day
-                        course_day_assigns = []
-                        for task_id in lab_tasks:
-                            for inst_id in all_instructors:
-                                for room_id in all_rooms:
-                                    for timeslot in all_timeslots:
-                                        if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                            course_day_assigns.append(assign[(task_id, inst_id, room_id, day, timeslot)])
+                            # Gather actual assignment vars for this course on this day
+                            course_day_assigns = index.task_day_vars(lab_tasks, day)
                         
-                        # Create a bool: is this lab course scheduled today?
-                        if course_day_assigns:
-                            is_active = model.NewBoolVar(f'lab_active_{sg_id}_{c_id}_{day}')
-                            model.AddMaxEquality(is_active, course_day_assigns)
-                            course_active_vars.append(is_active)
+                            # Create a bool: is this lab course scheduled today?
+                            if course_day_assigns:
+                                is_active = model.NewBoolVar(f'lab_active_{sg_id}_{c_id}_{day}')
+                                model.AddMaxEquality(is_active, course_day_assigns)
+                                course_active_vars.append(is_active)
                     
-                    if course_active_vars:
-                        # At most 1 lab course can be active on this day
-                        model.Add(sum(course_active_vars) <= 1)
+                        if course_active_vars:
+                            # At most 1 lab course can be active on this day
+                            extra_labs = relaxation.slack('labsPerDay', len(course_active_vars) - 1, group=sg_id, day=day)
+                            model.Add(sum(course_active_vars) <= 1 + extra_labs)
 
 
 
-        # 10. Lab Afternoon Preference (Hard Constraint)
-        # If a student group prefers labs in the afternoon for a specific course, enforce it.
-        # Afternoon starts at 12:00 PM (720 minutes)
-        
-        # Identify morning slots
-        morning_slots = []
-        for i, ts in enumerate(all_timeslots):
-            start_min, _ = ts_parsed[i]
-            if start_min < 720: # Before 12:00 PM
-                morning_slots.append(ts)
-        
-        for task_id, task_info in tasks.items():
-            if task_info['type'] == 'lab':
-                sg_id = task_info['group_id']
-                course_id = task_info['course_id']
-                group = all_student_groups.get(sg_id)
-                
-                if group:
-                    lab_prefs = group.get('labTimingPreferences', {})
-                    pref = lab_prefs.get(course_id)
-                    
-                    if pref == 'Afternoon':
-                        # Forbid morning slots
-                        for timeslot in morning_slots:
-                             for day in all_days:
-                                for inst_id in all_instructors:
-                                    for room_id in all_rooms:
-                                        if (task_id, inst_id, room_id, day, timeslot) in assign:
-                                            model.Add(assign[(task_id, inst_id, room_id, day, timeslot)] == 0)
+            # 10. Lab Timing Preferences (Hard Constraint)
+            # Enforced at variable creation: lab variables only exist for slots
+            # allowed by the group's (group, course) lab mask.
+
+            # --- DAY SYMMETRY ---
+            # Days with identical availability are interchangeable; only one
+            # numbering of them is kept (see day_symmetry.py)
+            if prepared['day_classes'] and planned is None and settings.get('daySymmetryBreaking', True):
+                trace.step('day symmetry', level=1)
+                constrained = break_day_symmetry(model, index, prepared['day_classes'], list(tasks))
+                log(f"Day symmetry: {len(prepared['day_classes'])} classes of interchangeable days, {constrained} tasks ordered")
+
+            control.checkpoint('faculty and lab day constraints')
+
+            if template_key is not None:
+                metrics.MODEL_TEMPLATE_LOOKUPS.inc(result='miss')
+                template = model_template.store_template(template_key, model, assign)
 
         # --- SOFT CONSTRAINTS (OBJECTIVES) ---
-        objectives = []
+        trace.step('objectives')
+        # (expression, coefficient) terms by name, so lexicographic mode can order
+        # them (see lexicographic.py)
+        objectives = defaultdict(list)
 
         # 11. Disallow 8:30 AM Labs (Soft Constraint / Penalty)
         # We moved this from Hard to Soft because strict enforcement can cause failures 
@@ -888,19 +634,18 @@ def generate_timetable():
         # We apply a MASSIVE penalty (e.g. 1000) to ensure it's avoided unless absolutely necessary.
         if settings.get('disallow830Labs', False):
             # Identify slots in 8:30 AM - 10:30 AM range (510 to 630 minutes)
-            forbidden_slots = []
+            forbidden_slots = set()
             for i, ts in enumerate(all_timeslots):
                 start_min, end_min = ts_parsed[i]
                 if start_min >= 510 and end_min <= 630:
-                     forbidden_slots.append(ts)
+                     forbidden_slots.add(ts)
             
             if forbidden_slots:
                 penalty_weight = 1000 # Very high penalty
-                for task_id, task_info in tasks.items():
-                    if task_info['type'] == 'lab':
-                         for (tid, inst_id, room_id, day, timeslot), var in assign.items():
-                             if tid == task_id and timeslot in forbidden_slots:
-                                 objectives.append(var * penalty_weight)
+                objectives['lab830'] = [(var, penalty_weight)
+                                        for timeslot in all_timeslots if timeslot in forbidden_slots
+                                        for task_id, var in index.by_timeslot.get(timeslot, ())
+                                        if tasks[task_id]['type'] == 'lab']
 
         # 6. Minimize Gaps for Students
         gap_priority = settings.get('gapPriority', 0.0)
@@ -912,21 +657,13 @@ def generate_timetable():
             num_slots = len(all_timeslots)
             
             for sg_id, group in all_student_groups.items():
-                # Filter tasks for this group
-                group_tasks = [tid for tid, t in tasks.items() if t['group_id'] == sg_id]
-                
                 for day in all_days:
                     # Create boolean vars for "is slot t occupied for this group"
                     slot_active = [model.NewBoolVar(f'active_{sg_id}_{day}_{t}') for t in range(num_slots)]
                     
                     for t_idx, ts in enumerate(all_timeslots):
                         # Gather all possible assignments for this group in this slot
-                        possible_assigns = []
-                        for task_id in group_tasks:
-                            for inst_id in all_instructors:
-                                for room_id in all_rooms:
-                                    if (task_id, inst_id, room_id, day, ts) in assign:
-                                        possible_assigns.append(assign[(task_id, inst_id, room_id, day, ts)])
+                        possible_assigns = index.by_group_slot.get((sg_id, day, ts))
                         
                         # Link slot_active to assignments
                         if possible_assigns:
@@ -953,7 +690,7 @@ def generate_timetable():
                     gaps = model.NewIntVar(0, num_slots, f'gaps_{sg_id}_{day}')
                     model.Add(gaps == span - total_active)
                     
-                    objectives.append(gaps * weight)
+                    objectives['gaps'].append((gaps, weight))
 
         # 7. Fair Instructor Workload
         if settings.get('fairWorkload', False):
@@ -961,13 +698,10 @@ def generate_timetable():
             instructor_hours = []
             for inst_id in all_instructors:
                 # Sum all assignments for this instructor
-                inst_assigns = []
-                for key, var in assign.items():
-                    if key[1] == inst_id: # key is (task_id, inst_id, room_id, day, timeslot)
-                        inst_assigns.append(var)
+                inst_assigns = index.by_inst.get(inst_id, [])
                 
                 hours = model.NewIntVar(0, len(all_timeslots) * len(all_days), f'hours_{inst_id}')
-                model.Add(hours == sum(inst_assigns))
+                model.Add(hours == cp_model.LinearExpr.Sum(inst_assigns))
                 instructor_hours.append(hours)
             
             if instructor_hours:
@@ -980,78 +714,138 @@ def generate_timetable():
                 diff = model.NewIntVar(0, 100, 'diff_hours')
                 model.Add(diff == max_h - min_h)
                 
-                objectives.append(diff * weight)
+                objectives['workload'].append((diff, weight))
 
         # 8. Preferred Morning Classes
         preferred_courses = set(settings.get('preferredMorningCourses', []))
         if preferred_courses:
             weight = 2
             # Morning slots: Ends with AM
-            
-            for (task_id, inst_id, room_id, day, timeslot), var in assign.items():
-                task_info = tasks[task_id]
-                if task_info['course_id'] in preferred_courses:
-                    if 'PM' in timeslot and not timeslot.startswith('12'): # 12 PM is noon, arguably morning/lunch, but let's say strictly AM
-                         # Penalize if NOT in morning (so if it is PM, penalize)
-                         # Actually, let's be stricter: Must be AM.
-                         if 'AM' not in timeslot:
-                            objectives.append(var * weight)
+            # 12 PM is noon, arguably morning/lunch; penalize the other PM slots (strictly PM, no AM part)
+            afternoon_slots = {ts for ts in all_timeslots if 'PM' in ts and not ts.startswith('12') and 'AM' not in ts}
+            objectives['morning'] = [(var, weight)
+                                     for timeslot in all_timeslots if timeslot in afternoon_slots
+                                     for task_id, var in index.by_timeslot.get(timeslot, ())
+                                     if tasks[task_id]['course_id'] in preferred_courses]
 
         # 9. Preferred Common Room (Soft Constraint)
         # If a student group has a preferred room, prioritize it for their lectures.
         room_pref_weight = 5 # Adjust weight as needed (higher than others to prioritize)
+        preferred_room_of = {sg_id: group.get('preferredRoomId') for sg_id, group in all_student_groups.items()
+                             if group.get('preferredRoomId') in all_rooms}
+        # Penalty per (task, room or pool): shared lectures are penalized once per
+        # member group whose preferred room is not the assigned room (pool)
+        room_penalty = {}
+        if preferred_room_of:
+            for (task_id, inst_id, room_id, day, timeslot), var in assign.items():
+                penalty = room_penalty.get((task_id, room_id))
+                if penalty is None:
+                    misses = sum(1 for sg_id in tasks[task_id]['group_ids']
+                                 if sg_id in preferred_room_of and preferred_room_of[sg_id] not in room_pools[room_id])
+                    penalty = room_penalty[(task_id, room_id)] = misses * room_pref_weight
+                if penalty:
+                    objectives['roomPreference'].append((var, penalty))
+
+
+        # Minimize total penalty, emitted as one weighted sum
+        # Relaxed mode: violations cost more than everything else together
+        if relaxation.penalties:
+            objectives['violations'] = relaxation.penalties
+
+        objective_terms = [term for terms in objectives.values() for term in terms]
+        if objective_terms:
+            model.Minimize(weighted_sum(objective_terms))
         
-        for (task_id, inst_id, room_id, day, timeslot), var in assign.items():
-            task_info = tasks[task_id]
-            sg_id = task_info['group_id']
-            group = all_student_groups.get(sg_id)
-            
-            if group:
-                preferred_room_id = group.get('preferredRoomId')
-                
-                if preferred_room_id and preferred_room_id in all_rooms:
-                     # If this group has a preference, and the assigned room is NOT the preferred one
-                     if room_id != preferred_room_id:
-                         # Penalize
-                         objectives.append(var * room_pref_weight)
+        control.checkpoint('objective construction')
 
+        timings['build'] = time.monotonic() - build_started
+        metrics.BUILD_SECONDS.observe(timings['build'])
+        metrics.MODEL_VARIABLES.observe(len(model.Proto().variables))
+        metrics.MODEL_CONSTRAINTS.observe(len(model.Proto().constraints))
 
-        # Minimize total penalty
-        if objectives:
-            model.Minimize(sum(objectives))
-        
         # --- SOLVE ---
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 120.0
-        status = solver.Solve(model)
+        trace.step('solve')
+        solve_started = time.monotonic()
+        if settings.get('objectiveMode') == 'lexicographic' and objective_terms:
+            # One solve per objective tier, each fixing the value it reached
+            solver, status = solve_lexicographic(model, objective_tiers(objectives, settings), control, log=log)
+        elif settings.get('solverPortfolio', False):
+            # Race several seeds / search strategies in separate processes
+            solver = solve_portfolio(model, log=log, control=control)
+            status = solver.status
+            log(f"Portfolio winner: {solver.config_name}")
+        else:
+            solver = cp_model.CpSolver()
+            status = control.solve(solver, model)
+
+        timings['solve'] = time.monotonic() - solve_started
+        metrics.SOLVE_SECONDS.observe(timings['solve'])
+        metrics.SOLVER_STATUS.inc(status=solver.StatusName(status))
+        outcome = metrics.solve_outcome(solver.StatusName(status))
+        # Model size and solver outcome for in-process callers (batch.py); not part of the response
+        g.solve_stats = {'solver_status': solver.StatusName(status),
+                         'variables': len(model.Proto().variables),
+                         'constraints': len(model.Proto().constraints)}
+        if model.HasObjective() and status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            metrics.OBJECTIVE_GAP.observe(metrics.relative_gap(solver.ObjectiveValue(), solver.BestObjectiveBound()))
+            g.solve_stats.update(objective=solver.ObjectiveValue(), best_bound=solver.BestObjectiveBound())
+
+        if control.cancelled:
+            raise SolveCancelled('solve')
+        if control.stop_reason == 'stagnation':
+            log(f"Search stopped: no improvement for {control.stagnation_seconds}s")
         status_msg = f"Solver Status: {status} (Optimal={cp_model.OPTIMAL}, Feasible={cp_model.FEASIBLE})"
         print(f"DEBUG: {status_msg}")
         with open("server_debug.log", "a") as f:
             f.write(f"{datetime.now()}: {status_msg}\n")
 
         # --- PROCESS RESULTS ---
+        trace.step('process results')
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+            # The next request with this structure starts from this solution
+            if template is not None:
+                template.remember(solver, assign)
+
+            room_of = {}
+            if use_room_pools:
+                placements = [(task_id, room_id, day, timeslot)
+                              for (task_id, inst_id, room_id, day, timeslot), var in assign.items()
+                              if solver.Value(var) == 1]
+                room_of = assign_rooms(placements, room_pools, tasks, all_student_groups, all_days, all_timeslots)
+
             schedule = []
             for (task_id, inst_id, room_id, day, timeslot), var in assign.items():
                 if solver.Value(var) == 1:
                     task_info = tasks[task_id]
                     course_id = task_info['course_id']
-                    sg_id = task_info['group_id']
-                    
-                    # Get group name
-                    group_name = all_student_groups[sg_id]['id'] # Or name if available
-
-                    schedule.append({
-                        'day': day,
-                        'timeslot': timeslot,
-                        'courseId': course_id,
-                        'course': all_courses[course_id]['name'],
-                        'instructor': all_instructors[inst_id]['name'],
-                        'room': room_id,
-                        'group': group_name,
-                        'type': task_info['type'] # 'lecture' or 'lab'
-                    })
-            return jsonify({'status': 'success', 'schedule': schedule})
+
+                    # One entry per attending group, so shared lectures show in every member's timetable
+                    for sg_id in task_info['group_ids']:
+                        # Get group name
+                        group_name = all_student_groups[sg_id]['id'] # Or name if available
+
+                        schedule.append({
+                            'day': day,
+                            'timeslot': timeslot,
+                            'courseId': course_id,
+                            'course': all_courses[course_id]['name'],
+                            'instructor': all_instructors[inst_id]['name'],
+                            'room': room_of.get(task_id, room_id),
+                            'group': group_name,
+                            'type': task_info['type'] # 'lecture' or 'lab'
+                        })
+
+            outcome = 'success'
+            timings['total'] = time.monotonic() - request_started
+            phase_timings = {k: round(v, 4) for k, v in timings.items()}
+            extra = {}
+            if relaxation:
+                extra['violations'] = relaxation.violations(solver, assign, room_of)
+                log(f"Relaxed mode: {len(extra['violations'])} constraint violations")
+            trace.step('response serialization', sessions=len(schedule))
+            if wants_compact(request, settings):
+                return json_response(request, {'status': 'success', 'schedule': encode_compact(schedule, all_days, all_timeslots), 'timings': phase_timings, **extra})
+            return json_response(request, {'status': 'success', 'schedule': sort_schedule(schedule, all_days, all_timeslots), 'timings': phase_timings, **extra})
         else:
             # --- HEURISTIC ANALYSIS FOR USER FRIENDLY ERROR ---
             hints = []
@@ -1069,16 +863,7 @@ def generate_timetable():
                         except: pass
                 
                 # Re-calculate available
-                avail_slots = 0
-                availability = group.get('availability', {})
-                if availability:
-                    for day in all_days:
-                        slots = availability.get(day, [])
-                        for i in range(min(len(slots), len(all_timeslots))):
-                            if slots[i] == 1:
-                                avail_slots += 1
-                else:
-                    avail_slots = len(all_days) * len(all_timeslots)
+                avail_slots = total_slots(avail['groups'][sg_id])
                 
                 if avail_slots > 0 and (req_hours / avail_slots) >= 0.8: # Lowered to 80%
                      hints.append(f"Student Group '{group.get('id')}' is very busy (Needs {req_hours} slots, Has {avail_slots} available). Any mismatch in lab hours or instructor availability will cause failure. Try freeing up more slots for this group.")
@@ -1112,17 +897,7 @@ def generate_timetable():
                 instructor = all_instructors.get(inst_id)
                 if not instructor: continue
                 
-                # key 'availability'
-                avail_slots = 0
-                availability = instructor.get('availability', {})
-                if availability:
-                    for day in all_days:
-                        slots = availability.get(day, [])
-                        for i in range(min(len(slots), len(all_timeslots))):
-                            if slots[i] == 1:
-                                avail_slots += 1
-                else:
-                     avail_slots = len(all_days) * len(all_timeslots)
+                avail_slots = total_slots(avail['instructors'][inst_id])
                 
                 if avail_slots > 0 and required_hours > avail_slots:
                     hints.append(f"Instructor '{instructor['name']}' is overloaded (Assigned {required_hours} hours, Available for {avail_slots} slots).")
@@ -1134,14 +909,157 @@ def generate_timetable():
             if hints:
                 message += " Likely causes: " + " ".join(hints)
             
-            return jsonify({'status': 'error', 'message': message, 'debug_log': debug_log}), 400
+            timings['total'] = time.monotonic() - request_started
+            phase_timings = {k: round(v, 4) for k, v in timings.items()}
+            return jsonify({'status': 'error', 'message': message, 'debug_log': debug_log, 'timings': phase_timings}), 400
+
+    except DatasetError as e:
+        outcome = 'validation_error'
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
+
+    except SolveCancelled as e:
+        outcome = 'cancelled'
+        print(f"DEBUG: {e}")
+        return jsonify({'status': 'cancelled', 'message': str(e)}), 409
+
+    except DeadlineExceeded as e:
+        outcome = 'timeout'
+        print(f"DEBUG: {e}")
+        return jsonify({'status': 'error', 'message': f"Scheduling Failed: the time limit of {control.time_limit:g}s was reached before the model was built ({e.phase}). Please increase timeLimitSeconds."}), 408
 
     except Exception as e:
+        outcome = 'crash'
         import traceback
         traceback.print_exc()
         # This will now give a more descriptive error message in the app
         return jsonify({'status': 'error', 'message': f"Server crashed: {str(e)}", 'debug_log': debug_log if 'debug_log' in locals() else []}), 500
 
+    finally:
+        if control is not None:
+            solve_control.unregister(control)
+        metrics.INFLIGHT_SOLVES.dec()
+        metrics.REQUESTS.inc(outcome=outcome)
+        metrics.REQUEST_SECONDS.observe(time.monotonic() - request_started)
+        # Sampled replay corpus (see request_capture.py)
+        capture = current_app.config.get('REQUEST_CAPTURE')
+        if capture is not None and isinstance(data, dict):
+            try:
+                capture.record(data, outcome, timings)
+            except OSError as e:
+                print(f"DEBUG: Request capture failed: {e}")
+
+
+@bp.route('/validate', methods=['POST'])
+def validate_timetable():
+    # Runs only the cheap pre-checks so the front end can validate while the user edits
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'Request body must be a JSON object.'}), 400
+
+    started = time.monotonic()
+    try:
+        data, prepared, _ = dataset_store.request_payload(data, current_app.config['DATASET_DB'])
+    except DatasetError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
+    if prepared is not None:
+        problems = collect_problems(data, lab_masks=prepared['lab_masks'], avail=prepared['avail'],
+                                    room_eligibility=prepared['room_eligibility'])
+    else:
+        problems = collect_problems(data)
+    return jsonify({
+        'status': 'success',
+        'valid': not problems,
+        'problems': problems,
+        'elapsedMs': round((time.monotonic() - started) * 1000, 3)
+    })
+
+
+def _dataset_store():
+    return dataset_store.get_store(current_app.config['DATASET_DB'])
+
+
+@bp.route('/datasets', methods=['POST'])
+def create_dataset():
+    # Uploads a full institution once; later requests reference it as "id@version"
+    try:
+        dataset_id, version = _dataset_store().create(request.get_json(silent=True))
+    except DatasetError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
+    return jsonify({'status': 'success', 'datasetId': dataset_id, 'version': version,
+                    'dataset': dataset_store.format_ref(dataset_id, version)}), 201
+
+
+@bp.route('/datasets/<dataset_id>', methods=['PATCH'])
+def update_dataset(dataset_id):
+    # Applies a delta (upsert / remove / replace) and creates the next version
+    try:
+        dataset_id, version = _dataset_store().update(dataset_id, request.get_json(silent=True))
+    except DatasetError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
+    return jsonify({'status': 'success', 'datasetId': dataset_id, 'version': version,
+                    'dataset': dataset_store.format_ref(dataset_id, version)})
+
+
+@bp.route('/datasets/<dataset_id>', methods=['GET'])
+def get_dataset(dataset_id):
+    ref = dataset_id
+    if request.args.get('version'):
+        ref = dataset_store.format_ref(dataset_id, request.args.get('version'))
+    try:
+        dataset_id, version, payload, _ = _dataset_store().resolve(ref)
+    except DatasetError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
+    return jsonify({'status': 'success', 'datasetId': dataset_id, 'version': version, 'payload': payload})
+
+
+@bp.route('/cancel/<request_id>', methods=['POST'])
+def cancel_timetable(request_id):
+    # Signals a running /generate-timetable call that was sent with this request_id
+    if solve_control.cancel(request_id):
+        return jsonify({'status': 'success', 'message': f"Cancellation requested for '{request_id}'."})
+    return jsonify({'status': 'error', 'message': f"No running request with id '{request_id}'."}), 404
+
+@bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return metrics.render(), 200, {'Content-Type': metrics.CONTENT_TYPE}
+
+
+@bp.route('/ready', methods=['GET'])
+def ready():
+    # Readiness probe: only route traffic to workers that finished warm-up
+    if warmup.is_ready():
+        return jsonify({'status': 'ready', 'warmupSeconds': warmup.warmup_seconds()})
+    return jsonify({'status': 'warming_up'}), 503
+
+
+def create_app(warm_up=False, dataset_db=None, capture=None, admin_token=None, profile_dir=None, trace_dir=None):
+    """
+    Application factory. With warm_up=True the worker preloads OR-Tools and
+    runs a tiny solve in a background thread; /ready answers 503 until it
+    is done.
+    `dataset_db` is the SQLite file of the dataset store (TIMELY_DATASET_DB).
+    `capture` is the RequestCapture for sampled requests (TIMELY_CAPTURE_DIR).
+    `admin_token` enables per-request profiling into `profile_dir`
+    (TIMELY_ADMIN_TOKEN, TIMELY_PROFILE_DIR; see request_profiling.py).
+    `trace_dir` receives requested Chrome traces (TIMELY_TRACE_DIR; see tracing.py).
+    """
+    flask_app = Flask(__name__)
+    flask_app.config['DATASET_DB'] = dataset_db or dataset_store.DEFAULT_DB_PATH
+    flask_app.config['REQUEST_CAPTURE'] = capture or RequestCapture.from_env()
+    flask_app.config['ADMIN_TOKEN'] = admin_token or os.environ.get('TIMELY_ADMIN_TOKEN')
+    flask_app.config['PROFILE_DIR'] = profile_dir or DEFAULT_PROFILE_DIR
+    flask_app.config['TRACE_DIR'] = trace_dir or DEFAULT_TRACE_DIR
+    CORS(flask_app)
+    flask_app.register_blueprint(bp)
+    if warm_up:
+        warmup.start_warm_up()
+    return flask_app
+
+
+app = create_app()
+
 if __name__ == '__main__':
+    # Development server only; production uses wsgi.py (see gunicorn.conf.py)
+    warmup.warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=True, reloader_interval=1, reloader_type='stat', extra_files=None, exclude_patterns=['*/Timely_venv/*', '*\\Timely_venv\\*'])
 
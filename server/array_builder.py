@@ -0,0 +1,275 @@
+"""
+Array-based model emission (`settings.modelBuilder = "arrays"`).
+
+The regular builder creates every assignment variable with NewBoolVar and
+every hard constraint through a Python expression (`sum(...) <= 1`), which
+dominates build time for large requests. ArrayModelBuilder enumerates the
+assignment variables as NumPy index arrays (task, instructor, room, day,
+slot) and writes variables and the bulk hard constraints straight into
+the CpModelProto:
+
+  1. each task exactly once              (exactly_one)
+  2. instructor / group double booking   (at_most_one)
+     room (pool) double booking          (at_most_one / linear)
+  6. no repeated lecture per day         (linear)
+  7. consecutive lab halves              (linear equalities)
+  8. faculty break                       (linear)
+
+The model is the same as the regular builder's: same variables in the same
+order, and the same constraints up to their order in the proto (see
+tests/test_array_builder.py). Variables are not named. The remaining, much
+smaller constraint families and the objectives are added by
+generate_timetable with the usual API, on the IntVar objects in `assign`.
+"""
+import numpy as np
+from ortools.sat.python import cp_model
+
+from availability import session_slots
+
+# Lower bound cp_model writes for `expr <= k`
+INT_MIN = -2 ** 63
+
+
+def _groups(keys, values):
+    """Splits `values` by equal `keys`: yields (key, values in their original order)."""
+    if len(keys) == 0:
+        return
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    sorted_values = values[order]
+    starts = np.flatnonzero(np.diff(sorted_keys)) + 1
+    bounds = np.concatenate(([0], starts, [len(sorted_keys)]))
+    for i in range(len(bounds) - 1):
+        yield int(sorted_keys[bounds[i]]), sorted_values[bounds[i]:bounds[i + 1]]
+
+
+def _lab_partner(task_id):
+    prefix, index = task_id.rsplit('_', 1)
+    return f'{prefix}_{int(index) + 1}'
+
+
+class ArrayModelBuilder:
+    def __init__(self, model, tasks, candidates, avail, room_pools, all_instructors,
+                 all_student_groups, all_days, all_timeslots, ts_gaps):
+        self.model = model
+        self.proto = model.Proto()
+        self.tasks = tasks
+        self.candidates = candidates
+        self.avail = avail
+        self.room_pools = room_pools
+        self.all_instructors = all_instructors
+        self.all_student_groups = all_student_groups
+        self.all_days = all_days
+        self.all_timeslots = all_timeslots
+        self.ts_gaps = ts_gaps
+
+        self.task_ids = list(tasks)
+        self.task_pos = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        self.inst_ids = list(all_instructors)
+        self.inst_pos = {inst_id: i for i, inst_id in enumerate(self.inst_ids)}
+        self.room_ids = list(room_pools)
+        self.room_pos = {room_id: i for i, room_id in enumerate(self.room_ids)}
+
+    # --- proto writers ---
+
+    def _exactly_one(self, literals):
+        self.proto.constraints.add().exactly_one.literals.extend(literals)
+
+    def _at_most_one(self, literals):
+        self.proto.constraints.add().at_most_one.literals.extend(literals)
+
+    def _linear(self, variables, coeffs, lower, upper):
+        linear = self.proto.constraints.add().linear
+        linear.vars.extend(variables)
+        linear.coeffs.extend(coeffs)
+        linear.domain.extend((lower, upper))
+
+    # --- variables ---
+
+    def create_variables(self):
+        """
+        Adds one Boolean per open (task, instructor, room, day, slot), in the
+        regular builder's order. Returns (assign, lab_vars).
+        """
+        combos = []
+        combo_ids = []
+        masks = []
+        for task_id, task_info in self.tasks.items():
+            cand = self.candidates[task_id]
+            group_masks = cand['group_masks']
+            for inst_id in cand['instructors']:
+                inst_masks = self.avail['instructors'].get(inst_id)
+                inst_pos = self.inst_pos[inst_id]
+                for room_id in cand['rooms']:
+                    # Pooled rooms share their availability
+                    room_masks = self.avail['rooms'][self.room_pools[room_id][0]]
+                    for d_idx, day in enumerate(self.all_days):
+                        open_slots = group_masks[day] & room_masks[day]
+                        if inst_masks is not None:
+                            open_slots &= inst_masks[day]
+                        open_slots = session_slots(open_slots, task_info.get('lab_role'), cand['lab_mask'])
+                        if open_slots:
+                            combos.append((task_id, inst_id, room_id, day))
+                            combo_ids.append((self.task_pos[task_id], inst_pos, self.room_pos[room_id], d_idx))
+                            masks.append(open_slots)
+
+        num_slots = len(self.all_timeslots)
+        bits = (np.array(masks, dtype=np.int64)[:, None] >> np.arange(num_slots, dtype=np.int64)) & 1
+        combo_idx, slot_idx = np.nonzero(bits)
+        ids = np.array(combo_ids, dtype=np.int64).reshape(-1, 4)[combo_idx]
+        self.task_idx, self.inst_idx, self.room_idx, self.day_idx = ids.T
+        self.slot_idx = slot_idx.astype(np.int64)
+
+        count = len(combo_idx)
+        base = len(self.proto.variables)
+        if count:
+            self.proto.merge_text_format('variables { domain: [0, 1] }\n' * count)
+        self.var_idx = np.arange(base, base + count, dtype=np.int64)
+
+        timeslots = self.all_timeslots
+        keys = [combos[c] + (timeslots[s],) for c, s in zip(combo_idx.tolist(), slot_idx.tolist())]
+        variables = list(map(cp_model.IntVar, [self.proto] * count, range(base, base + count)))
+        assign = dict(zip(keys, variables))
+
+        is_lab = np.array([t['type'] == 'lab' for t in self.tasks.values()], dtype=bool)
+        lab_vars = [variables[i] for i in np.flatnonzero(is_lab[self.task_idx]).tolist()]
+        return assign, lab_vars
+
+    # --- hard constraints ---
+
+    def add_hard_constraints(self, control):
+        self._exactly_once()
+        self._double_booking()
+        control.checkpoint('hard constraints')
+        self._lecture_repeats()
+        self._lab_pairs()
+        control.checkpoint('lab constraints')
+        self._faculty_break()
+
+    def _slot_key(self, first):
+        return (first * len(self.all_days) + self.day_idx) * len(self.all_timeslots) + self.slot_idx
+
+    def _exactly_once(self):
+        # 1. Each task must be scheduled exactly once
+        for _, literals in _groups(self.task_idx, self.var_idx):
+            self._exactly_one(literals.tolist())
+
+    def _double_booking(self):
+        # 2. No double booking: instructors, rooms or pools, groups
+        for _, literals in _groups(self._slot_key(self.inst_idx), self.var_idx):
+            if len(literals) > 1:
+                self._at_most_one(literals.tolist())
+
+        slots_per_room = len(self.all_days) * len(self.all_timeslots)
+        for key, literals in _groups(self._slot_key(self.room_idx), self.var_idx):
+            size = len(self.room_pools[self.room_ids[key // slots_per_room]])
+            if len(literals) <= size:
+                continue
+            if size == 1:
+                self._at_most_one(literals.tolist())
+            else:
+                self._linear(literals.tolist(), [1] * len(literals), INT_MIN, size)
+
+        # Groups: one entry per (variable, attending group), so shared lectures block every member
+        group_pos = {sg_id: i for i, sg_id in enumerate(self.all_student_groups)}
+        members = [[group_pos[sg_id] for sg_id in task_info['group_ids']] for task_info in self.tasks.values()]
+        counts = np.array([len(m) for m in members], dtype=np.int64)
+        member_start = np.cumsum(counts) - counts
+        flat = np.array([g for m in members for g in m], dtype=np.int64)
+        per_var = counts[self.task_idx]
+        rows = np.repeat(np.arange(len(self.var_idx)), per_var)
+        offset = np.arange(len(rows)) - np.repeat(np.cumsum(per_var) - per_var, per_var)
+        groups = flat[member_start[self.task_idx[rows]] + offset]
+        keys = (groups * len(self.all_days) + self.day_idx[rows]) * len(self.all_timeslots) + self.slot_idx[rows]
+        for _, literals in _groups(keys, self.var_idx[rows]):
+            if len(literals) > 1:
+                self._at_most_one(literals.tolist())
+
+    def _lecture_repeats(self):
+        # 6. No repeating lectures of a course per day for a group (shared lectures count for every member)
+        lecture_tasks = {}
+        for t_pos, task_info in enumerate(self.tasks.values()):
+            if task_info['type'] == 'lecture':
+                for sg_id in task_info['group_ids']:
+                    lecture_tasks.setdefault((sg_id, task_info['course_id']), []).append(t_pos)
+        num_days = len(self.all_days)
+        task_day = self.task_idx * num_days + self.day_idx
+        by_task_day = dict(_groups(task_day, self.var_idx))
+        for sg_id, group in self.all_student_groups.items():
+            for course_id in group.get('enrolledCourses', []):
+                t_positions = lecture_tasks.get((sg_id, course_id), [])
+                if len(t_positions) <= 1:
+                    continue
+                for d_idx in range(num_days):
+                    parts = [by_task_day[t * num_days + d_idx] for t in t_positions if t * num_days + d_idx in by_task_day]
+                    if parts:
+                        literals = np.concatenate(parts).tolist()
+                        self._linear(literals, [1] * len(literals), INT_MIN, 1)
+
+    def _lab_pairs(self):
+        # 7. Both halves of a 2-slot lab back to back, same instructor and room (pool)
+        num_slots = len(self.all_timeslots)
+        partner = np.full(len(self.task_ids), -1, dtype=np.int64)
+        is_second = np.zeros(len(self.task_ids), dtype=bool)
+        for t_pos, (task_id, task_info) in enumerate(self.tasks.items()):
+            if task_info.get('lab_role') == 'first' and _lab_partner(task_id) in self.task_pos:
+                partner[t_pos] = self.task_pos[_lab_partner(task_id)]
+                is_second[partner[t_pos]] = True
+
+        dims = (len(self.task_ids), len(self.inst_ids), len(self.room_ids), len(self.all_days), num_slots)
+        codes = np.ravel_multi_index((self.task_idx, self.inst_idx, self.room_idx, self.day_idx, self.slot_idx), dims)
+        order = np.argsort(codes)
+        sorted_codes = codes[order]
+
+        if not len(self.var_idx):
+            return
+        first = np.flatnonzero(partner[self.task_idx] >= 0)
+        # A first half cannot start in the last slot
+        at_end = first[self.slot_idx[first] == num_slots - 1]
+        for v in self.var_idx[at_end].tolist():
+            self._linear([v], [1], 0, 0)
+        first = first[self.slot_idx[first] < num_slots - 1]
+        partner_codes = np.ravel_multi_index((partner[self.task_idx[first]], self.inst_idx[first], self.room_idx[first],
+                                              self.day_idx[first], self.slot_idx[first] + 1), dims)
+        pos = np.searchsorted(sorted_codes, partner_codes)
+        pos = np.minimum(pos, len(sorted_codes) - 1)
+        found = sorted_codes[pos] == partner_codes
+        gaps = np.asarray(self.ts_gaps, dtype=np.int64)
+        for v1, v2, slot in zip(self.var_idx[first[found]].tolist(), self.var_idx[order[pos[found]]].tolist(),
+                                self.slot_idx[first[found]].tolist()):
+            if gaps[slot] == 0:
+                # Second half at t+1 exactly when the first half is at t
+                self._linear(sorted((v1, v2)), [-1, 1] if v1 < v2 else [1, -1], 0, 0)
+            else:
+                # The pair would span a break
+                self._linear([v1], [1], 0, 0)
+
+        # A second half cannot be in the first slot
+        second = np.flatnonzero(is_second[self.task_idx] & (self.slot_idx == 0))
+        for v in self.var_idx[second].tolist():
+            self._linear([v], [1], 0, 0)
+
+    def _faculty_break(self):
+        # 8. One slot break between an instructor's classes unless the gap is >= 60
+        # minutes; the two halves of a lab count as one class
+        is_start = np.zeros(len(self.task_ids), dtype=bool)
+        for t_pos, (task_id, task_info) in enumerate(self.tasks.items()):
+            if task_info.get('lab_role') == 'first' and _lab_partner(task_id) in self.task_pos:
+                is_start[t_pos] = True
+        by_slot = {key: literals for key, literals in _groups(self._slot_key(self.inst_idx), np.arange(len(self.inst_idx)))}
+        num_days = len(self.all_days)
+        num_slots = len(self.all_timeslots)
+        for inst_pos in range(len(self.inst_ids)):
+            for d_idx in range(num_days):
+                for t_idx in range(num_slots - 1):
+                    if self.ts_gaps[t_idx] >= 60:
+                        continue
+                    key = (inst_pos * num_days + d_idx) * num_slots + t_idx
+                    at_t1 = by_slot.get(key)
+                    at_t2 = by_slot.get(key + 1)
+                    if at_t1 is None or at_t2 is None:
+                        continue
+                    # sum(t1) + sum(t2) <= 1 + sum(lab starts at t1): lab starts cancel out
+                    at_t1 = at_t1[~is_start[self.task_idx[at_t1]]]
+                    literals = np.sort(self.var_idx[np.concatenate((at_t1, at_t2))]).tolist()
+                    self._linear(literals, [1] * len(literals), INT_MIN, 1)
@@ -0,0 +1,91 @@
+"""
+Availability as per-entity, per-day integer bitmasks.
+
+Requests send availability as {"Monday": [1, 1, 0, ...]}; bit t of a day
+mask is set when slot t is available. A 0 means unavailable; anything
+else, a missing day, a short list or no availability at all means
+available, which is how the model has always treated it.
+
+With masks, intersections are `a & b`, unions `a | b`, slot counts
+`popcount(mask)` and "t and t+1 both free" is `pairs(mask)`.
+"""
+import functools
+import operator
+
+
+def full_mask(n_slots):
+    return (1 << n_slots) - 1
+
+
+def day_mask(slots, n_slots):
+    mask = full_mask(n_slots)
+    if not slots:
+        return mask
+    for t_idx in range(min(len(slots), n_slots)):
+        if slots[t_idx] == 0:
+            mask &= ~(1 << t_idx)
+    return mask
+
+
+def entity_masks(entity, all_days, n_slots):
+    """{day: mask} for one instructor, room or student group."""
+    availability = entity.get('availability', {}) or {}
+    return {day: day_mask(availability.get(day), n_slots) for day in all_days}
+
+
+def build_masks(entities_by_id, all_days, n_slots):
+    """{entity_id: {day: mask}} for a dict of instructors, rooms or groups."""
+    return {e_id: entity_masks(entity, all_days, n_slots) for e_id, entity in entities_by_id.items()}
+
+
+def build_availability(all_instructors, all_rooms, all_student_groups, all_days, all_timeslots):
+    """Converts every availability array of a request once, at ingestion."""
+    n_slots = len(all_timeslots)
+    return {
+        'instructors': build_masks(all_instructors, all_days, n_slots),
+        'rooms': build_masks(all_rooms, all_days, n_slots),
+        'groups': build_masks(all_student_groups, all_days, n_slots),
+        'full': full_mask(n_slots),
+        'n_slots': n_slots,
+    }
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def pairs(mask):
+    """Bit t set when both t and t+1 are set."""
+    return mask & (mask >> 1)
+
+
+def session_slots(free, lab_role=None, lab_mask=None):
+    """
+    Slots a session may occupy given the slots where its resources are free.
+    Lab halves need both slots of the pair free and a start allowed by the
+    (group, course) lab mask (see lab_preferences.py).
+    """
+    if lab_mask is None:
+        return free
+    if lab_role == 'first':
+        return pairs(free) & lab_mask['pair']
+    if lab_role == 'second':
+        return (pairs(free) & lab_mask['pair']) << 1
+    return free & lab_mask['single']
+
+
+def union(masks):
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
+
+
+def intersect(day_masks_list, all_days):
+    """{day: mask} of slots available to every entity in the list."""
+    return {day: functools.reduce(operator.and_, (masks[day] for masks in day_masks_list)) for day in all_days}
+
+
+def total_slots(day_masks):
+    """Available slot count over all days of one entity."""
+    return sum(popcount(mask) for mask in day_masks.values())
@@ -0,0 +1,158 @@
+"""
+Solves a directory of timetable requests offline, without going through HTTP.
+
+    python batch.py ../tests --out results --profile fast --jobs 4
+    python batch.py captures/ --out results --profile overrides.json
+
+Each instance runs the same generate_timetable pipeline as the service,
+inside a Flask request context in a worker process. Per instance the
+response goes to <out>/<name>.result.json, and one row per instance
+(status, objective, phase timings, model size) to <out>/summary.csv.
+
+A profile is a set of settings laid over every request's own settings:
+one of PROFILES, or a JSON file with a settings object. Unless the profile
+or the request sets solverWorkers, each solve gets an equal share of the
+CPU cores so that --jobs parallel solves do not oversubscribe the machine.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from loadtest import load_corpus
+
+PROFILES = {
+    'default': {},
+    'fast': {'timeLimitSeconds': 30, 'engine': 'decomposed', 'stagnationSeconds': 5},
+    'thorough': {'timeLimitSeconds': 600, 'stagnationSeconds': 60},
+}
+
+SUMMARY_FIELDS = ['instance', 'http_status', 'status', 'solver_status', 'objective', 'best_bound',
+                  'validation', 'build', 'solve', 'total', 'variables', 'constraints', 'wall_seconds', 'message']
+
+
+def load_profile(profile):
+    """Settings overrides for a profile name or a JSON file path."""
+    if profile in PROFILES:
+        return dict(PROFILES[profile])
+    with open(profile, encoding='utf-8') as f:
+        overrides = json.load(f)
+    if not isinstance(overrides, dict):
+        raise ValueError(f"Profile {profile} must contain a JSON object of settings")
+    return overrides
+
+
+def instance_settings(payload, overrides, default_workers=None):
+    """The request's settings under the profile; `default_workers` only when neither sets solverWorkers."""
+    settings = dict(payload.get('settings') or {}, **overrides)
+    if default_workers and 'solverWorkers' not in settings:
+        settings['solverWorkers'] = default_workers
+    return settings
+
+
+def solve_instance(name, payload, overrides, default_workers=None):
+    """Runs one request through generate_timetable. Returns (response body, summary row)."""
+    from flask import g
+    from app import app, generate_timetable
+
+    payload = dict(payload)
+    payload['settings'] = instance_settings(payload, overrides, default_workers)
+    started = time.monotonic()
+    with app.test_request_context(json=payload):
+        resp = generate_timetable()
+        status_code = 200
+        if isinstance(resp, tuple):
+            resp, status_code = resp
+        body = resp.get_json()
+        stats = g.get('solve_stats', {})
+    wall = time.monotonic() - started
+
+    row = {'instance': name, 'http_status': status_code, 'status': body.get('status'),
+           'message': body.get('message', ''), 'wall_seconds': round(wall, 4)}
+    row.update(body.get('timings', {}))
+    row.update(stats)
+    return body, row
+
+
+def _output_name(name):
+    for suffix in ('.json.gz', '.json'):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def run_batch(payloads, out_dir, overrides, jobs=1, log=print):
+    """
+    Solves `payloads` ([(name, request)]) with at most `jobs` processes and
+    writes the results and summary.csv to `out_dir`. Returns the summary rows
+    in instance order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    # Each parallel solve gets an equal share of the cores
+    default_workers = max(1, (os.cpu_count() or 1) // jobs) if jobs > 1 else None
+
+    rows = []
+
+    def record(name, body, row):
+        with open(os.path.join(out_dir, _output_name(name) + '.result.json'), 'w', encoding='utf-8') as f:
+            json.dump(body, f, indent=2)
+        rows.append(row)
+        log(f"{name}: {row['status']} in {row['wall_seconds']:.2f}s")
+
+    if jobs <= 1:
+        # In-process, which keeps tracebacks and debuggers usable
+        for name, payload in payloads:
+            record(name, *solve_instance(name, payload, overrides, default_workers))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(solve_instance, name, payload, overrides, default_workers): name
+                       for name, payload in payloads}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    body, row = future.result()
+                except Exception as e:
+                    body = {'status': 'error', 'message': f"Worker failed: {e}"}
+                    row = {'instance': name, 'status': 'error', 'message': body['message'], 'wall_seconds': 0.0}
+                record(name, body, row)
+
+    rows.sort(key=lambda row: row['instance'])
+    with open(os.path.join(out_dir, 'summary.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve a directory of timetable requests offline.')
+    parser.add_argument('instances', help='Directory of request JSON files (.json or .json.gz)')
+    parser.add_argument('--outcome', action='append',
+                        help='Only solve captured requests with this outcome (repeatable)')
+    parser.add_argument('--out', required=True, help='Output directory for results and summary.csv')
+    parser.add_argument('--profile', default='default',
+                        help=f"Settings profile: {', '.join(PROFILES)} or a JSON file of settings")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Parallel solver processes')
+    args = parser.parse_args()
+
+    payloads = load_corpus(args.instances, args.outcome)
+    if not payloads:
+        parser.error(f'No timetable requests found in {args.instances}')
+    try:
+        overrides = load_profile(args.profile)
+    except (OSError, ValueError) as e:
+        parser.error(f'Invalid profile: {e}')
+
+    jobs = max(1, min(args.jobs, len(payloads)))
+    print(f"Solving {len(payloads)} instances with profile '{args.profile}' on {jobs} processes")
+    started = time.monotonic()
+    rows = run_batch(payloads, args.out, overrides, jobs)
+    solved = sum(1 for row in rows if row['status'] == 'success')
+    print(f"{solved}/{len(rows)} solved in {time.monotonic() - started:.1f}s; "
+          f"summary in {os.path.join(args.out, 'summary.csv')}")
+
+
+if __name__ == '__main__':
+    main()
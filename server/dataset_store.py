@@ -0,0 +1,241 @@
+"""
+Versioned institution datasets persisted in SQLite.
+
+Clients upload the full request body once (POST /datasets), then send small
+deltas (PATCH /datasets/<id>) and reference `dataset_id@version` (or just
+`dataset_id` for the latest version) in /generate-timetable and /validate
+instead of re-sending everything.
+
+Delta format (every key optional):
+    {
+      "baseVersion": 3,                        # reject if the latest version differs
+      "upsert": {"instructors": [{"id": "I1", "availability": {...}}]},
+                                               # merged into the entity with that id, or added
+      "remove": {"courses": ["C9"]},           # entity ids to delete
+      "replace": {"days": [...], "timeslots": [...], "settings": {...}}
+    }
+
+Versions are immutable, so their parsed payload and preprocessed structures
+(see preprocess.py) are cached in memory per (dataset_id, version).
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from preprocess import preprocess
+
+DEFAULT_DB_PATH = os.environ.get('TIMELY_DATASET_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets.db'))
+MAX_CACHED_VERSIONS = 16
+
+ENTITY_COLLECTIONS = ('instructors', 'courses', 'rooms', 'student_groups')
+REPLACEABLE_KEYS = ('days', 'timeslots', 'settings')
+
+
+class DatasetError(Exception):
+    """Invalid dataset or delta; maps to HTTP 400."""
+    status_code = 400
+
+
+class DatasetNotFound(DatasetError):
+    status_code = 404
+
+
+class VersionConflict(DatasetError):
+    status_code = 409
+
+
+def parse_ref(ref):
+    """'abc@3' -> ('abc', 3); 'abc' -> ('abc', None)."""
+    if not isinstance(ref, str) or not ref.strip():
+        raise DatasetError("'dataset' must be a string like 'dataset_id@version'.")
+    dataset_id, _, version = ref.strip().partition('@')
+    if not version:
+        return dataset_id, None
+    try:
+        return dataset_id, int(version)
+    except ValueError:
+        raise DatasetError(f"Invalid dataset version in '{ref}'.")
+
+
+def format_ref(dataset_id, version):
+    return f'{dataset_id}@{version}'
+
+
+def _check_payload(payload):
+    if not isinstance(payload, dict):
+        raise DatasetError('Dataset must be a JSON object.')
+    for key in ENTITY_COLLECTIONS:
+        entities = payload.get(key, [])
+        if not isinstance(entities, list) or any(not isinstance(e, dict) or 'id' not in e for e in entities):
+            raise DatasetError(f"'{key}' must be a list of objects with an 'id'.")
+
+
+def apply_delta(payload, delta):
+    """Returns a new payload with `delta` applied; `payload` is left untouched."""
+    if not isinstance(delta, dict):
+        raise DatasetError('Delta must be a JSON object.')
+    result = dict(payload)
+
+    for key, entities in (delta.get('upsert') or {}).items():
+        if key not in ENTITY_COLLECTIONS:
+            raise DatasetError(f"Cannot upsert into '{key}'.")
+        if not isinstance(entities, list):
+            raise DatasetError(f"'upsert.{key}' must be a list.")
+        merged = OrderedDict((e['id'], e) for e in result.get(key, []))
+        for entity in entities:
+            if not isinstance(entity, dict) or 'id' not in entity:
+                raise DatasetError(f"Every '{key}' upsert needs an 'id'.")
+            merged[entity['id']] = dict(merged.get(entity['id'], {}), **entity)
+        result[key] = list(merged.values())
+
+    for key, ids in (delta.get('remove') or {}).items():
+        if key not in ENTITY_COLLECTIONS:
+            raise DatasetError(f"Cannot remove from '{key}'.")
+        if not isinstance(ids, list) or any(isinstance(i, bool) or not isinstance(i, (str, int)) for i in ids):
+            raise DatasetError(f"'remove.{key}' must be a list of ids.")
+        ids = set(ids)
+        result[key] = [e for e in result.get(key, []) if e['id'] not in ids]
+
+    for key, value in (delta.get('replace') or {}).items():
+        if key not in REPLACEABLE_KEYS:
+            raise DatasetError(f"Cannot replace '{key}'.")
+        result[key] = value
+
+    _check_payload(result)
+    return result
+
+
+class DatasetStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS dataset_versions ('
+                ' dataset_id TEXT NOT NULL,'
+                ' version INTEGER NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                " created_at TEXT NOT NULL DEFAULT (datetime('now')),"
+                ' PRIMARY KEY (dataset_id, version))'
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe across threads and workers
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, payload):
+        """Stores `payload` as version 1 of a new dataset; returns (dataset_id, 1)."""
+        _check_payload(payload)
+        dataset_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute('INSERT INTO dataset_versions (dataset_id, version, payload) VALUES (?, 1, ?)',
+                         (dataset_id, json.dumps(payload)))
+        return dataset_id, 1
+
+    def latest_version(self, dataset_id):
+        with self._connect() as conn:
+            row = conn.execute('SELECT MAX(version) FROM dataset_versions WHERE dataset_id = ?',
+                               (dataset_id,)).fetchone()
+        if row is None or row[0] is None:
+            raise DatasetNotFound(f"Unknown dataset '{dataset_id}'.")
+        return row[0]
+
+    def update(self, dataset_id, delta):
+        """Applies a delta on top of the latest version; returns (dataset_id, new_version)."""
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE serializes concurrent updates of the same database
+            conn.isolation_level = None
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT version, payload FROM dataset_versions WHERE dataset_id = ? '
+                                   'ORDER BY version DESC LIMIT 1', (dataset_id,)).fetchone()
+                if row is None:
+                    raise DatasetNotFound(f"Unknown dataset '{dataset_id}'.")
+                version, payload = row
+                base_version = delta.get('baseVersion') if isinstance(delta, dict) else None
+                if base_version is not None and base_version != version:
+                    raise VersionConflict(f"Dataset '{dataset_id}' is at version {version}, not {base_version}.")
+                new_payload = apply_delta(json.loads(payload), delta)
+                conn.execute('INSERT INTO dataset_versions (dataset_id, version, payload) VALUES (?, ?, ?)',
+                             (dataset_id, version + 1, json.dumps(new_payload)))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return dataset_id, version + 1
+
+    def _load(self, dataset_id, version):
+        with self._connect() as conn:
+            row = conn.execute('SELECT payload FROM dataset_versions WHERE dataset_id = ? AND version = ?',
+                               (dataset_id, version)).fetchone()
+        if row is None:
+            raise DatasetNotFound(f"Unknown dataset version '{format_ref(dataset_id, version)}'.")
+        return json.loads(row[0])
+
+    def resolve(self, ref):
+        """
+        Returns (dataset_id, version, payload, prepared) for a reference,
+        loading and preprocessing the version on first use only.
+        Callers must not mutate the returned payload.
+        """
+        dataset_id, version = parse_ref(ref)
+        if version is None:
+            version = self.latest_version(dataset_id)
+        key = (dataset_id, version)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                return (dataset_id, version) + entry
+        payload = self._load(dataset_id, version)
+        entry = (payload, preprocess(payload))
+        with self._cache_lock:
+            self._cache[key] = entry
+            while len(self._cache) > MAX_CACHED_VERSIONS:
+                self._cache.popitem(last=False)
+        return (dataset_id, version) + entry
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=DEFAULT_DB_PATH):
+    """One DatasetStore (and version cache) per database file and process."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = DatasetStore(path)
+        return store
+
+
+def request_payload(data, db_path=DEFAULT_DB_PATH):
+    """
+    Expands a request that references a stored dataset into a full payload.
+    Top-level keys sent with the request (request_id, timeLimitSeconds...)
+    override the stored ones; `settings` are merged key by key. Returns (payload, prepared, ref); prepared and ref
+    are None for requests that carry their own data, and prepared is None when
+    the request also overrides institution data.
+    """
+    if 'dataset' not in data:
+        return data, None, None
+    dataset_id, version, payload, prepared = get_store(db_path).resolve(data['dataset'])
+    if any(key in data for key in ENTITY_COLLECTIONS + ('days', 'timeslots')):
+        prepared = None
+    merged = dict(payload)
+    merged.update({k: v for k, v in data.items() if k != 'dataset'})
+    if isinstance(data.get('settings'), dict):
+        # Request settings are layered over the stored ones
+        merged['settings'] = dict(payload.get('settings') or {}, **data['settings'])
+    return merged, prepared, format_ref(dataset_id, version)
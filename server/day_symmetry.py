@@ -0,0 +1,68 @@
+"""
+Symmetry breaking across interchangeable days.
+
+Timeslots are shared by every day, so two days differ only in the
+availability of instructors, rooms and student groups. When every entity
+has the same availability masks on a set of days, and nothing else in the
+model refers to a particular day, any schedule can be permuted across those
+days at the same cost, and the solver would otherwise have to rule out
+every such permutation when proving a bound.
+
+Days are grouped into classes of identical availability at preprocessing
+time. Within a class the days are treated as interchangeable values of each
+task's day and ordered by value precedence: following the task order, a
+task may only use the (j+1)-th day of the class once an earlier task uses
+the j-th. Of all the day permutations of a schedule exactly one, the one
+that numbers days by first use, remains. Every objective term is a per-slot
+or per-day penalty that does not depend on which day it is, so the optimum
+is unchanged. (Ordering the days by their load vectors instead made the
+first solution much slower to find.)
+
+`settings.daySymmetryBreaking: false` turns this off. It is also skipped
+for two-phase (decomposed) models, whose planned slots already single out
+particular days.
+"""
+from ortools.sat.python import cp_model
+
+
+def equivalent_day_classes(avail, all_days):
+    """Lists of days (in request order) with identical availability for every entity; classes of one are omitted."""
+    classes = {}
+    for day in all_days:
+        signature = tuple(tuple(masks[day] for masks in avail[kind].values())
+                          for kind in ('instructors', 'rooms', 'groups'))
+        classes.setdefault(signature, []).append(day)
+    return [days for days in classes.values() if len(days) > 1]
+
+
+def break_day_symmetry(model, index, day_classes, task_ids):
+    """Value precedence over each class of days, following `task_ids`; returns the number of constrained tasks."""
+    constrained = 0
+    for c_idx, days in enumerate(day_classes):
+        # used[j]: some earlier task is on days[j] (None while no task can be)
+        used = [None] * len(days)
+        for task_id in task_ids:
+            on_day = [index.by_task_day.get((task_id, day), []) for day in days]
+            if not any(on_day):
+                continue
+            constrained += 1
+            for j in range(1, len(days)):
+                if not on_day[j]:
+                    continue
+                if used[j - 1] is None:
+                    model.Add(cp_model.LinearExpr.Sum(on_day[j]) == 0)
+                else:
+                    model.Add(cp_model.LinearExpr.Sum(on_day[j]) <= used[j - 1])
+            for j, day_vars in enumerate(on_day):
+                if not day_vars:
+                    continue
+                now_used = model.NewBoolVar(f'day_used_{c_idx}_{j}_{task_id}')
+                on_this_day = cp_model.LinearExpr.Sum(day_vars)
+                if used[j] is None:
+                    model.Add(now_used == on_this_day)
+                else:
+                    model.AddImplication(used[j], now_used)
+                    model.Add(now_used >= on_this_day)
+                    model.Add(now_used <= used[j] + on_this_day)
+                used[j] = now_used
+    return constrained
@@ -0,0 +1,388 @@
+"""
+Two-phase engine (`settings.engine = "decomposed"`).
+
+Phase 1 decides *when* every session happens with one boolean per
+(task, day, slot). Group conflicts, lab pairing, daily limits and
+faculty breaks of fixed instructors are exact; instructors and rooms are
+only aggregated: for every candidate set S of a task, the tasks whose
+candidates lie inside S may not outnumber the members of S free in that
+slot.
+
+Phase 2 staffs each day separately: a small model picks instructors and
+rooms for the fixed slots (conflicts, faculty breaks, both lab halves with
+the same instructor and room). When a day cannot be staffed, the
+conflicting placements (an infeasibility core) are cut from phase 1, which
+is solved again.
+
+The plan is handed back to generate_timetable, which builds the regular
+model restricted to the planned slots (with the matching as a hint) to
+verify it and to settle fair workload and room preferences.
+"""
+from ortools.sat.python import cp_model
+
+from availability import session_slots
+
+# Share of the remaining time budget one phase 1 solve may use
+PHASE1_TIME_SHARE = 0.5
+MAX_REPAIR_ROUNDS = 5
+# Seconds for staffing one day in phase 2
+STAFFING_TIME_LIMIT = 5
+# Same weights as the full model
+LAB_830_PENALTY = 1000
+MORNING_WEIGHT = 2
+
+
+def _bit(mask, t_idx):
+    return (mask >> t_idx) & 1
+
+
+def _lab_partner(task_id, offset):
+    prefix, index = task_id.rsplit('_', 1)
+    return f'{prefix}_{int(index) + offset}'
+
+
+class SessionPlanner:
+    """
+    `candidates[task_id]` holds 'instructors', 'rooms' (room or pool ids),
+    'group_masks' ({day: mask}, all attending groups) and 'lab_mask'.
+    """
+
+    def __init__(self, tasks, candidates, avail, room_pools, all_student_groups,
+                 all_days, all_timeslots, ts_parsed, ts_gaps, settings):
+        self.tasks = tasks
+        self.candidates = candidates
+        self.avail = avail
+        self.room_pools = room_pools
+        self.all_student_groups = all_student_groups
+        self.all_days = all_days
+        self.all_timeslots = all_timeslots
+        self.ts_parsed = ts_parsed
+        self.ts_gaps = ts_gaps
+        self.settings = settings
+        self.num_slots = len(all_timeslots)
+        self.model = cp_model.CpModel()
+        self.x = {}
+
+    # --- availability helpers ---
+
+    def _inst_masks(self, inst_id):
+        masks = self.avail['instructors'].get(inst_id)
+        if masks is None:
+            return {day: self.avail['full'] for day in self.all_days}
+        return masks
+
+    def _room_masks(self, room_id):
+        return self.avail['rooms'][self.room_pools[room_id][0]]
+
+    def _fits(self, task_id, masks, day):
+        task_info = self.tasks[task_id]
+        return session_slots(masks[day], task_info.get('lab_role'), self.candidates[task_id]['lab_mask'])
+
+    def time_mask(self, task_id, day):
+        """Slots where the session fits its groups, some instructor and some room."""
+        cand = self.candidates[task_id]
+        mask = self._fits(task_id, cand['group_masks'], day)
+        inst_mask = 0
+        for inst_id in cand['instructors']:
+            inst_mask |= self._fits(task_id, self._inst_masks(inst_id), day)
+        room_mask = 0
+        for room_id in cand['rooms']:
+            room_mask |= self._fits(task_id, self._room_masks(room_id), day)
+        return mask & inst_mask & room_mask
+
+    # --- phase 1 ---
+
+    def _slot_vars(self, task_ids, day, t_idx):
+        return [self.x[(tid, day, t_idx)] for tid in task_ids if (tid, day, t_idx) in self.x]
+
+    def _capacity_constraints(self, task_sets, capacity):
+        """sum(tasks whose candidate set lies inside S) <= capacity(S, day, slot) for every distinct S."""
+        for cand_set in set(task_sets.values()):
+            inside = [tid for tid, s in task_sets.items() if s <= cand_set]
+            for day in self.all_days:
+                for t_idx in range(self.num_slots):
+                    slot_vars = self._slot_vars(inside, day, t_idx)
+                    cap = capacity(cand_set, day, t_idx)
+                    if len(slot_vars) <= cap:
+                        continue
+                    if cap == 1:
+                        self.model.AddAtMostOne(slot_vars)
+                    else:
+                        self.model.Add(sum(slot_vars) <= cap)
+
+    def build(self):
+        model = self.model
+        tasks = self.tasks
+
+        for task_id in tasks:
+            task_vars = []
+            for day in self.all_days:
+                mask = self.time_mask(task_id, day)
+                for t_idx in range(self.num_slots):
+                    if _bit(mask, t_idx):
+                        var = model.NewBoolVar(f'time_{task_id}_{day}_{t_idx}')
+                        self.x[(task_id, day, t_idx)] = var
+                        task_vars.append(var)
+            # Each task exactly once
+            if task_vars:
+                model.AddExactlyOne(task_vars)
+
+        # Lab halves run back to back
+        for (task_id, day, t_idx), var in self.x.items():
+            role = tasks[task_id].get('lab_role')
+            if role == 'first':
+                partner = self.x.get((_lab_partner(task_id, 1), day, t_idx + 1))
+                if partner is None:
+                    model.Add(var == 0)
+                else:
+                    model.Add(partner == var)
+            elif role == 'second' and (_lab_partner(task_id, -1), day, t_idx - 1) not in self.x:
+                model.Add(var == 0)
+
+        # Student group conflicts
+        group_tasks = {sg_id: [tid for tid, t in tasks.items() if sg_id in t['group_ids']]
+                       for sg_id in self.all_student_groups}
+        for sg_id, task_ids in group_tasks.items():
+            for day in self.all_days:
+                for t_idx in range(self.num_slots):
+                    slot_vars = self._slot_vars(task_ids, day, t_idx)
+                    if len(slot_vars) > 1:
+                        model.AddAtMostOne(slot_vars)
+
+        # Aggregated instructor and room capacity
+        inst_sets = {tid: frozenset(self.candidates[tid]['instructors']) for tid in tasks}
+        self._capacity_constraints(inst_sets, lambda s, day, t_idx: sum(
+            _bit(self._inst_masks(inst_id)[day], t_idx) for inst_id in s))
+        room_sets = {tid: frozenset(self.candidates[tid]['rooms']) for tid in tasks}
+        self._capacity_constraints(room_sets, lambda s, day, t_idx: sum(
+            len(self.room_pools[room_id]) * _bit(self._room_masks(room_id)[day], t_idx) for room_id in s))
+
+        for sg_id, task_ids in group_tasks.items():
+            by_course = {}
+            for tid in task_ids:
+                by_course.setdefault((tasks[tid]['course_id'], tasks[tid]['type']), []).append(tid)
+            lab_courses = [c_id for (c_id, kind) in by_course if kind == 'lab']
+            for day in self.all_days:
+                # No repeating lectures of a course on one day
+                for (c_id, kind), tids in by_course.items():
+                    if kind == 'lecture' and len(tids) > 1:
+                        day_vars = [v for t_idx in range(self.num_slots) for v in self._slot_vars(tids, day, t_idx)]
+                        if day_vars:
+                            model.Add(sum(day_vars) <= 1)
+                # Max one lab course per day
+                if len(lab_courses) > 1:
+                    active = []
+                    for c_id in lab_courses:
+                        tids = by_course[(c_id, 'lab')]
+                        day_vars = [v for t_idx in range(self.num_slots) for v in self._slot_vars(tids, day, t_idx)]
+                        if day_vars:
+                            is_active = model.NewBoolVar(f'lab_active_{sg_id}_{c_id}_{day}')
+                            model.AddMaxEquality(is_active, day_vars)
+                            active.append(is_active)
+                    if active:
+                        model.Add(sum(active) <= 1)
+
+        # Faculty break, aggregated: an instructor of S teaches at most one of two
+        # adjacent slots, unless it is both halves of a lab
+        for cand_set in set(inst_sets.values()):
+            inside = [tid for tid, s in inst_sets.items() if s <= cand_set]
+            starts = [tid for tid in inside if tasks[tid].get('lab_role') == 'first']
+            for day in self.all_days:
+                for t_idx in range(self.num_slots - 1):
+                    if self.ts_gaps[t_idx] >= 60:
+                        continue
+                    at_t1 = self._slot_vars(inside, day, t_idx)
+                    at_t2 = self._slot_vars(inside, day, t_idx + 1)
+                    if not at_t1 or not at_t2:
+                        continue
+                    free = sum(1 for inst_id in cand_set
+                               if _bit(self._inst_masks(inst_id)[day], t_idx) or _bit(self._inst_masks(inst_id)[day], t_idx + 1))
+                    model.Add(sum(at_t1) + sum(at_t2) <= free + sum(self._slot_vars(starts, day, t_idx)))
+
+        self._objective()
+
+    def _objective(self):
+        model = self.model
+        objectives = []
+
+        if self.settings.get('disallow830Labs', False):
+            forbidden = [i for i, (start_min, end_min) in enumerate(self.ts_parsed) if start_min >= 510 and end_min <= 630]
+            for (task_id, day, t_idx), var in self.x.items():
+                if self.tasks[task_id]['type'] == 'lab' and t_idx in forbidden:
+                    objectives.append(var * LAB_830_PENALTY)
+
+        preferred_courses = set(self.settings.get('preferredMorningCourses', []))
+        if preferred_courses:
+            for (task_id, day, t_idx), var in self.x.items():
+                timeslot = self.all_timeslots[t_idx]
+                if self.tasks[task_id]['course_id'] in preferred_courses:
+                    if 'PM' in timeslot and not timeslot.startswith('12') and 'AM' not in timeslot:
+                        objectives.append(var * MORNING_WEIGHT)
+
+        gap_priority = self.settings.get('gapPriority', 0.0)
+        if gap_priority > 0:
+            weight = int(gap_priority * 10)
+            n = self.num_slots
+            for sg_id in self.all_student_groups:
+                task_ids = [tid for tid, t in self.tasks.items() if sg_id in t['group_ids']]
+                for day in self.all_days:
+                    slot_active = [model.NewBoolVar(f'active_{sg_id}_{day}_{t}') for t in range(n)]
+                    for t_idx in range(n):
+                        slot_vars = self._slot_vars(task_ids, day, t_idx)
+                        if slot_vars:
+                            model.AddMaxEquality(slot_active[t_idx], slot_vars)
+                        else:
+                            model.Add(slot_active[t_idx] == 0)
+                    has_classes = model.NewBoolVar(f'has_classes_{sg_id}_{day}')
+                    model.AddMaxEquality(has_classes, slot_active)
+                    min_slot = model.NewIntVar(0, n, f'min_slot_{sg_id}_{day}')
+                    max_slot = model.NewIntVar(0, n, f'max_slot_{sg_id}_{day}')
+                    for t in range(n):
+                        model.Add(min_slot <= t).OnlyEnforceIf(slot_active[t])
+                        model.Add(max_slot >= t).OnlyEnforceIf(slot_active[t])
+                    span = model.NewIntVar(0, n, f'span_{sg_id}_{day}')
+                    model.Add(span == max_slot - min_slot + 1).OnlyEnforceIf(has_classes)
+                    model.Add(span == 0).OnlyEnforceIf(has_classes.Not())
+                    gaps = model.NewIntVar(0, n, f'gaps_{sg_id}_{day}')
+                    model.Add(gaps == span - sum(slot_active))
+                    objectives.append(gaps * weight)
+
+        if objectives:
+            model.Minimize(sum(objectives))
+
+    # --- phase 2 ---
+
+    def _staff_day(self, day, placed, control):
+        """
+        Picks an instructor and a room for the sessions placed on `day`
+        ([(task_id, t_idx)]): no double booking, faculty breaks, both lab
+        halves with the same instructor and room. Every session is switched
+        on by an assumption literal, so an infeasible day reports which
+        sessions conflict.
+        Returns ({task_id: (inst_id, room_id)}, conflicting task_ids).
+        """
+        model = cp_model.CpModel()
+        slot_of = dict(placed)
+        inst_vars = {}
+        room_vars = {}
+        staffed = {}
+        for task_id, t_idx in placed:
+            cand = self.candidates[task_id]
+            lit = model.NewBoolVar(f'staffed_{task_id}')
+            staffed[task_id] = lit
+            for options, masks, chosen in (
+                    (cand['instructors'], self._inst_masks, inst_vars),
+                    (cand['rooms'], self._room_masks, room_vars)):
+                task_vars = []
+                for res_id in options:
+                    if _bit(self._fits(task_id, masks(res_id), day), t_idx):
+                        var = model.NewBoolVar(f'use_{task_id}_{res_id}')
+                        chosen[(task_id, res_id)] = var
+                        task_vars.append(var)
+                if task_vars:
+                    model.Add(sum(task_vars) == 1).OnlyEnforceIf(lit)
+                else:
+                    model.Add(lit == 0)
+
+        # Both halves of a lab share instructor and room
+        for task_id, t_idx in placed:
+            if self.tasks[task_id].get('lab_role') != 'second':
+                continue
+            first = _lab_partner(task_id, -1)
+            if slot_of.get(first) != t_idx - 1:
+                continue
+            for chosen, options in ((inst_vars, self.candidates[task_id]['instructors']),
+                                    (room_vars, self.candidates[task_id]['rooms'])):
+                for res_id in options:
+                    a, b = chosen.get((first, res_id)), chosen.get((task_id, res_id))
+                    if a is not None and b is not None:
+                        model.Add(a == b)
+                    elif a is not None or b is not None:
+                        model.Add((a if a is not None else b) == 0)
+
+        by_inst = {}
+        for (task_id, inst_id), var in inst_vars.items():
+            by_inst.setdefault((inst_id, slot_of[task_id]), []).append((task_id, var))
+        for (inst_id, t_idx), entries in by_inst.items():
+            if len(entries) > 1:
+                model.AddAtMostOne([var for _, var in entries])
+            # Faculty break: no class right after, unless it is the second half of this lab
+            if t_idx + 1 < self.num_slots and self.ts_gaps[t_idx] < 60 and (inst_id, t_idx + 1) in by_inst:
+                starts = [var for tid, var in entries if self.tasks[tid].get('lab_role') == 'first']
+                at_next = [var for _, var in by_inst[(inst_id, t_idx + 1)]]
+                model.Add(sum(var for _, var in entries) + sum(at_next) <= 1 + sum(starts))
+
+        by_room = {}
+        for (task_id, room_id), var in room_vars.items():
+            by_room.setdefault((room_id, slot_of[task_id]), []).append(var)
+        for (room_id, t_idx), room_slot_vars in by_room.items():
+            if len(room_slot_vars) > len(self.room_pools[room_id]):
+                model.Add(sum(room_slot_vars) <= len(self.room_pools[room_id]))
+
+        model.AddAssumptions(list(staffed.values()))
+        solver = cp_model.CpSolver()
+        # Infeasibility cores need a single worker
+        solver.parameters.num_workers = 1
+        status = control.solve(solver, model, time_limit=STAFFING_TIME_LIMIT)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            inst_of = {tid: inst_id for (tid, inst_id), var in inst_vars.items() if solver.Value(var)}
+            room_of = {tid: room_id for (tid, room_id), var in room_vars.items() if solver.Value(var)}
+            return {tid: (inst_of[tid], room_of[tid]) for tid in staffed}, []
+        core = set()
+        if status == cp_model.INFEASIBLE:
+            core = set(solver.SufficientAssumptionsForInfeasibility())
+        conflicting = [tid for tid, lit in staffed.items() if lit.Index() in core]
+        return {}, conflicting or list(staffed)
+
+    def match(self, slot_of, control):
+        """
+        Returns (planned, failures): planned maps task_id -> (inst_id, room_id, day, timeslot),
+        failures lists (day, [(task_id, t_idx), ...]) placements that could not be staffed together.
+        """
+        by_day = {}
+        for task_id, (day, t_idx) in sorted(slot_of.items()):
+            by_day.setdefault(day, []).append((task_id, t_idx))
+
+        planned = {}
+        failures = []
+        for day, placed in by_day.items():
+            staff, conflicting = self._staff_day(day, placed, control)
+            if conflicting:
+                failures.append((day, [(task_id, t_idx) for task_id, t_idx in placed if task_id in conflicting]))
+                continue
+            for task_id, t_idx in placed:
+                planned[task_id] = staff[task_id] + (day, self.all_timeslots[t_idx])
+        return planned, failures
+
+    def cut(self, failure):
+        """Forbids the failed combination of placements in phase 1."""
+        day, placements = failure
+        keys = [(task_id, day, t) for task_id, t in placements]
+        self.model.Add(sum(self.x[key] for key in keys) <= len(keys) - 1)
+
+    def plan(self, control, log):
+        """
+        Returns {task_id: (inst_id, room_id, day, timeslot)} or None when no
+        staffable timetable was found within MAX_REPAIR_ROUNDS.
+        """
+        self.build()
+        log(f"Phase 1: {len(self.x)} time variables for {len(self.tasks)} tasks")
+        for round_idx in range(MAX_REPAIR_ROUNDS + 1):
+            solver = cp_model.CpSolver()
+            status = control.solve(solver, self.model, time_limit=control.remaining() * PHASE1_TIME_SHARE / (MAX_REPAIR_ROUNDS + 1 - round_idx))
+            if control.cancelled or status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                log(f"Phase 1 stopped with status {solver.StatusName(status)}")
+                return None
+            slot_of = {task_id: (day, t_idx) for (task_id, day, t_idx), var in self.x.items() if solver.Value(var)}
+            # Next round starts from this plan; the cuts only move the failed placements
+            self.model.ClearHints()
+            for key, var in self.x.items():
+                self.model.AddHint(var, slot_of[key[0]] == key[1:])
+            planned, failures = self.match(slot_of, control)
+            if not failures:
+                log(f"Phase 2: matched {len(planned)} sessions after {round_idx} repairs")
+                return planned
+            log(f"Phase 2: {sum(len(p) for _, p in failures)} placements on {len(failures)} days could not be staffed, re-planning")
+            for failure in failures:
+                self.cut(failure)
+        return None
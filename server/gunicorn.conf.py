@@ -0,0 +1,20 @@
+import os
+
+# Run from the server/ directory:  gunicorn -c gunicorn.conf.py wsgi:app
+bind = os.environ.get('TIMELY_BIND', '0.0.0.0:5000')
+
+# Solves are CPU bound and CP-SAT already uses several threads per solve,
+# so keep the process count modest and tune it per machine.
+workers = int(os.environ.get('TIMELY_WORKERS', '2'))
+threads = int(os.environ.get('TIMELY_THREADS', '4'))
+worker_class = 'gthread'
+
+# A solve may legitimately take up to the per-request time limit
+timeout = int(os.environ.get('TIMELY_WORKER_TIMEOUT', '660'))
+graceful_timeout = 30
+
+# Load the app in each worker (not the master) so every worker does its own warm-up
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,207 @@
+"""
+Lab timing preferences (`labTimingPreferences[course_id]` on a student group).
+
+Accepted formats:
+  - None / ""                      -> any time
+  - "Afternoon"                    -> lab starts at or after 12:00 PM
+  - legacy strings such as "11:00 AM - 01:00 PM", "8:30 - 10:30", "12 - 2"
+                                   -> lab starts exactly at the first time given
+  - "2 to 4", "between 3 and 5"    -> the whole lab fits inside that range
+  - {"startSlots": [2, 4]}         -> lab starts at one of these timeslot indexes
+  - {"windows": [{"start": "11:00 AM", "end": "01:00 PM"}, {"start": 840, "end": 960}]}
+                                   -> the whole lab fits inside one of the windows
+                                      (times as "HH:MM AM" strings or minutes from midnight;
+                                       "end" may be omitted)
+
+Each preference is turned once per (group, course) into integer bitmasks of
+allowed timeslot indexes (bit t set = slot t allowed). The same masks are used
+by validation and to prune lab variables in the model.
+"""
+import re
+
+AFTERNOON_START_MIN = 720  # 12:00 PM
+
+# "2", "2:30", "2pm", "2 p.m.", "2 p"; the "a" of a following word ("3 and") is not a suffix
+_TIME = r'(\d{1,2})(?::(\d{2}))?\s*(?:([ap])\.?\s*m\b\.?|([ap])\b)?'
+_TIME_TOKEN = re.compile(_TIME, re.IGNORECASE)
+_TIME_RANGE = re.compile(_TIME + r'\s*\b(?:to|and)\s+' + _TIME, re.IGNORECASE)
+
+
+def _token_minutes(hour, minute, meridiem, short_meridiem=None):
+    """
+    Converts a time token to minutes from midnight. Without AM/PM, hours
+    1-7 are read as afternoon and 8-11 as morning, like a teaching day.
+    """
+    hour = int(hour)
+    minute = int(minute or 0)
+    meridiem = meridiem or short_meridiem
+    if meridiem:
+        meridiem = meridiem.lower()
+        if meridiem == 'p' and hour != 12:
+            hour += 12
+        elif meridiem == 'a' and hour == 12:
+            hour = 0
+    elif 1 <= hour <= 7:
+        hour += 12
+    return hour * 60 + minute
+
+
+def parse_time(value):
+    """Minutes from midnight for an int or a string like "02:00 PM"; None if unparseable."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        match = _TIME_TOKEN.search(value)
+        if match:
+            return _token_minutes(*match.groups())
+    return None
+
+
+def parse_lab_preference(pref):
+    """
+    Normalizes a preference into {'start_slots': set or None, 'windows': list or None}.
+    Each window is (min_start, max_start, max_end); None bounds are open.
+    Returns None when the preference does not restrict anything.
+    """
+    if not pref:
+        return None
+
+    if isinstance(pref, dict):
+        start_slots = None
+        windows = None
+        if pref.get('startSlots') is not None:
+            start_slots = set()
+            for idx in pref.get('startSlots', []):
+                try:
+                    start_slots.add(int(idx))
+                except (ValueError, TypeError):
+                    pass
+        if pref.get('windows') is not None:
+            windows = []
+            for window in pref.get('windows', []):
+                if not isinstance(window, dict):
+                    continue
+                windows.append((parse_time(window.get('start')), None, parse_time(window.get('end'))))
+        if start_slots is None and windows is None:
+            return None
+        return {'start_slots': start_slots, 'windows': windows}
+
+    if not isinstance(pref, str):
+        return None
+
+    if pref.strip().lower() == 'afternoon':
+        return {'start_slots': None, 'windows': [(AFTERNOON_START_MIN, None, None)]}
+
+    # "X to Y" / "X and Y": the lab runs inside the range
+    match = _TIME_RANGE.search(pref)
+    if match:
+        start_min = _token_minutes(*match.groups()[:4])
+        end_min = _token_minutes(*match.groups()[4:])
+        if end_min > start_min:
+            return {'start_slots': None, 'windows': [(start_min, None, end_min)]}
+
+    # Legacy free-form string: the lab starts exactly at the first time mentioned
+    match = _TIME_TOKEN.search(pref)
+    if not match:
+        return None
+    start_min = _token_minutes(*match.groups())
+    return {'start_slots': None, 'windows': [(start_min, start_min, None)]}
+
+
+def describe_lab_preference(pref):
+    """Human-readable preference for error messages."""
+    if not pref:
+        return 'Any Time'
+    if isinstance(pref, str):
+        return pref
+    if isinstance(pref, dict):
+        parts = []
+        if pref.get('startSlots') is not None:
+            parts.append('start slots ' + ', '.join(str(i) for i in pref.get('startSlots', [])))
+        for window in pref.get('windows', []) or []:
+            if isinstance(window, dict):
+                parts.append(f"{window.get('start', '?')} - {window.get('end', 'end of day')}")
+        if parts:
+            return '; '.join(parts)
+    return 'Any Time'
+
+
+def _allowed(norm, start_idx, start_min, end_min):
+    if norm is None:
+        return True
+    if norm['start_slots'] is not None and start_idx not in norm['start_slots']:
+        return False
+    if norm['windows'] is not None:
+        for min_start, max_start, max_end in norm['windows']:
+            if min_start is not None and start_min < min_start: continue
+            if max_start is not None and start_min > max_start: continue
+            if max_end is not None and end_min > max_end: continue
+            return True
+        return False
+    return True
+
+
+def lab_start_mask(norm, ts_parsed, ts_gaps):
+    """Bitmask of slots where a 2-slot lab may start: continuous (no gap) and preferred."""
+    mask = 0
+    for t_idx in range(len(ts_parsed) - 1):
+        if ts_gaps[t_idx] != 0:
+            continue
+        if _allowed(norm, t_idx, ts_parsed[t_idx][0], ts_parsed[t_idx + 1][1]):
+            mask |= 1 << t_idx
+    return mask
+
+
+def lab_single_mask(norm, ts_parsed):
+    """Bitmask of slots allowed for an unpaired (single-hour) lab session."""
+    mask = 0
+    for t_idx, (start_min, end_min) in enumerate(ts_parsed):
+        if _allowed(norm, t_idx, start_min, end_min):
+            mask |= 1 << t_idx
+    return mask
+
+
+def mask_indexes(mask):
+    """Indexes of the set bits, lowest first."""
+    indexes = []
+    t_idx = 0
+    while mask:
+        if mask & 1:
+            indexes.append(t_idx)
+        mask >>= 1
+        t_idx += 1
+    return indexes
+
+
+def compute_lab_masks(all_student_groups, all_courses, ts_parsed, ts_gaps, with_preferences=True):
+    """
+    Allowed-slot masks for every (group, course) with lab hours:
+      'pair'   - start slots of 2-slot labs
+      'single' - slots for a leftover single lab hour
+    With with_preferences=False the group's labTimingPreferences are ignored
+    (relaxed mode, see relaxation.py).
+    """
+    masks = {}
+    for sg_id, group in all_student_groups.items():
+        lab_prefs = (group.get('labTimingPreferences', {}) or {}) if with_preferences else {}
+        for c_id in group.get('enrolledCourses', []):
+            course = all_courses.get(c_id)
+            if not course: continue
+            try:
+                lab_hours = int(course.get('labHours', 0))
+            except (ValueError, TypeError):
+                lab_hours = 0
+            if lab_hours <= 0:
+                continue
+
+            pref = lab_prefs.get(c_id)
+            norm = parse_lab_preference(pref)
+            masks[(sg_id, c_id)] = {
+                'pair': lab_start_mask(norm, ts_parsed, ts_gaps),
+                'single': lab_single_mask(norm, ts_parsed),
+                'label': describe_lab_preference(pref),
+                'is_afternoon': pref == 'Afternoon',
+            }
+    return masks
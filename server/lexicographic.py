@@ -0,0 +1,78 @@
+"""
+Lexicographic objectives (`settings.objectiveMode = "lexicographic"`).
+
+Instead of one weighted sum, the objective terms are minimized tier by tier.
+After each tier its achieved value becomes a constraint (`tier <= value`)
+and the solution is hinted into the next tier, so later tiers can only
+improve on what the earlier ones left open. The time budget left is split
+evenly over the tiers still to solve; a tier stops at its share once it has
+a solution (the first may need longer to find one), and time a tier does
+not use carries over.
+
+Term names are the keys generate_timetable files objective terms under.
+`settings.objectiveTiers` may reorder them, e.g. [["gaps"], ["lab830"]];
+terms not listed form one last tier.
+"""
+from ortools.sat.python import cp_model
+
+from model_index import weighted_sum
+
+DEFAULT_TIERS = (
+    ('violations',),
+    ('lab830',),
+    ('gaps',),
+    ('workload', 'roomPreference'),
+    ('morning',),
+)
+
+
+def objective_tiers(objectives, settings):
+    """[(tier name, [(expr, coefficient), ...])] for the non-empty tiers, highest priority first."""
+    order = settings.get('objectiveTiers') or DEFAULT_TIERS
+    tiers = []
+    listed = set()
+    for names in order:
+        names = [names] if isinstance(names, str) else list(names)
+        listed.update(names)
+        terms = [term for name in names for term in objectives.get(name, [])]
+        if terms:
+            tiers.append(('+'.join(names), terms))
+    rest = [term for name, terms in objectives.items() if name not in listed for term in terms]
+    if rest:
+        tiers.append(('other', rest))
+    return tiers
+
+
+def solve_lexicographic(model, tiers, control, log=print):
+    """
+    Solves `model` once per tier. Returns (solver, status) of the last tier
+    that found a solution; status is OPTIMAL only if every tier was proven
+    optimal. If the first tier finds no solution its solver and status are
+    returned as they are.
+    """
+    best = None
+    all_optimal = True
+    for i, (name, terms) in enumerate(tiers):
+        expr = weighted_sum(terms)
+        model.Minimize(expr)
+        solver = cp_model.CpSolver()
+        status = control.solve(solver, model, soft_time_limit=control.remaining() / (len(tiers) - i))
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            log(f"Lexicographic tier '{name}': {solver.StatusName(status)}, keeping the previous tier")
+            if best is None:
+                return solver, status
+            all_optimal = False
+            break
+        value = int(round(solver.ObjectiveValue()))
+        log(f"Lexicographic tier '{name}': {value} ({solver.StatusName(status)}, {solver.WallTime():.2f}s)")
+        best = solver
+        all_optimal = all_optimal and status == cp_model.OPTIMAL
+        if control.cancelled or i == len(tiers) - 1:
+            break
+        # Freeze this tier and start the next one from the current solution
+        model.Add(expr <= value)
+        model.ClearHints()
+        for index in range(len(model.Proto().variables)):
+            var = model.get_int_var_from_proto_index(index)
+            model.AddHint(var, solver.Value(var))
+    return best, cp_model.OPTIMAL if all_optimal else cp_model.FEASIBLE
@@ -0,0 +1,270 @@
+"""
+Replays timetable payloads against a running server and reports latency.
+
+    python loadtest.py --corpus ../tests --concurrency 4 --rate 2 --requests 50
+    python loadtest.py --generate 10 --concurrency 8 --duration 60
+
+Payloads come from a directory of request JSON files (plain or .json.gz,
+e.g. a request capture corpus, see request_capture.py) or are generated
+synthetically. Requests are sent open-loop at --rate
+(Poisson arrivals, 0 = back-to-back) with at most --concurrency in flight.
+Latency is measured from the scheduled send time, so client-side queueing
+shows up in the tail instead of being hidden.
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DEFAULT_URL = 'http://127.0.0.1:5000'
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+TIMESLOTS = [
+    "08:30 AM - 09:30 AM",
+    "09:30 AM - 10:30 AM",
+    "11:00 AM - 12:00 PM",
+    "12:00 PM - 01:00 PM",
+    "02:00 PM - 03:00 PM",
+    "03:00 PM - 04:00 PM",
+    "04:00 PM - 05:00 PM",
+]
+
+
+def generate_payload(seed=0, groups=4, courses_per_group=5, instructors=None, classrooms=None, labs=None, days=5):
+    """
+    Builds a synthetic but solvable-looking institution: every group takes
+    `courses_per_group` courses, the first of which has a 2-hour lab.
+    Unless given, the resources grow with the number of groups (two
+    instructors and one classroom per group, one lab per two groups), so
+    larger payloads still pass the pre-checks.
+    """
+    rnd = random.Random(seed)
+    if instructors is None:
+        instructors = 2 * groups
+    if classrooms is None:
+        classrooms = groups
+    if labs is None:
+        labs = max(1, (groups + 1) // 2)
+    day_names = DAYS[:days]
+
+    def availability(busy_ratio):
+        return {d: [0 if rnd.random() < busy_ratio else 1 for _ in TIMESLOTS] for d in day_names}
+
+    instructor_list = [{'id': f'INS{i:03d}', 'name': f'Instructor {i}', 'availability': availability(0.15)}
+                       for i in range(instructors)]
+    room_list = [{'id': f'CR{i:02d}', 'name': f'Classroom {i}', 'capacity': 70, 'type': 'Classroom'}
+                 for i in range(classrooms)]
+    room_list += [{'id': f'LAB{i:02d}', 'name': f'Lab {i}', 'capacity': 70, 'type': 'Computer Lab'}
+                  for i in range(labs)]
+
+    course_list = []
+    group_list = []
+    for g in range(groups):
+        enrolled = []
+        for c in range(courses_per_group):
+            c_id = f'G{g:02d}C{c:02d}'
+            course_list.append({
+                'id': c_id,
+                'name': f'Course {g}.{c}',
+                'lectureHours': 3,
+                'labHours': 2 if c == 0 else 0,
+                'qualifiedInstructors': rnd.sample([i['id'] for i in instructor_list], min(2, instructors)),
+            })
+            enrolled.append(c_id)
+        group_list.append({
+            'id': f'SEM{g:02d}',
+            'size': rnd.randint(40, 65),
+            'enrolledCourses': enrolled,
+            'availability': {d: [1] * len(TIMESLOTS) for d in day_names},
+        })
+
+    return {
+        'instructors': instructor_list,
+        'courses': course_list,
+        'rooms': room_list,
+        'student_groups': group_list,
+        'days': day_names,
+        'timeslots': list(TIMESLOTS),
+        'settings': {'gapPriority': 1, 'fairWorkload': True},
+    }
+
+
+def load_corpus(directory, outcomes=None):
+    """
+    Loads every *.json / *.json.gz file in `directory` that looks like a
+    timetable request. With `outcomes`, captured requests whose recorded
+    outcome is not in it are skipped.
+    """
+    payloads = []
+    paths = sorted(glob.glob(os.path.join(directory, '*.json')) + glob.glob(os.path.join(directory, '*.json.gz')))
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        # Capture files wrap the request in a 'payload' key
+        if isinstance(data, dict) and 'payload' in data:
+            if outcomes and data.get('outcome') not in outcomes:
+                continue
+            data = data['payload']
+        if isinstance(data, dict) and 'student_groups' in data and 'days' in data and 'timeslots' in data:
+            payloads.append((os.path.basename(path), data))
+    return payloads
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run_load(url, payloads, concurrency=4, rate=0.0, total_requests=None, duration=None, params=None, seed=0):
+    """
+    Sends requests until `total_requests` have been issued or `duration`
+    seconds have passed. Returns a list of per-request result dicts.
+    """
+    rnd = random.Random(seed)
+    results = []
+    results_lock = threading.Lock()
+    in_flight = threading.Semaphore(concurrency)
+    session_local = threading.local()
+
+    def session():
+        if not hasattr(session_local, 'session'):
+            session_local.session = requests.Session()
+        return session_local.session
+
+    def send(name, payload, scheduled):
+        try:
+            resp = session().post(f'{url}/generate-timetable', json=payload, params=params,
+                                  headers={'Accept-Encoding': 'gzip'})
+            latency = time.monotonic() - scheduled
+            try:
+                body = resp.json()
+            except ValueError:
+                body = {}
+            result = {'name': name, 'status_code': resp.status_code, 'latency': latency,
+                      'timings': body.get('timings', {}), 'bytes': len(resp.content)}
+        except requests.RequestException as e:
+            result = {'name': name, 'status_code': None, 'latency': time.monotonic() - scheduled,
+                      'timings': {}, 'error': str(e)}
+        finally:
+            in_flight.release()
+        with results_lock:
+            results.append(result)
+
+    started = time.monotonic()
+    next_send = started
+    issued = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            if total_requests is not None and issued >= total_requests:
+                break
+            if duration is not None and time.monotonic() - started >= duration:
+                break
+            if rate > 0:
+                next_send += rnd.expovariate(rate)
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                scheduled = next_send
+            else:
+                scheduled = time.monotonic()
+            in_flight.acquire()
+            name, payload = payloads[issued % len(payloads)]
+            pool.submit(send, name, payload, scheduled)
+            issued += 1
+
+    wall = time.monotonic() - started
+    return results, wall
+
+
+def summarize(results, wall):
+    latencies = [r['latency'] for r in results]
+    ok = [r for r in results if r['status_code'] == 200]
+    by_code = {}
+    for r in results:
+        by_code[r['status_code']] = by_code.get(r['status_code'], 0) + 1
+
+    summary = {
+        'requests': len(results),
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(len(results) / wall, 3) if wall > 0 else 0.0,
+        'success_rate': round(len(ok) / len(results), 4) if results else 0.0,
+        'status_codes': {str(k): v for k, v in sorted(by_code.items(), key=lambda kv: str(kv[0]))},
+        'latency': {f'p{p}': round(percentile(latencies, p), 4) for p in (50, 95, 99)},
+        'server_timings': {},
+    }
+    summary['latency']['max'] = round(max(latencies), 4) if latencies else 0.0
+
+    phases = sorted({k for r in results for k in r['timings']})
+    for phase in phases:
+        values = [r['timings'][phase] for r in results if phase in r['timings']]
+        summary['server_timings'][phase] = {f'p{p}': round(percentile(values, p), 4) for p in (50, 95, 99)}
+    return summary
+
+
+def print_summary(summary):
+    print(f"Requests: {summary['requests']} in {summary['wall_seconds']}s "
+          f"({summary['throughput_rps']} req/s), success rate {summary['success_rate'] * 100:.1f}%")
+    print(f"Status codes: {summary['status_codes']}")
+    lat = summary['latency']
+    print(f"Latency (s): p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}")
+    for phase, values in summary['server_timings'].items():
+        print(f"Server {phase:<10} (s): p50={values['p50']} p95={values['p95']} p99={values['p99']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the timetable service.')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--corpus', help='Directory of request JSON files (.json or .json.gz)')
+    parser.add_argument('--outcome', action='append',
+                        help='Only replay captured requests with this outcome (repeatable)')
+    parser.add_argument('--generate', type=int, default=0, help='Number of synthetic payloads to generate')
+    parser.add_argument('--groups', type=int, default=4, help='Student groups per generated payload')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0.0, help='Arrival rate in requests/s (0 = back-to-back)')
+    parser.add_argument('--requests', type=int, default=None, help='Total requests to send')
+    parser.add_argument('--duration', type=float, default=None, help='Seconds to keep sending')
+    parser.add_argument('--format', choices=['verbose', 'compact'], default='verbose')
+    parser.add_argument('--json', dest='json_out', help='Write the summary and raw results to this file')
+    args = parser.parse_args()
+
+    payloads = []
+    if args.corpus:
+        payloads.extend(load_corpus(args.corpus, args.outcome))
+    for i in range(args.generate):
+        payloads.append((f'generated_{i}', generate_payload(seed=i, groups=args.groups)))
+    if not payloads:
+        parser.error('No payloads: pass --corpus and/or --generate')
+    if args.requests is None and args.duration is None:
+        args.requests = len(payloads)
+
+    print(f"Replaying {len(payloads)} payloads against {args.url} "
+          f"(concurrency={args.concurrency}, rate={args.rate or 'max'})")
+    params = {'format': 'compact'} if args.format == 'compact' else None
+    results, wall = run_load(args.url, payloads, args.concurrency, args.rate, args.requests, args.duration, params)
+    summary = summarize(results, wall)
+    print_summary(summary)
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump({'summary': summary, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+No client library is needed; GET /metrics returns the text directly.
+Values are per process, so with several gunicorn workers each worker is
+scraped (or summed) separately.
+"""
+import bisect
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; solves run up to the 120 s default limit and beyond
+TIME_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+SIZE_BUCKETS = (100, 1000, 10000, 50000, 100000, 250000, 500000, 1000000, 5000000)
+GAP_BUCKETS = (0.0, 0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(n, '') for n in self.label_names)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}' for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self._value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def value(self):
+        return self._value
+
+    def _samples(self):
+        return [f'{self.name} {_format_value(self._value)}']
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value):
+        # Non-cumulative per-bucket counts; cumulated when rendering
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if idx < len(self.buckets):
+                self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+
+    def count(self):
+        return self._count
+
+    def _samples(self):
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        lines = []
+        cumulative = 0
+        for bound, c in zip(self.buckets, counts):
+            cumulative += c
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f'{self.name}_sum {_format_value(total)}')
+        lines.append(f'{self.name}_count {count}')
+        return lines
+
+
+# --- TIMETABLE SERVICE METRICS ---
+REQUESTS = Counter('timely_requests_total',
+                   'Timetable requests by outcome (success, validation_error, infeasible, no_solution, '
+                   'model_invalid, cancelled, timeout, crash).',
+                   labels=('outcome',))
+SOLVER_STATUS = Counter('timely_solver_status_total', 'CP-SAT termination status.', labels=('status',))
+BUILD_SECONDS = Histogram('timely_build_seconds', 'Time spent creating variables, constraints and objective.', TIME_BUCKETS)
+SOLVE_SECONDS = Histogram('timely_solve_seconds', 'Time spent inside the CP-SAT solve.', TIME_BUCKETS)
+REQUEST_SECONDS = Histogram('timely_request_seconds', 'Total time per /generate-timetable request.', TIME_BUCKETS)
+MODEL_VARIABLES = Histogram('timely_model_variables', 'Number of variables in the built model.', SIZE_BUCKETS)
+MODEL_CONSTRAINTS = Histogram('timely_model_constraints', 'Number of constraints in the built model.', SIZE_BUCKETS)
+OBJECTIVE_GAP = Histogram('timely_objective_gap', 'Relative gap between objective and best bound at termination.', GAP_BUCKETS)
+INFLIGHT_SOLVES = Gauge('timely_inflight_solves', 'Requests currently being built or solved.')
+MODEL_TEMPLATE_LOOKUPS = Counter('timely_model_template_lookups_total',
+                                 'Structural model template lookups by result (hit, miss).', labels=('result',))
+
+ALL_METRICS = [REQUESTS, SOLVER_STATUS, BUILD_SECONDS, SOLVE_SECONDS, REQUEST_SECONDS,
+               MODEL_VARIABLES, MODEL_CONSTRAINTS, OBJECTIVE_GAP, INFLIGHT_SOLVES, MODEL_TEMPLATE_LOOKUPS]
+
+
+def solve_outcome(status_name):
+    """
+    Request outcome of a solve that produced no schedule: 'infeasible' only
+    when CP-SAT proved it, 'model_invalid' for a rejected model and
+    'no_solution' otherwise (time limit, stagnation or an unknown status).
+    """
+    return {'INFEASIBLE': 'infeasible', 'MODEL_INVALID': 'model_invalid'}.get(status_name, 'no_solution')
+
+
+def relative_gap(objective, bound):
+    return abs(objective - bound) / max(1.0, abs(objective))
+
+
+def render():
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
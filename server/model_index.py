@@ -0,0 +1,46 @@
+"""
+Lookup tables over the assignment variables.
+
+`assign` is keyed by (task_id, inst_id, room_id, day, timeslot), so finding
+"every variable of instructor I at Mon 9:00" used to mean probing every
+task and room. AssignIndex groups the variables once, in a single pass
+after variable creation (or after cloning a cached model template); the
+hard constraints and objectives then read the lists they need directly.
+"""
+from collections import defaultdict
+
+from ortools.sat.python import cp_model
+
+
+class AssignIndex:
+    def __init__(self, assign, tasks):
+        self.by_task = defaultdict(list)
+        self.by_task_day = defaultdict(list)
+        self.by_inst = defaultdict(list)
+        # (inst_id, day, timeslot) -> [(task_id, var)]
+        self.by_inst_slot = defaultdict(list)
+        # (room or pool id, day, timeslot) -> [var]
+        self.by_room_slot = defaultdict(list)
+        # (sg_id, day, timeslot) -> [var], shared lectures under every member
+        self.by_group_slot = defaultdict(list)
+        # timeslot -> [(task_id, var)] over all days
+        self.by_timeslot = defaultdict(list)
+        for key, var in assign.items():
+            task_id, inst_id, room_id, day, timeslot = key
+            self.by_task[task_id].append(var)
+            self.by_task_day[(task_id, day)].append(var)
+            self.by_inst[inst_id].append(var)
+            self.by_inst_slot[(inst_id, day, timeslot)].append((task_id, var))
+            self.by_room_slot[(room_id, day, timeslot)].append(var)
+            self.by_timeslot[timeslot].append((task_id, var))
+            for sg_id in tasks[task_id]['group_ids']:
+                self.by_group_slot[(sg_id, day, timeslot)].append(var)
+
+    def task_day_vars(self, task_ids, day):
+        return [var for task_id in task_ids for var in self.by_task_day.get((task_id, day), ())]
+
+
+def weighted_sum(terms):
+    """One LinearExpr.WeightedSum over (expression, coefficient) pairs."""
+    terms = list(terms)
+    return cp_model.LinearExpr.WeightedSum([expr for expr, _ in terms], [coef for _, coef in terms])
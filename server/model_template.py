@@ -0,0 +1,87 @@
+"""
+Structural model templates.
+
+The assignment variables and hard constraints of a timetable model only
+depend on the institution data (instructors, courses, rooms, groups, days,
+timeslots) and the settings that shape the model (`roomPools`, ...). The
+objective settings (`gapPriority`, `fairWorkload`,
+`preferredMorningCourses`, `disallow830Labs`, `objectiveMode`,
+`objectiveTiers`) and the run-time ones
+(`timeLimitSeconds`, ...) only change the objective layer or the solve.
+
+After a full build, generate_timetable stores the hard-constraint model
+and the proto index of every assignment variable under a hash of the
+structural inputs. A later request with the same structure clones that
+model, maps the indices back to variables and only adds its objective,
+hinted with the last solution found for the structure.
+
+Templates are kept per worker process, least recently used first out.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+MAX_CACHED_TEMPLATES = 8
+
+STRUCTURAL_KEYS = ('instructors', 'courses', 'rooms', 'student_groups', 'days', 'timeslots')
+# Settings that never change variables or hard constraints
+OBJECTIVE_SETTINGS = ('gapPriority', 'fairWorkload', 'preferredMorningCourses', 'disallow830Labs',
+                      'objectiveMode', 'objectiveTiers')
+RUNTIME_SETTINGS = ('timeLimitSeconds', 'stagnationSeconds', 'solverPortfolio', 'responseFormat', 'solverWorkers',
+                    'trace')
+
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+def structural_key(data):
+    """sha1 of the inputs the hard-constraint model is built from."""
+    settings = {k: v for k, v in (data.get('settings') or {}).items()
+                if k not in OBJECTIVE_SETTINGS and k not in RUNTIME_SETTINGS}
+    payload = {key: data.get(key, []) for key in STRUCTURAL_KEYS}
+    payload['settings'] = settings
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ModelTemplate:
+    """A built hard-constraint model; never modified once stored, only cloned."""
+
+    def __init__(self, model, assign):
+        self.model = model.Clone()
+        self.assign_index = {key: var.Index() for key, var in assign.items()}
+        # Last solution found for this structure: ((assign key, value), ...)
+        self.hint = ()
+
+    def instantiate(self):
+        """A fresh copy of the model and its assign map, hinted with the last solution."""
+        model = self.model.Clone()
+        assign = {key: model.get_bool_var_from_proto_index(index) for key, index in self.assign_index.items()}
+        for key, value in self.hint:
+            model.AddHint(assign[key], value)
+        return model, assign
+
+    def remember(self, solver, assign):
+        self.hint = tuple((key, solver.Value(var)) for key, var in assign.items())
+
+
+def get_template(key):
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+        return template
+
+
+def store_template(key, model, assign):
+    template = ModelTemplate(model, assign)
+    with _templates_lock:
+        _templates[key] = template
+        while len(_templates) > MAX_CACHED_TEMPLATES:
+            _templates.popitem(last=False)
+    return template
+
+
+def clear_cache():
+    with _templates_lock:
+        _templates.clear()
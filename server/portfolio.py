@@ -0,0 +1,172 @@
+import multiprocessing
+import os
+import queue
+import time
+
+from ortools.sat.python import cp_model
+
+from solve_control import SolveControl
+
+# Each entry is one racer. 'lab_first' keeps the AddDecisionStrategy on lab
+# variables that generate_timetable adds; without it CP-SAT uses its own search.
+DEFAULT_PORTFOLIO = [
+    {'name': 'lab_first_seed_0', 'seed': 0, 'lab_first': True, 'linearization_level': 1},
+    {'name': 'free_seed_1', 'seed': 1, 'lab_first': False, 'linearization_level': 1},
+    {'name': 'lab_first_seed_2_lin2', 'seed': 2, 'lab_first': True, 'linearization_level': 2},
+    {'name': 'free_seed_3_lin0', 'seed': 3, 'lab_first': False, 'linearization_level': 0},
+]
+
+# Extra time given to the workers to report back after the deadline
+RESULT_GRACE_SECONDS = 5.0
+
+# How often the race loop wakes up to check for cancellation
+POLL_INTERVAL_SECONDS = 0.2
+
+
+class PortfolioResult:
+    """
+    Outcome of a portfolio race. Mirrors the parts of CpSolver used when
+    processing results, so callers can use it in place of a solver.
+    """
+    def __init__(self, status, solution=None, objective=0.0, bound=0.0, wall_time=0.0, config_name=None):
+        self.status = status
+        self.solution = solution or []
+        self.objective = objective
+        self.bound = bound
+        self.wall_time = wall_time
+        self.config_name = config_name
+
+    def Value(self, var):
+        return self.solution[var.Index()]
+
+    def ObjectiveValue(self):
+        return self.objective
+
+    def BestObjectiveBound(self):
+        return self.bound
+
+    def WallTime(self):
+        return self.wall_time
+
+    def StatusName(self, status=None):
+        return cp_model.CpSolverStatus(self.status if status is None else status).name
+
+
+def _solve_worker(model, config, time_limit, stagnation_seconds, num_workers, result_queue):
+    """
+    Runs in a child process. `model` is the CpModel itself when the process
+    was forked, or its text-format proto when it had to be spawned.
+    """
+    try:
+        if isinstance(model, str):
+            text = model
+            model = cp_model.CpModel()
+            model.Proto().parse_text_format(text)
+
+        if not config.get('lab_first', True):
+            model.Proto().search_strategy.clear()
+
+        solver = cp_model.CpSolver()
+        solver.parameters.random_seed = config.get('seed', 0)
+        solver.parameters.linearization_level = config.get('linearization_level', 1)
+        solver.parameters.num_workers = num_workers
+        # Each racer applies the stagnation criterion on its own search
+        worker_control = SolveControl(time_limit=time_limit, stagnation_seconds=stagnation_seconds)
+        status = worker_control.solve(solver, model)
+
+        response = solver.ResponseProto()
+        result_queue.put({
+            'name': config['name'],
+            'status': int(status),
+            'solution': list(response.solution),
+            'objective': response.objective_value,
+            'bound': response.best_objective_bound,
+            'wall_time': response.wall_time,
+        })
+    except Exception as e:
+        result_queue.put({'name': config.get('name'), 'status': int(cp_model.UNKNOWN), 'error': str(e)})
+
+
+def solve_portfolio(model, time_limit=120.0, configs=None, log=print, control=None):
+    """
+    Races `configs` on `model` in separate processes.
+    Returns the first proven result (OPTIMAL or INFEASIBLE), otherwise the
+    best feasible result once every racer has hit the deadline.
+    When a SolveControl is given, its remaining time replaces `time_limit`
+    and cancelling it stops the race with the best result so far.
+    """
+    configs = configs or DEFAULT_PORTFOLIO
+    stagnation_seconds = None
+    if control is not None:
+        time_limit = max(control.remaining(), 0.01)
+        stagnation_seconds = control.stagnation_seconds
+
+    # Forking shares the already-built model with the children for free.
+    # Platforms without fork (Windows) get the text proto instead.
+    if 'fork' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('fork')
+        model_arg = model
+    else:
+        ctx = multiprocessing.get_context('spawn')
+        model_arg = str(model.Proto())
+
+    num_workers = max(1, (os.cpu_count() or 1) // len(configs))
+    result_queue = ctx.Queue()
+    processes = []
+    for config in configs:
+        p = ctx.Process(target=_solve_worker,
+                        args=(model_arg, config, time_limit, stagnation_seconds, num_workers, result_queue),
+                        daemon=True)
+        p.start()
+        processes.append(p)
+
+    deadline = time.monotonic() + time_limit + RESULT_GRACE_SECONDS
+    best = None
+    received = 0
+    try:
+        while received < len(processes):
+            if control is not None and control.cancelled:
+                control.stop_reason = 'cancelled'
+                log("Portfolio: cancelled by client")
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                log(f"Portfolio: deadline reached with {len(processes) - received} racers still running")
+                break
+            try:
+                result = result_queue.get(timeout=min(remaining, POLL_INTERVAL_SECONDS))
+            except queue.Empty:
+                continue
+            received += 1
+
+            status = result['status']
+            if 'error' in result:
+                log(f"Portfolio: {result['name']} failed: {result['error']}")
+                continue
+            log(f"Portfolio: {result['name']} finished with {cp_model.CpSolverStatus(status).name} "
+                f"(objective={result['objective']}, {result['wall_time']:.2f}s)")
+
+            if status in (cp_model.OPTIMAL, cp_model.INFEASIBLE, cp_model.MODEL_INVALID):
+                best = result
+                break
+            if status == cp_model.FEASIBLE:
+                if best is None or best['status'] != cp_model.FEASIBLE or result['objective'] < best['objective']:
+                    best = result
+            elif best is None:
+                best = result
+    finally:
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+        for p in processes:
+            p.join(timeout=1.0)
+
+    if best is None:
+        return PortfolioResult(cp_model.UNKNOWN)
+
+    return PortfolioResult(cp_model.CpSolverStatus(best['status']),
+                           solution=best['solution'],
+                           objective=best['objective'],
+                           bound=best['bound'],
+                           wall_time=best['wall_time'],
+                           config_name=best['name'])
@@ -0,0 +1,49 @@
+"""
+Per-request derived structures that depend only on the institution data
+(not on settings): entity maps, the time grid, lab start masks,
+availability bitmasks, shared lecture cohorts, the room eligibility table
+and the classes of interchangeable days.
+
+They are computed once per request, or once per dataset version when the
+request references a stored dataset (see dataset_store.py).
+"""
+from availability import build_availability
+from day_symmetry import equivalent_day_classes
+from lab_preferences import compute_lab_masks
+from room_eligibility import compute_room_eligibility
+from shared_lectures import compute_lecture_cohorts
+from timeslots import parse_timeslot, timeslot_gaps
+
+
+def preprocess(data):
+    all_instructors = {i['id']: i for i in data.get('instructors', [])}
+    all_courses = {c['id']: c for c in data.get('courses', [])}
+    all_rooms = {r['id']: r for r in data.get('rooms', [])}
+    all_student_groups = {sg['id']: sg for sg in data.get('student_groups', [])}
+    all_days = data.get('days', [])
+    all_timeslots = data.get('timeslots', [])
+
+    # ts_parsed: list of (start, end); gaps[i] = start[i+1] - end[i]
+    ts_parsed = [parse_timeslot(ts) for ts in all_timeslots]
+    ts_gaps = timeslot_gaps(ts_parsed)
+    lecture_cohorts = compute_lecture_cohorts(all_student_groups, all_courses)
+    avail = build_availability(all_instructors, all_rooms, all_student_groups, all_days, all_timeslots)
+
+    return {
+        'all_instructors': all_instructors,
+        'all_courses': all_courses,
+        'all_rooms': all_rooms,
+        'all_student_groups': all_student_groups,
+        'ts_parsed': ts_parsed,
+        'ts_gaps': ts_gaps,
+        # Allowed lab start slots per (group, course), shared by validation and the model
+        'lab_masks': compute_lab_masks(all_student_groups, all_courses, ts_parsed, ts_gaps),
+        # Availability arrays as per-day bitmasks
+        'avail': avail,
+        # Groups attending a course's lectures together
+        'lecture_cohorts': lecture_cohorts,
+        # Eligible rooms per (group or cohort, course, session type)
+        'room_eligibility': compute_room_eligibility(all_rooms, all_student_groups, all_courses, lecture_cohorts),
+        # Days with identical availability for every entity (see day_symmetry.py)
+        'day_classes': equivalent_day_classes(avail, all_days),
+    }
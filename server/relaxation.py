@@ -0,0 +1,147 @@
+"""
+Relaxed solve mode (`settings.relaxedMode`): best effort when the hard
+constraints cannot all be met.
+
+`relaxedMode: true` relaxes every family in RELAXABLE_FAMILIES, a list
+relaxes only the families named in it:
+
+  availability  - sessions may use slots where a group, instructor or room is unavailable
+  capacity      - sessions may use rooms that are too small for the attending groups
+  labTiming     - labs may start outside the group's labTimingPreferences
+  labsPerDay    - a group may have more than one lab course on a day
+  facultyBreak  - an instructor may teach back to back without a break
+
+The first three are enforced by not creating variables; in relaxed mode
+those variables exist and every violation they stand for costs
+VIOLATION_PENALTY. The last two get slack variables with the same penalty
+per unit. The penalty dominates every other objective term, so the solver
+breaks as few constraints as it can, and the response lists each one
+that is broken together with the entities involved.
+"""
+RELAXABLE_FAMILIES = ('availability', 'capacity', 'labTiming', 'labsPerDay', 'facultyBreak')
+VIOLATION_PENALTY = 100000
+
+
+def relaxed_families(settings):
+    relax = settings.get('relaxedMode')
+    if relax is True:
+        return frozenset(RELAXABLE_FAMILIES)
+    if isinstance(relax, (list, tuple)):
+        return frozenset(family for family in relax if family in RELAXABLE_FAMILIES)
+    return frozenset()
+
+
+class Relaxation:
+    """Slack variables, penalties and the violation report of one request."""
+
+    def __init__(self, families, model):
+        self.families = families
+        self.model = model
+        # (expression, coefficient) objective terms
+        self.penalties = []
+        self._slacks = []
+        self._reasons = {}
+
+    def __bool__(self):
+        return bool(self.families)
+
+    def widen(self, tasks, candidates, avail, room_eligibility, lab_masks, all_days):
+        """
+        Candidates and availability to create variables from: the strict
+        `candidates` with the relaxed families' filters removed.
+        `room_eligibility` and `lab_masks` are computed without capacity
+        and without lab timing preferences.
+        """
+        self._tasks = tasks
+        self._strict = candidates
+        self._avail = avail
+        any_slot = {day: avail['full'] for day in all_days}
+
+        widened = {}
+        for task_id, cand in candidates.items():
+            task_info = tasks[task_id]
+            key = (task_info['group_id'], task_info['course_id'])
+            cand = dict(cand)
+            if 'capacity' in self.families:
+                cand['rooms'] = room_eligibility[key + (task_info['type'],)]
+            if 'availability' in self.families:
+                cand['group_masks'] = any_slot
+            if 'labTiming' in self.families and cand['lab_mask'] is not None:
+                cand['lab_mask'] = lab_masks[key]
+            widened[task_id] = cand
+
+        model_avail = avail
+        if 'availability' in self.families:
+            model_avail = dict(avail)
+            for kind in ('instructors', 'rooms', 'groups'):
+                model_avail[kind] = {e_id: any_slot for e_id in avail[kind]}
+        return widened, model_avail
+
+    def penalize_assignments(self, assign, room_pools, all_timeslots):
+        """Penalizes every variable that exists only because of the relaxation."""
+        ts_index = {ts: i for i, ts in enumerate(all_timeslots)}
+        for key, var in assign.items():
+            reasons = self._assignment_reasons(key, ts_index[key[4]], room_pools)
+            if reasons:
+                self._reasons[key] = reasons
+                self.penalties.append((var, VIOLATION_PENALTY * len(reasons)))
+
+    def _assignment_reasons(self, key, t_idx, room_pools):
+        task_id, inst_id, room_id, day, timeslot = key
+        task_info = self._tasks[task_id]
+        strict = self._strict[task_id]
+        bit = 1 << t_idx
+        reasons = []
+        if not strict['group_masks'][day] & bit:
+            reasons.extend(('availability', 'group', sg_id) for sg_id in task_info['group_ids']
+                           if not self._avail['groups'][sg_id][day] & bit)
+        inst_masks = self._avail['instructors'].get(inst_id)
+        if inst_masks is not None and not inst_masks[day] & bit:
+            reasons.append(('availability', 'instructor', inst_id))
+        if not self._avail['rooms'][room_pools[room_id][0]][day] & bit:
+            reasons.append(('availability', 'room', room_id))
+        if room_id not in strict['rooms']:
+            reasons.append(('capacity', 'room', room_id))
+        # Second lab halves start with their first half, which carries the violation
+        lab_mask = strict['lab_mask']
+        if lab_mask is not None:
+            role = task_info.get('lab_role')
+            if (role == 'first' and not lab_mask['pair'] & bit) or (role == 'single' and not lab_mask['single'] & bit):
+                reasons.append(('labTiming', 'group', task_info['group_id']))
+        return reasons
+
+    def slack(self, family, upper, **details):
+        """
+        Room to exceed a `<= bound` constraint of `family` by up to `upper`,
+        at VIOLATION_PENALTY per unit; 0 when the family is not relaxed.
+        """
+        if family not in self.families or upper <= 0:
+            return 0
+        var = self.model.NewIntVar(0, upper, f'slack_{family}_{len(self._slacks)}')
+        self._slacks.append((var, dict(details, family=family)))
+        self.penalties.append((var, VIOLATION_PENALTY))
+        return var
+
+    def violations(self, solver, assign, room_of=None):
+        """Every broken constraint of the solution, with the entities involved."""
+        room_of = room_of or {}
+        result = []
+        for key, reasons in self._reasons.items():
+            if solver.Value(assign[key]) != 1:
+                continue
+            task_id, inst_id, room_id, day, timeslot = key
+            task_info = self._tasks[task_id]
+            room_id = room_of.get(task_id, room_id)
+            session = {'courseId': task_info['course_id'], 'type': task_info['type'],
+                       'groups': list(task_info['group_ids']), 'instructor': inst_id,
+                       'room': room_id, 'day': day, 'timeslot': timeslot}
+            for family, entity, entity_id in reasons:
+                # Pooled sessions are reported with the concrete room matched after solving
+                if entity == 'room':
+                    entity_id = room_id
+                result.append(dict(session, family=family, entity=entity, entityId=entity_id))
+        for var, details in self._slacks:
+            excess = solver.Value(var)
+            if excess:
+                result.append(dict(details, excess=excess))
+        return result
@@ -0,0 +1,136 @@
+"""
+Sampled capture of /generate-timetable requests into a local replay corpus.
+
+Off unless TIMELY_CAPTURE_DIR is set (or create_app gets a RequestCapture).
+
+    TIMELY_CAPTURE_DIR         directory of the corpus
+    TIMELY_CAPTURE_RATE        fraction of requests kept (default 0.05)
+    TIMELY_CAPTURE_ANONYMIZE   1 to replace ids and names (default 0)
+    TIMELY_CAPTURE_MAX_FILES   oldest captures are deleted beyond this (default 1000)
+
+Each sampled request is written after it finished as
+capture-<utc time>-<random>.json.gz:
+
+    {"captured_at": "...", "outcome": "success", "timings": {...}, "payload": {...}}
+
+The payload is the request as solved, i.e. with a stored dataset already
+resolved. loadtest.py --corpus and batch.py read these files directly.
+"""
+import copy
+import gzip
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timezone
+
+DEFAULT_RATE = 0.05
+DEFAULT_MAX_FILES = 1000
+FILE_PREFIX = 'capture-'
+FILE_SUFFIX = '.json.gz'
+
+
+class _Renamer:
+    """Consistent replacement ids per entity kind: the same id always maps to the same alias."""
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.aliases = {}
+
+    def __call__(self, value):
+        if not isinstance(value, str):
+            return value
+        if value not in self.aliases:
+            self.aliases[value] = f'{self.prefix}{len(self.aliases) + 1:03d}'
+        return self.aliases[value]
+
+
+def anonymize(payload):
+    """
+    Copy of `payload` with instructor, course, room and group ids replaced
+    by aliases (INS001, CRS001, ROOM001, GRP001) everywhere they are
+    referenced, and names replaced by the alias. Sizes, availability and
+    all other settings are kept, so the copy builds the same model.
+    """
+    data = copy.deepcopy(payload)
+    inst, course, room, group = _Renamer('INS'), _Renamer('CRS'), _Renamer('ROOM'), _Renamer('GRP')
+
+    def rename_entity(entity, renamer):
+        entity['id'] = renamer(entity.get('id'))
+        if 'name' in entity:
+            entity['name'] = entity['id']
+
+    for instructor in data.get('instructors', []):
+        rename_entity(instructor, inst)
+    for r in data.get('rooms', []):
+        rename_entity(r, room)
+    for c in data.get('courses', []):
+        rename_entity(c, course)
+        c['qualifiedInstructors'] = [inst(i) for i in c.get('qualifiedInstructors', [])]
+        if c.get('sharedLectureGroups'):
+            c['sharedLectureGroups'] = [[group(g) for g in cohort] for cohort in c['sharedLectureGroups']]
+    for g in data.get('student_groups', []):
+        rename_entity(g, group)
+        g['enrolledCourses'] = [course(c) for c in g.get('enrolledCourses', [])]
+        if g.get('preferredRoomId'):
+            g['preferredRoomId'] = room(g['preferredRoomId'])
+        if g.get('instructorPreferences'):
+            g['instructorPreferences'] = {course(c): inst(i) for c, i in g['instructorPreferences'].items()}
+        if g.get('labRoomPreferences'):
+            g['labRoomPreferences'] = {course(c): room(r) for c, r in g['labRoomPreferences'].items()}
+        if g.get('labTimingPreferences'):
+            g['labTimingPreferences'] = {course(c): pref for c, pref in g['labTimingPreferences'].items()}
+
+    settings = data.get('settings') or {}
+    if settings.get('preferredMorningCourses'):
+        settings['preferredMorningCourses'] = [course(c) for c in settings['preferredMorningCourses']]
+    return data
+
+
+class RequestCapture:
+    def __init__(self, directory, rate=DEFAULT_RATE, anonymize=False, max_files=DEFAULT_MAX_FILES):
+        self.directory = directory
+        self.rate = rate
+        self.anonymize = anonymize
+        self.max_files = max_files
+
+    @classmethod
+    def from_env(cls):
+        """A RequestCapture configured from TIMELY_CAPTURE_*, or None when capture is off."""
+        directory = os.environ.get('TIMELY_CAPTURE_DIR')
+        if not directory:
+            return None
+        return cls(directory,
+                   rate=float(os.environ.get('TIMELY_CAPTURE_RATE', DEFAULT_RATE)),
+                   anonymize=os.environ.get('TIMELY_CAPTURE_ANONYMIZE', '0') == '1',
+                   max_files=int(os.environ.get('TIMELY_CAPTURE_MAX_FILES', DEFAULT_MAX_FILES)))
+
+    def record(self, payload, outcome, timings):
+        """Samples and writes one finished request. Returns the file path, or None if not sampled."""
+        if random.random() >= self.rate:
+            return None
+        payload = {k: v for k, v in payload.items() if k != 'request_id'}
+        if self.anonymize:
+            payload = anonymize(payload)
+        record = {
+            'captured_at': datetime.now(timezone.utc).isoformat(),
+            'outcome': outcome,
+            'timings': {k: round(v, 4) for k, v in timings.items()},
+            'payload': payload,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        path = os.path.join(self.directory, f'{FILE_PREFIX}{stamp}-{uuid.uuid4().hex[:8]}{FILE_SUFFIX}')
+        with gzip.open(path, 'wt', encoding='utf-8', compresslevel=5) as f:
+            json.dump(record, f, separators=(',', ':'))
+        self._rotate()
+        return path
+
+    def _rotate(self):
+        captures = sorted(name for name in os.listdir(self.directory)
+                          if name.startswith(FILE_PREFIX) and name.endswith(FILE_SUFFIX))
+        for name in captures[:max(0, len(captures) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Another worker rotated it first
+                pass
@@ -0,0 +1,98 @@
+"""
+On-demand profiling of single /generate-timetable requests.
+
+A request with the headers
+
+    X-Timely-Profile: 1
+    X-Admin-Token: <TIMELY_ADMIN_TOKEN>
+
+runs under cProfile with tracemalloc on. Without TIMELY_ADMIN_TOKEN set on
+the server the headers are ignored. The results go to TIMELY_PROFILE_DIR
+(default server/profiles) and the response carries their id in
+X-Profile-ID:
+
+    <id>.prof   cProfile stats (pstats / snakeviz)
+    <id>.txt    top functions by cumulative time, peak traced memory and
+                the top allocation sites
+
+Only one request is profiled at a time; while one runs, further profile
+requests are served unprofiled. cProfile only sees the request's own
+thread (CP-SAT's search runs in native code and shows up as Solve), while
+tracemalloc counts allocations of every thread of the worker. Both slow
+Python code down, so compare profiled timings only with each other.
+"""
+import cProfile
+import functools
+import hmac
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+from flask import current_app, make_response, request
+
+DEFAULT_PROFILE_DIR = os.environ.get('TIMELY_PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+TOP_FUNCTIONS = 60
+TOP_ALLOCATIONS = 30
+TRACEMALLOC_FRAMES = 10
+
+_profile_lock = threading.Lock()
+
+
+def profile_requested():
+    """True when the request asks for profiling with the right admin token."""
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token or request.headers.get('X-Timely-Profile') != '1':
+        return False
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+
+def _write_report(directory, profile_id, profiler, snapshot, peak_bytes):
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+
+    out = io.StringIO()
+    out.write(f"Profile {profile_id} of {request.method} {request.path}\n\n")
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    out.write(f"Peak traced memory: {peak_bytes / 1024 / 1024:.1f} MiB\n\n")
+    out.write(f"Top {TOP_ALLOCATIONS} allocation sites still alive at the end of the request:\n")
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+        out.write(f"{stat}\n")
+    with open(os.path.join(directory, f'{profile_id}.txt'), 'w', encoding='utf-8') as f:
+        f.write(out.getvalue())
+
+
+def profiled(view):
+    """Decorator: runs `view` under the profiler when profile_requested()."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not profile_requested() or not _profile_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+        try:
+            profile_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            tracemalloc.reset_peak()
+            profiler = cProfile.Profile()
+            try:
+                result = profiler.runcall(view, *args, **kwargs)
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    tracemalloc.stop()
+            try:
+                _write_report(current_app.config['PROFILE_DIR'], profile_id, profiler, snapshot, peak_bytes)
+            except OSError as e:
+                print(f"DEBUG: Could not write profile {profile_id}: {e}")
+                return result
+        finally:
+            _profile_lock.release()
+        response = make_response(result)
+        response.headers['X-Profile-ID'] = profile_id
+        return response
+    return wrapper
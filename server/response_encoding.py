@@ -0,0 +1,140 @@
+import gzip
+import json
+
+from flask import Response
+
+# Optional fast paths: orjson for serialization, brotli for 'br' encoding.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the headers would cost more
+MIN_COMPRESS_BYTES = 1024
+
+COMPACT_COLUMNS = ['group', 'day', 'timeslot', 'course', 'instructor', 'room', 'type']
+
+
+def sort_schedule(schedule, days, timeslots):
+    """Orders schedule entries by group, then day and timeslot as given in the request."""
+    day_index = {d: i for i, d in enumerate(days)}
+    ts_index = {ts: i for i, ts in enumerate(timeslots)}
+    return sorted(schedule, key=lambda e: (str(e['group']),
+                                           day_index.get(e['day'], len(day_index)),
+                                           ts_index.get(e['timeslot'], len(ts_index))))
+
+
+def encode_compact(schedule, days, timeslots):
+    """
+    Dictionary-encodes a schedule. Every string is stored once in `tables`
+    and each row holds integer indexes in COMPACT_COLUMNS order.
+    Rows are sorted by group/day/slot.
+    """
+    tables = {
+        'groups': [],
+        'days': list(days),
+        'timeslots': list(timeslots),
+        'courses': [],
+        'instructors': [],
+        'rooms': [],
+        'types': ['lecture', 'lab'],
+    }
+    lookups = {name: {v: i for i, v in enumerate(values)} for name, values in tables.items()}
+
+    def index_of(table, value):
+        lookup = lookups[table]
+        if value not in lookup:
+            lookup[value] = len(tables[table])
+            tables[table].append(value)
+        return lookup[value]
+
+    # Courses keep both id and display name
+    course_lookup = {}
+
+    rows = []
+    for entry in sort_schedule(schedule, days, timeslots):
+        course_key = (entry['courseId'], entry['course'])
+        if course_key not in course_lookup:
+            course_lookup[course_key] = len(tables['courses'])
+            tables['courses'].append({'id': entry['courseId'], 'name': entry['course']})
+
+        rows.append([
+            index_of('groups', entry['group']),
+            index_of('days', entry['day']),
+            index_of('timeslots', entry['timeslot']),
+            course_lookup[course_key],
+            index_of('instructors', entry['instructor']),
+            index_of('rooms', entry['room']),
+            index_of('types', entry['type']),
+        ])
+
+    return {'format': 'compact', 'columns': COMPACT_COLUMNS, 'tables': tables, 'rows': rows}
+
+
+def decode_compact(compact):
+    """Expands a compact schedule back into the verbose list of entries."""
+    tables = compact['tables']
+    schedule = []
+    for g, d, t, c, i, r, ty in compact['rows']:
+        course = tables['courses'][c]
+        schedule.append({
+            'day': tables['days'][d],
+            'timeslot': tables['timeslots'][t],
+            'courseId': course['id'],
+            'course': course['name'],
+            'instructor': tables['instructors'][i],
+            'room': tables['rooms'][r],
+            'group': tables['groups'][g],
+            'type': tables['types'][ty],
+        })
+    return schedule
+
+
+def wants_compact(req, settings):
+    """Compact output is requested with ?format=compact or settings.responseFormat."""
+    fmt = req.args.get('format') or settings.get('responseFormat', 'verbose')
+    return str(fmt).lower() == 'compact'
+
+
+def dumps(body):
+    if orjson is not None:
+        return orjson.dumps(body)
+    return json.dumps(body, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _accepted_encodings(req):
+    accepted = set()
+    for part in req.headers.get('Accept-Encoding', '').split(','):
+        token = part.split(';')[0].strip().lower()
+        if not token:
+            continue
+        # Honour explicit refusals like "gzip;q=0"
+        if ';' in part and part.split(';', 1)[1].strip().replace(' ', '') in ('q=0', 'q=0.0'):
+            continue
+        accepted.add(token)
+    return accepted
+
+
+def json_response(req, body, status=200):
+    """
+    Serializes `body` with the fastest available encoder and compresses it
+    with br or gzip when the client accepts it.
+    """
+    payload = dumps(body)
+    headers = {'Vary': 'Accept-Encoding'}
+
+    if len(payload) >= MIN_COMPRESS_BYTES:
+        accepted = _accepted_encodings(req)
+        if brotli is not None and 'br' in accepted:
+            payload = brotli.compress(payload, quality=5)
+            headers['Content-Encoding'] = 'br'
+        elif 'gzip' in accepted:
+            payload = gzip.compress(payload, compresslevel=5)
+            headers['Content-Encoding'] = 'gzip'
+
+    return Response(payload, status=status, mimetype='application/json', headers=headers)
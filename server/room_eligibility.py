@@ -0,0 +1,144 @@
+"""
+Which rooms each (student group, course, session type) may use.
+
+A room is eligible when it is large enough for the group, has every piece
+of equipment the course needs, and has the right kind for the session:
+  - lectures never go into lab rooms
+  - 'Hardware Lab' labs need a hardware room
+  - other labs ('Computer Lab', the default) need a computer or non-hardware lab
+A lab room preference (`labRoomPreferences[course_id]`) narrows the list to
+that room if it is eligible. Joint lectures of groups sharing a course (see
+shared_lectures.py) are keyed by their cohort id and sized for all members.
+
+Room attributes and the per-(kind, size, equipment) room lists only depend
+on the room catalog, so they are memoized by a hash of the catalog and
+shared across requests that send the same rooms.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from shared_lectures import cohort_id, cohort_size
+
+MAX_CACHED_CATALOGS = 32
+
+_catalogs = OrderedDict()
+_catalogs_lock = threading.Lock()
+
+
+def _to_int(value, default=0):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def room_kinds(room):
+    """Session kinds a room can host ('lecture', 'hardware lab', 'computer lab'), from its free-text type."""
+    room_type = (room.get('type') or '').lower()
+    kinds = set()
+    if 'lab' not in room_type and 'computer' not in room_type:
+        kinds.add('lecture')
+    if 'hardware' in room_type:
+        kinds.add('hardware lab')
+    if 'computer' in room_type or ('lab' in room_type and 'hardware' not in room_type):
+        kinds.add('computer lab')
+    return frozenset(kinds)
+
+
+def catalog_key(all_rooms):
+    """Stable hash of the room fields eligibility depends on."""
+    catalog = [
+        [room_id, _to_int(room.get('capacity', 0)), room.get('type') or '', sorted(room.get('equipment', []) or [])]
+        for room_id, room in all_rooms.items()
+    ]
+    return hashlib.sha1(json.dumps(catalog, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class RoomCatalog:
+    """Parsed room attributes plus memoized eligibility queries for one catalog."""
+
+    def __init__(self, all_rooms):
+        self.room_ids = list(all_rooms)
+        self.capacity = {r_id: _to_int(room.get('capacity', 0)) for r_id, room in all_rooms.items()}
+        self.equipment = {r_id: frozenset(room.get('equipment', []) or []) for r_id, room in all_rooms.items()}
+        self.kinds = {r_id: room_kinds(room) for r_id, room in all_rooms.items()}
+        self._queries = {}
+        self._lock = threading.Lock()
+
+    def eligible(self, kind, group_size, equipment):
+        """Room ids of `kind` with capacity >= group_size and all of `equipment`, in catalog order."""
+        key = (kind, group_size, equipment)
+        with self._lock:
+            rooms = self._queries.get(key)
+        if rooms is None:
+            rooms = tuple(
+                r_id for r_id in self.room_ids
+                if kind in self.kinds[r_id]
+                and self.capacity[r_id] >= group_size
+                and equipment <= self.equipment[r_id]
+            )
+            with self._lock:
+                self._queries[key] = rooms
+        return rooms
+
+
+def get_catalog(all_rooms):
+    """The memoized RoomCatalog for these rooms, building it on first use."""
+    key = catalog_key(all_rooms)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is not None:
+            _catalogs.move_to_end(key)
+            return catalog
+    catalog = RoomCatalog(all_rooms)
+    with _catalogs_lock:
+        _catalogs[key] = catalog
+        while len(_catalogs) > MAX_CACHED_CATALOGS:
+            _catalogs.popitem(last=False)
+    return catalog
+
+
+def clear_cache():
+    with _catalogs_lock:
+        _catalogs.clear()
+
+
+def _session_kind(session_type, course):
+    if session_type == 'lecture':
+        return 'lecture'
+    if course.get('labType', 'Computer Lab') == 'Hardware Lab':
+        return 'hardware lab'
+    return 'computer lab'
+
+
+def compute_room_eligibility(all_rooms, all_student_groups, all_courses, lecture_cohorts=None, check_capacity=True):
+    """
+    {(sg_id, c_id, session_type): (room_id, ...)} for every enrolled course,
+    session_type being 'lecture' or 'lab', plus {(cohort_id, c_id, 'lecture'): ...}
+    for shared lectures. Computed once per request. With check_capacity=False
+    rooms of any size are eligible (relaxed mode, see relaxation.py).
+    """
+    catalog = get_catalog(all_rooms)
+    eligibility = {}
+    for sg_id, group in all_student_groups.items():
+        group_size = _to_int(group.get('size', 0)) if check_capacity else 0
+        lab_room_prefs = group.get('labRoomPreferences', {}) or {}
+        for c_id in group.get('enrolledCourses', []):
+            course = all_courses.get(c_id)
+            if not course: continue
+            equipment = frozenset(course.get('equipment', []) or [])
+            for session_type in ('lecture', 'lab'):
+                rooms = catalog.eligible(_session_kind(session_type, course), group_size, equipment)
+                preferred_room_id = lab_room_prefs.get(c_id) if session_type == 'lab' else None
+                if preferred_room_id:
+                    rooms = tuple(r_id for r_id in rooms if r_id == preferred_room_id)
+                eligibility[(sg_id, c_id, session_type)] = rooms
+
+    for (sg_id, c_id), members in (lecture_cohorts or {}).items():
+        if sg_id != members[0]: continue
+        equipment = frozenset(all_courses[c_id].get('equipment', []) or [])
+        group_size = cohort_size(all_student_groups, members) if check_capacity else 0
+        eligibility[(cohort_id(members), c_id, 'lecture')] = catalog.eligible('lecture', group_size, equipment)
+    return eligibility
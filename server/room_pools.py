@@ -0,0 +1,114 @@
+"""
+Room pools (`settings.roomPools`): interchangeable rooms share one model
+coordinate.
+
+Rooms with the same session kinds, capacity, equipment and availability are
+grouped into a pool. Rooms named in a group's `labRoomPreferences` (a hard
+constraint) always stay alone. The model picks a pool per session and only
+enforces "sessions in the pool per slot <= pool size"; concrete rooms are
+matched after solving by assign_rooms(), which keeps both halves of a lab in
+the same room and honours `preferredRoomId` where the room is still free.
+
+Without pooling every room is its own pool, so the model is unchanged.
+"""
+from collections import OrderedDict
+
+from room_eligibility import get_catalog
+
+
+def single_room_pools(all_rooms):
+    return OrderedDict((room_id, [room_id]) for room_id in all_rooms)
+
+
+def pinned_rooms(all_student_groups):
+    """Rooms that are a hard lab room preference somewhere."""
+    pinned = set()
+    for group in all_student_groups.values():
+        pinned.update(r_id for r_id in (group.get('labRoomPreferences', {}) or {}).values() if r_id)
+    return pinned
+
+
+def build_room_pools(all_rooms, avail, all_days, pinned=()):
+    """
+    OrderedDict {pool_id: [room_id, ...]} in catalog order. Single rooms keep
+    their id as pool id; larger pools are named 'pool_<first room id>'.
+    """
+    catalog = get_catalog(all_rooms)
+    members = OrderedDict()
+    for room_id in all_rooms:
+        if room_id in pinned:
+            signature = ('pinned', room_id)
+        else:
+            signature = (
+                catalog.kinds[room_id],
+                catalog.capacity[room_id],
+                catalog.equipment[room_id],
+                tuple(avail['rooms'][room_id][day] for day in all_days),
+            )
+        members.setdefault(signature, []).append(room_id)
+
+    pools = OrderedDict()
+    for room_ids in members.values():
+        pool_id = room_ids[0] if len(room_ids) == 1 else f'pool_{room_ids[0]}'
+        pools[pool_id] = room_ids
+    return pools
+
+
+def pool_eligibility(room_eligibility, pools):
+    """Maps the eligible rooms of every room_eligibility entry to eligible pools."""
+    pool_of = {room_id: pool_id for pool_id, room_ids in pools.items() for room_id in room_ids}
+    result = {}
+    for key, room_ids in room_eligibility.items():
+        result[key] = tuple(OrderedDict.fromkeys(pool_of[room_id] for room_id in room_ids))
+    return result
+
+
+def _lab_partner(task_id):
+    """'G1_C1_lab_3' -> 'G1_C1_lab_2', the first half of a lab pair."""
+    prefix, index = task_id.rsplit('_', 1)
+    return f'{prefix}_{int(index) - 1}'
+
+
+def assign_rooms(placements, pools, tasks, all_student_groups, all_days, all_timeslots):
+    """
+    Picks a concrete room for every placed session.
+    `placements` is a list of (task_id, pool_id, day, timeslot); returns {task_id: room_id}.
+    Per pool and slot, second halves of labs take the room of their first
+    half, then sessions whose group prefers a free room in the pool get it,
+    then the rest take the remaining rooms in catalog order.
+    """
+    day_index = {d: i for i, d in enumerate(all_days)}
+    ts_index = {ts: i for i, ts in enumerate(all_timeslots)}
+    by_slot = OrderedDict()
+    for task_id, pool_id, day, timeslot in sorted(
+            placements, key=lambda p: (day_index.get(p[2], 0), ts_index.get(p[3], 0), p[0])):
+        by_slot.setdefault((pool_id, day, timeslot), []).append(task_id)
+
+    room_of = {}
+    for (pool_id, day, timeslot), task_ids in by_slot.items():
+        free = list(pools[pool_id])
+        pending = []
+        for task_id in task_ids:
+            task_info = tasks[task_id]
+            partner_room = None
+            if task_info.get('lab_role') == 'second':
+                partner_room = room_of.get(_lab_partner(task_id))
+            if partner_room in free:
+                room_of[task_id] = partner_room
+                free.remove(partner_room)
+            else:
+                pending.append(task_id)
+
+        remaining = []
+        for task_id in pending:
+            preferred = [all_student_groups[sg_id].get('preferredRoomId') for sg_id in tasks[task_id]['group_ids']]
+            room_id = next((r_id for r_id in preferred if r_id in free), None)
+            if room_id is None:
+                remaining.append(task_id)
+                continue
+            room_of[task_id] = room_id
+            free.remove(room_id)
+
+        for task_id in remaining:
+            room_of[task_id] = free.pop(0)
+    return room_of
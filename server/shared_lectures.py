@@ -0,0 +1,56 @@
+"""
+Combined lectures: student groups that attend a course's lectures together.
+
+Courses list the groups that share their lectures:
+    {"id": "MA101", ..., "sharedLectureGroups": [["SEM1A", "SEM1B", "SEM1C"]]}
+
+Each cohort (its enrolled members, at least two) gets one joint lecture task
+per lecture hour instead of one per group. The joint task needs a room for
+the combined size and blocks every member group. Labs stay per group.
+"""
+
+
+def _to_int(value, default=0):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def cohort_id(members):
+    """Owner id used in joint task ids, e.g. 'SEM1A+SEM1B' (validation rejects group ids with a '+')."""
+    return '+'.join(members)
+
+
+def compute_lecture_cohorts(all_student_groups, all_courses):
+    """
+    {(sg_id, c_id): (member sg_id, ...)} for every group sharing a course's
+    lectures. Groups that attend alone are not listed. A group listed in
+    several cohorts of one course stays in the first.
+    """
+    cohorts = {}
+    for c_id, course in all_courses.items():
+        for listed in course.get('sharedLectureGroups', []) or []:
+            members = []
+            for sg_id in listed or []:
+                group = all_student_groups.get(sg_id)
+                if not group or c_id not in group.get('enrolledCourses', []):
+                    continue
+                if (sg_id, c_id) in cohorts or sg_id in members:
+                    continue
+                members.append(sg_id)
+            if len(members) < 2:
+                continue
+            members = tuple(members)
+            for sg_id in members:
+                cohorts[(sg_id, c_id)] = members
+    return cohorts
+
+
+def lecture_members(lecture_cohorts, sg_id, c_id):
+    """The groups attending (sg_id, c_id) lectures together, (sg_id,) when alone."""
+    return lecture_cohorts.get((sg_id, c_id), (sg_id,))
+
+
+def cohort_size(all_student_groups, members):
+    return sum(_to_int(all_student_groups[sg_id].get('size', 0)) for sg_id in members)
@@ -0,0 +1,196 @@
+import threading
+import time
+
+from ortools.sat.python import cp_model
+
+from tracing import NULL_TRACE
+
+DEFAULT_TIME_LIMIT_SECONDS = 120.0
+MAX_TIME_LIMIT_SECONDS = 600.0
+
+# How often the watchdog thread checks for cancellation / stagnation
+WATCHDOG_INTERVAL_SECONDS = 0.1
+
+
+class SolveCancelled(Exception):
+    """Raised at a build checkpoint when the client cancelled the request."""
+    def __init__(self, phase):
+        super().__init__(f"Request cancelled during {phase}")
+        self.phase = phase
+
+
+class DeadlineExceeded(Exception):
+    """Raised at a build checkpoint when the request deadline has already passed."""
+    def __init__(self, phase):
+        super().__init__(f"Deadline exceeded during {phase}")
+        self.phase = phase
+
+
+class StagnationCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Records when the objective last improved, so the watchdog can stop
+    the search once no progress has been made for a while.
+    """
+    def __init__(self, trace=NULL_TRACE):
+        super().__init__()
+        self.trace = trace
+        self.best_objective = None
+        self.last_improvement = time.monotonic()
+        self.solution_count = 0
+
+    def on_solution_callback(self):
+        self.solution_count += 1
+        objective = self.ObjectiveValue()
+        self.trace.instant('solution', number=self.solution_count, objective=objective,
+                           bound=self.BestObjectiveBound())
+        self.trace.counter('objective', objective=objective)
+        if self.best_objective is None or objective < self.best_objective:
+            self.best_objective = objective
+            self.last_improvement = time.monotonic()
+
+
+class SolveControl:
+    """
+    Per-request deadline, cancellation token and stagnation criterion.
+    The deadline is counted from when the request was received, so time
+    spent on validation and model building is taken out of the solve budget.
+    """
+    def __init__(self, request_id=None, time_limit=DEFAULT_TIME_LIMIT_SECONDS, stagnation_seconds=None,
+                 num_workers=None):
+        self.request_id = request_id
+        self.started = time.monotonic()
+        self.time_limit = min(float(time_limit), MAX_TIME_LIMIT_SECONDS)
+        self.deadline = self.started + self.time_limit
+        self.stagnation_seconds = float(stagnation_seconds) if stagnation_seconds else None
+        # CP-SAT search workers; None keeps the solver default (one per core)
+        self.num_workers = num_workers
+        self.cancel_event = threading.Event()
+        self.stop_reason = None
+        # Request timeline (see tracing.py); solves and solutions are recorded into it
+        self.trace = NULL_TRACE
+
+    @classmethod
+    def from_request(cls, data, settings):
+        """
+        Reads `request_id` (top level) and `timeLimitSeconds` /
+        `stagnationSeconds` / `solverWorkers` (settings). Invalid values
+        fall back to defaults.
+        """
+        try:
+            time_limit = float(settings.get('timeLimitSeconds', DEFAULT_TIME_LIMIT_SECONDS))
+            if time_limit <= 0:
+                time_limit = DEFAULT_TIME_LIMIT_SECONDS
+        except (ValueError, TypeError):
+            time_limit = DEFAULT_TIME_LIMIT_SECONDS
+
+        try:
+            stagnation = settings.get('stagnationSeconds')
+            stagnation = float(stagnation) if stagnation is not None else None
+            if stagnation is not None and stagnation <= 0:
+                stagnation = None
+        except (ValueError, TypeError):
+            stagnation = None
+
+        try:
+            num_workers = settings.get('solverWorkers')
+            num_workers = int(num_workers) if num_workers is not None else None
+            if num_workers is not None and num_workers <= 0:
+                num_workers = None
+        except (ValueError, TypeError):
+            num_workers = None
+
+        return cls(request_id=data.get('request_id'), time_limit=time_limit, stagnation_seconds=stagnation,
+                   num_workers=num_workers)
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def checkpoint(self, phase):
+        """Called between build phases; aborts the request if needed."""
+        if self.cancelled:
+            raise SolveCancelled(phase)
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(phase)
+
+    def solve(self, solver, model, time_limit=None, soft_time_limit=None):
+        """
+        Runs `solver` on `model` with the remaining time budget (or
+        `time_limit` seconds if that is shorter). A watchdog
+        thread calls StopSearch on cancellation, when the objective has not
+        improved for `stagnation_seconds`, or after `soft_time_limit` seconds
+        once a solution has been found.
+        """
+        budget = self.remaining() if time_limit is None else min(self.remaining(), time_limit)
+        solver.parameters.max_time_in_seconds = max(budget, 0.01)
+        if self.num_workers:
+            solver.parameters.num_workers = self.num_workers
+        callback = StagnationCallback(self.trace)
+        done = threading.Event()
+        started = time.monotonic()
+
+        def watchdog():
+            while not done.wait(WATCHDOG_INTERVAL_SECONDS):
+                if self.cancelled:
+                    self.stop_reason = 'cancelled'
+                    solver.StopSearch()
+                    return
+                if self.stagnation_seconds and callback.solution_count > 0:
+                    if time.monotonic() - callback.last_improvement >= self.stagnation_seconds:
+                        self.stop_reason = 'stagnation'
+                        solver.StopSearch()
+                        return
+                if soft_time_limit is not None and callback.solution_count > 0:
+                    if time.monotonic() - started >= soft_time_limit:
+                        self.stop_reason = 'soft_limit'
+                        solver.StopSearch()
+                        return
+
+        watcher = threading.Thread(target=watchdog, daemon=True)
+        watcher.start()
+        try:
+            with self.trace.span('CP-SAT solve', budget=round(budget, 3), variables=len(model.Proto().variables),
+                                 constraints=len(model.Proto().constraints)):
+                status = solver.Solve(model, callback)
+        finally:
+            done.set()
+            watcher.join()
+        return status
+
+
+# --- ACTIVE REQUEST REGISTRY ---
+# Maps request_id -> SolveControl so that /cancel/<request_id> can reach a running solve.
+_active_controls = {}
+_active_lock = threading.Lock()
+
+
+def register(control):
+    if control.request_id:
+        with _active_lock:
+            _active_controls[control.request_id] = control
+
+
+def unregister(control):
+    if control.request_id:
+        with _active_lock:
+            if _active_controls.get(control.request_id) is control:
+                del _active_controls[control.request_id]
+
+
+def cancel(request_id):
+    """Signals the request with this id. Returns False if it is not running."""
+    with _active_lock:
+        control = _active_controls.get(request_id)
+    if control is None:
+        return False
+    control.cancel()
+    return True
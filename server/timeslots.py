@@ -0,0 +1,34 @@
+from datetime import datetime
+
+def parse_timeslot(ts_str):
+    """
+    Parses a timeslot string like "08:30 AM - 09:30 AM"
+    Returns (start_minutes, end_minutes) from midnight.
+    """
+    try:
+        parts = ts_str.split('-')
+        if len(parts) != 2:
+            return 0, 0
+
+        start_str = parts[0].strip()
+        end_str = parts[1].strip()
+
+        fmt = "%I:%M %p"
+        start_dt = datetime.strptime(start_str, fmt)
+        end_dt = datetime.strptime(end_str, fmt)
+
+        start_min = start_dt.hour * 60 + start_dt.minute
+        end_min = end_dt.hour * 60 + end_dt.minute
+
+        return start_min, end_min
+    except Exception as e:
+        print(f"Error parsing timeslot '{ts_str}': {e}")
+        return 0, 0
+
+
+def timeslot_gaps(ts_parsed):
+    """
+    Gaps in minutes between adjacent slots i and i+1:
+    gaps[i] = start[i+1] - end[i]
+    """
+    return [ts_parsed[i + 1][0] - ts_parsed[i][1] for i in range(len(ts_parsed) - 1)]
@@ -0,0 +1,154 @@
+"""
+Per-request timelines in Chrome trace-event format.
+
+Every /generate-timetable request records its phases into a Trace: parsing,
+each validation check, variable creation, each numbered constraint family,
+objectives, every CP-SAT solve (with an instant event and an objective
+counter sample per solution found) and response serialization. Recording
+is a few list appends per phase, so it always runs; the file is only
+written when the request sends `X-Timely-Trace: 1` or sets
+`settings.trace = true` (the view sets `g.trace_requested`). It goes to TIMELY_TRACE_DIR (default
+server/traces) as <trace id>.trace.json, and the response carries the id
+in X-Trace-ID. Open it in https://ui.perfetto.dev or chrome://tracing;
+both load the file locally.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import current_app, g, make_response, request
+
+DEFAULT_TRACE_DIR = os.environ.get('TIMELY_TRACE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'traces'))
+
+
+class Trace:
+    def __init__(self, name='request'):
+        self.name = name
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self.events = []
+        self._threads = {}
+        # Open step() spans per thread, outermost level first
+        self._steps = {}
+
+    def _now(self):
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _event(self, ph, name, args=None, **fields):
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        event = {'name': name, 'ph': ph, 'ts': self._now(), 'pid': self.pid, 'tid': tid}
+        if args:
+            event['args'] = args
+        event.update(fields)
+        self.events.append(event)
+
+    def begin(self, name, **args):
+        self._event('B', name, args)
+
+    def end(self):
+        self._event('E', '')
+
+    @contextmanager
+    def span(self, name, **args):
+        self.begin(name, **args)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def step(self, name=None, level=0, **args):
+        """
+        Ends the steps this thread has open at `level` and deeper, then
+        begins `name` (if given) at `level`. Sequential phases can be
+        marked without wrapping each one in a span.
+        """
+        open_steps = self._steps.setdefault(threading.get_ident(), [])
+        while len(open_steps) > level:
+            open_steps.pop()
+            self.end()
+        if name is not None:
+            open_steps.append(name)
+            self.begin(name, **args)
+
+    def instant(self, name, **args):
+        self._event('i', name, args, s='t')
+
+    def counter(self, name, **values):
+        self._event('C', name, values)
+
+    def to_json(self):
+        # Close spans left open by an early return or an exception
+        depth = {}
+        for event in self.events:
+            if event['ph'] in ('B', 'E'):
+                depth[event['tid']] = depth.get(event['tid'], 0) + (1 if event['ph'] == 'B' else -1)
+        events = list(self.events)
+        for tid, open_spans in depth.items():
+            events.extend({'name': '', 'ph': 'E', 'ts': self._now(), 'pid': self.pid, 'tid': tid}
+                          for _ in range(open_spans))
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0, 'args': {'name': self.name}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                     for tid, name in self._threads.items()]
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def write(self, directory):
+        """Writes the trace file; returns its id."""
+        trace_id = uuid.uuid4().hex[:12]
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'{trace_id}.trace.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, separators=(',', ':'))
+        return trace_id
+
+
+class NullTrace:
+    """Trace interface that records nothing, for callers outside a request."""
+    def begin(self, name, **args):
+        pass
+
+    def end(self):
+        pass
+
+    @contextmanager
+    def span(self, name, **args):
+        yield
+
+    def step(self, name=None, level=0, **args):
+        pass
+
+    def instant(self, name, **args):
+        pass
+
+    def counter(self, name, **values):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+def traced(view):
+    """
+    Decorator: gives `view` a Trace in `g.trace` and writes it when the
+    request asked for it.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.trace = Trace(f'{request.method} {request.path}')
+        g.trace_requested = request.headers.get('X-Timely-Trace') == '1'
+        result = view(*args, **kwargs)
+        if not g.trace_requested:
+            return result
+        try:
+            trace_id = g.trace.write(current_app.config['TRACE_DIR'])
+        except OSError as e:
+            print(f"DEBUG: Could not write trace: {e}")
+            return result
+        response = make_response(result)
+        response.headers['X-Trace-ID'] = trace_id
+        return response
+    return wrapper
@@ -0,0 +1,380 @@
+"""
+Cheap pre-checks run before any model is built.
+
+Every check appends to a list of problems instead of stopping at the first
+one, so /validate can report everything in one round trip while
+/generate-timetable keeps returning the first problem as its message.
+"""
+import numpy as np
+from ortools.graph.python import max_flow
+
+from availability import build_availability, intersect, pairs, popcount, session_slots, total_slots, union
+from lab_preferences import compute_lab_masks, mask_indexes
+from room_eligibility import compute_room_eligibility
+from shared_lectures import cohort_id, compute_lecture_cohorts, lecture_members
+from timeslots import parse_timeslot, timeslot_gaps
+from tracing import NULL_TRACE
+
+
+def _noop(msg):
+    pass
+
+
+def _to_int(value, default=0):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def _problem(check, message, group_id=None, course_id=None, **details):
+    problem = {'check': check, 'message': message}
+    if group_id is not None:
+        problem['groupId'] = group_id
+    if course_id is not None:
+        problem['courseId'] = course_id
+    problem.update(details)
+    return problem
+
+
+def _course_instructors(group, c_id, course, all_instructors):
+    """The preferred instructor if the group has one, otherwise every qualified instructor."""
+    instructor_id = group.get('instructorPreferences', {}).get(c_id)
+    if instructor_id:
+        candidates = [all_instructors.get(instructor_id)]
+    else:
+        candidates = [all_instructors.get(qid) for qid in course.get('qualifiedInstructors', [])]
+    return [i for i in candidates if i]
+
+
+def check_group_hours(group, all_courses, group_masks, log=_noop):
+    """1. Student Group has enough available slots for its requirements."""
+    total_required_hours = 0
+    for c_id in group.get('enrolledCourses', []):
+        course = all_courses.get(c_id)
+        if not course: continue
+        total_required_hours += _to_int(course.get('lectureHours', 0))
+        total_required_hours += _to_int(course.get('labHours', 0))
+
+    total_available_slots = total_slots(group_masks)
+
+    log(f"Group {group.get('id')} - Required: {total_required_hours}, Available: {total_available_slots}")
+
+    if total_required_hours > total_available_slots:
+        msg = f"Scheduling Failed: Student Group '{group.get('id')}' requires {total_required_hours} hours, but only has {total_available_slots} available slots. Please increase availability or reduce course load."
+        return [_problem('group_hours', msg, group.get('id'),
+                         required=total_required_hours, available=total_available_slots)]
+    return []
+
+
+def valid_lab_start_mask(masks, ts_parsed, settings):
+    """
+    Start slots of 2-slot labs from the precomputed (group, course) mask,
+    minus 8:30 AM starts when the disallow830Labs setting is on.
+    """
+    start_mask = masks['pair']
+    if settings.get('disallow830Labs', False):
+        # 8:30 AM is 510 minutes from midnight
+        for t_idx, (start_min, _) in enumerate(ts_parsed):
+            if start_min == 510:
+                start_mask &= ~(1 << t_idx)
+    return start_mask
+
+
+def check_labs(group, all_courses, all_instructors, all_days, ts_parsed, lab_masks, avail, settings, log=_noop):
+    """
+    1.1 Impossible Lab Constraints: every lab needs consecutive slots where
+    both the group and one of its instructors are available.
+    """
+    problems = []
+    group_masks = avail['groups'][group.get('id')]
+
+    for c_id in group.get('enrolledCourses', []):
+        course = all_courses.get(c_id)
+        if not course: continue
+        lab_hours = _to_int(course.get('labHours', 0))
+
+        # Labs need at least 2 consecutive hours
+        if lab_hours < 2:
+            continue
+
+        masks = lab_masks[(group.get('id'), c_id)]
+        is_afternoon = masks['is_afternoon']
+        start_mask = valid_lab_start_mask(masks, ts_parsed, settings)
+
+        if not start_mask:
+            msg = f"Scheduling Failed: Course '{course.get('name', c_id)}' requires a {lab_hours}-hour lab ({masks['label']}), but no consecutive slots exist starting at the preferred time (check breaks or timeslots)."
+            log(msg)
+            problems.append(_problem('lab_slots', msg, group.get('id'), c_id))
+            continue
+
+        instructors_to_check = _course_instructors(group, c_id, course, all_instructors)
+        if not instructors_to_check:
+            log(f"Warning: No valid instructors found for {c_id}")
+            continue
+
+        # Needs ONE valid start where an instructor and the group are free for BOTH hours:
+        # start_mask & pairs(group & instructor) != 0 on some day
+        can_schedule = any(
+            start_mask & pairs(group_masks[day] & avail['instructors'][inst['id']][day])
+            for inst in instructors_to_check
+            for day in all_days
+        )
+
+        if not can_schedule:
+            inst_names = ", ".join([i.get('name', i.get('id')) for i in instructors_to_check])
+            msg = f"Scheduling Failed: Course '{course.get('name', c_id)}' ({group.get('id')}) requires a Lab{' (Afternoon)' if is_afternoon else ''}, but no assigned instructor ({inst_names}) is available for 2 consecutive slots where the group is also available."
+            log(msg)
+            log(f"Validation Detail: {c_id}, Group {group.get('id')}, Insts: {inst_names}")
+            log(f"Valid Lab Starts: {mask_indexes(start_mask)}")
+            problems.append(_problem('lab_instructor', msg, group.get('id'), c_id))
+
+    return problems
+
+
+def check_course_overlap(group, all_courses, all_instructors, all_days, avail, log=_noop):
+    """
+    1.2 Per-Course Instructor-Group Availability Overlap: each course needs
+    enough slots where both the group and any of its instructors are available.
+    """
+    problems = []
+    group_masks = avail['groups'][group.get('id')]
+
+    for c_id in group.get('enrolledCourses', []):
+        course = all_courses.get(c_id)
+        if not course: continue
+
+        req_hours = _to_int(course.get('lectureHours', 0)) + _to_int(course.get('labHours', 0))
+        if req_hours == 0: continue
+
+        check_instructors = _course_instructors(group, c_id, course, all_instructors)
+        if not check_instructors: continue
+
+        # If ANY instructor is available at (day, slot), and the group is available, it counts.
+        overlap_count = 0
+        for day in all_days:
+            inst_union = union(avail['instructors'][inst['id']][day] for inst in check_instructors)
+            overlap_count += popcount(group_masks[day] & inst_union)
+
+        log(f"Course {c_id} ({course.get('name', c_id)}) Overlap: {overlap_count}, Required: {req_hours}")
+
+        if overlap_count < req_hours:
+            msg = f"Scheduling Failed: Course '{course.get('name', c_id)}' requires {req_hours} hours. Based on Student Group '{group.get('id')}' availability and Instructor availability, only {overlap_count} valid slots exist. Please increase availability."
+            problems.append(_problem('course_overlap', msg, group.get('id'), c_id,
+                                     required=req_hours, available=overlap_count))
+    return problems
+
+
+def check_cohort_ids(all_student_groups, lecture_cohorts):
+    """Joint lecture owners join member ids with '+', so no group id may contain one once lectures are shared."""
+    if not lecture_cohorts:
+        return []
+    problems = []
+    for sg_id in all_student_groups:
+        if '+' in str(sg_id):
+            msg = f"Scheduling Failed: Student Group '{sg_id}' has a '+' in its id, which is reserved for shared lectures. Please rename the group."
+            problems.append(_problem('cohort_id', msg, sg_id))
+    return problems
+
+
+def check_room_capacity(all_student_groups, all_courses, avail, lecture_cohorts=None, log=_noop):
+    """2. Global Room Capacity vs Total Requirements (shared lectures count once)."""
+    total_global_required_hours = 0
+    for group in all_student_groups.values():
+        for c_id in group.get('enrolledCourses', []):
+            course = all_courses.get(c_id)
+            if not course: continue
+            if lecture_members(lecture_cohorts or {}, group.get('id'), c_id)[0] == group.get('id'):
+                total_global_required_hours += _to_int(course.get('lectureHours', 0))
+            total_global_required_hours += _to_int(course.get('labHours', 0))
+
+    total_global_room_slots = sum(total_slots(day_masks) for day_masks in avail['rooms'].values())
+
+    log(f"Global Check - Required: {total_global_required_hours}, Room Capacity: {total_global_room_slots}")
+
+    if total_global_required_hours > total_global_room_slots:
+        msg = f"Scheduling Failed: Total class hours required ({total_global_required_hours}) exceed the total capacity of all rooms ({total_global_room_slots}). Please add more rooms or extend working hours."
+        return [_problem('room_capacity', msg, required=total_global_required_hours, available=total_global_room_slots)]
+    return []
+
+
+def _session_demands(all_student_groups, all_courses, lecture_cohorts, lab_masks, avail, all_days):
+    """
+    Required session-hours per (group or cohort, course, session kind):
+    lectures once per cohort, lab pair halves and leftover single lab hours
+    separately since they may use different slots.
+    """
+    demands = []
+    for sg_id, group in all_student_groups.items():
+        for c_id in group.get('enrolledCourses', []):
+            course = all_courses.get(c_id)
+            if not course: continue
+            lec_hours = _to_int(course.get('lectureHours', 0))
+            lab_hours = _to_int(course.get('labHours', 0))
+            members = lecture_members(lecture_cohorts, sg_id, c_id)
+            sessions = []
+            if lec_hours > 0 and members[0] == sg_id:
+                # At most one lecture of a course per day
+                sessions.append(('lecture', None, lec_hours, 1 if lec_hours > 1 else lec_hours))
+            if lab_hours > 0:
+                for role, hours in (('first', lab_hours // 2), ('second', lab_hours // 2), ('single', lab_hours % 2)):
+                    if hours:
+                        sessions.append(('lab', role, hours, hours))
+            if not sessions:
+                continue
+            # The instructor preference of the first member that has one (as the model does)
+            preferred = next((all_student_groups[m].get('instructorPreferences', {}).get(c_id) for m in members
+                              if all_student_groups[m].get('instructorPreferences', {}).get(c_id)), None)
+            for session_type, role, hours, per_day in sessions:
+                group_ids = members if session_type == 'lecture' else (sg_id,)
+                owner_id = cohort_id(group_ids) if len(group_ids) > 1 else sg_id
+                demands.append({
+                    'group_id': owner_id,
+                    'course_id': c_id,
+                    'type': session_type,
+                    'role': role,
+                    'hours': hours,
+                    'per_day': per_day,
+                    'group_masks': intersect([avail['groups'][m] for m in group_ids], all_days),
+                    'lab_mask': lab_masks[(sg_id, c_id)] if session_type == 'lab' else None,
+                    'instructors': [preferred] if preferred else list(course.get('qualifiedInstructors', [])),
+                })
+    return demands
+
+
+def _max_flow_cut(demands, resources_of, resource_masks, all_days, capacity_of=None):
+    """
+    Routes every demand's hours through (demand, day) nodes to the
+    (resource, day, slot) nodes it may use, each taking one session.
+    Returns (required hours, routed hours, demands and resources on the
+    source side of the min cut).
+    """
+    tails, heads, caps = [], [], []
+    slot_nodes = {}
+    node_count = 2  # 0 = source, 1 = sink
+    demand_nodes = []
+    for demand in demands:
+        demand_node = node_count
+        node_count += 1
+        demand_nodes.append(demand_node)
+        tails.append(0); heads.append(demand_node); caps.append(demand['hours'])
+        for day in all_days:
+            day_node = node_count
+            node_count += 1
+            tails.append(demand_node); heads.append(day_node); caps.append(demand['per_day'])
+            for res_id in resources_of(demand):
+                free = session_slots(demand['group_masks'][day] & resource_masks[res_id][day],
+                                     demand['role'], demand['lab_mask'])
+                for t_idx in mask_indexes(free):
+                    key = (res_id, day, t_idx)
+                    if key not in slot_nodes:
+                        slot_nodes[key] = node_count
+                        node_count += 1
+                        tails.append(node_count - 1); heads.append(1)
+                        caps.append(capacity_of(res_id) if capacity_of else 1)
+                    tails.append(day_node); heads.append(slot_nodes[key]); caps.append(1)
+
+    flow = max_flow.SimpleMaxFlow()
+    flow.add_arcs_with_capacity(np.array(tails, dtype=np.int64), np.array(heads, dtype=np.int64),
+                                np.array(caps, dtype=np.int64))
+    required = sum(demand['hours'] for demand in demands)
+    if flow.solve(0, 1) != flow.OPTIMAL:
+        return required, required, [], []
+    source_side = set(flow.get_source_side_min_cut())
+    cut_demands = [demand for demand, node in zip(demands, demand_nodes) if node in source_side]
+    cut_resources = list(dict.fromkeys(res_id for (res_id, _, _), node in slot_nodes.items() if node in source_side))
+    return required, flow.optimal_flow(), cut_demands, cut_resources
+
+
+def _load_message(kind, names, demands, required, routed, all_courses):
+    courses = list(dict.fromkeys(demand['course_id'] for demand in demands))
+    course_names = ", ".join(f"'{all_courses[c_id].get('name', c_id)}'" for c_id in courses)
+    msg = (f"Scheduling Failed: {kind} {', '.join(names)} cannot cover the courses competing for them "
+           f"({course_names}): {required - routed} required session-hour(s) do not fit into their free slots. "
+           f"Please add availability or qualified {kind.lower()}.")
+    return msg, courses
+
+
+def check_resource_load(all_student_groups, all_courses, all_instructors, all_days, lab_masks, avail,
+                        room_eligibility, lecture_cohorts=None, log=_noop):
+    """
+    3. Instructor and room load as a max flow: required session-hours are
+    routed to free (instructor, day, slot) and (eligible room, day, slot)
+    pairs where the groups are free too (labs only at allowed starts, one
+    lecture of a course per day). Catches courses competing for the same
+    instructors or rooms, which the per-course counts above miss. The
+    source side of the min cut names the saturated instructors or rooms.
+    """
+    problems = []
+    demands = _session_demands(all_student_groups, all_courses, lecture_cohorts or {}, lab_masks, avail, all_days)
+
+    # Sessions that may go to an instructor missing from the request are not limited by anyone
+    inst_demands = [d for d in demands if d['instructors'] and all(i in all_instructors for i in d['instructors'])]
+    required, routed, cut_demands, cut_instructors = _max_flow_cut(
+        inst_demands, lambda d: d['instructors'], avail['instructors'], all_days)
+    log(f"Instructor Load - Required: {required}, Placeable: {routed}")
+    if routed < required:
+        names = [f"'{all_instructors[i].get('name', i)}'" for i in cut_instructors]
+        msg, courses = _load_message('Instructors', names, cut_demands, required, routed, all_courses)
+        problems.append(_problem('instructor_load', msg, instructors=cut_instructors, courses=courses,
+                                 required=required, available=routed))
+
+    room_demands = [d for d in demands if room_eligibility.get((d['group_id'], d['course_id'], d['type']))]
+    required, routed, cut_demands, cut_rooms = _max_flow_cut(
+        room_demands, lambda d: room_eligibility[(d['group_id'], d['course_id'], d['type'])],
+        avail['rooms'], all_days)
+    log(f"Room Load - Required: {required}, Placeable: {routed}")
+    if routed < required:
+        names = [f"'{r_id}'" for r_id in cut_rooms]
+        msg, courses = _load_message('Rooms', names, cut_demands, required, routed, all_courses)
+        problems.append(_problem('room_load', msg, rooms=cut_rooms, courses=courses,
+                                 required=required, available=routed))
+    return problems
+
+
+def collect_problems(data, log=_noop, lab_masks=None, avail=None, room_eligibility=None, trace=NULL_TRACE):
+    """
+    Runs every pre-check on a /generate-timetable payload and returns all
+    violations in the order generate_timetable used to report them.
+    `lab_masks`, `avail` (availability bitmasks) and `room_eligibility`
+    can be passed in when the caller already computed them. The max-flow
+    load check only runs when the count checks found nothing. Each check
+    is a span of `trace`.
+    """
+    all_instructors = {i['id']: i for i in data.get('instructors', [])}
+    all_courses = {c['id']: c for c in data.get('courses', [])}
+    all_rooms = {r['id']: r for r in data.get('rooms', [])}
+    all_student_groups = {sg['id']: sg for sg in data.get('student_groups', [])}
+    all_days = data.get('days', [])
+    all_timeslots = data.get('timeslots', [])
+    settings = data.get('settings', {})
+
+    ts_parsed = [parse_timeslot(ts) for ts in all_timeslots]
+    ts_gaps = timeslot_gaps(ts_parsed)
+    if lab_masks is None:
+        lab_masks = compute_lab_masks(all_student_groups, all_courses, ts_parsed, ts_gaps)
+    if avail is None:
+        avail = build_availability(all_instructors, all_rooms, all_student_groups, all_days, all_timeslots)
+
+    problems = []
+    with trace.span('shared lectures'):
+        lecture_cohorts = compute_lecture_cohorts(all_student_groups, all_courses)
+        problems.extend(check_cohort_ids(all_student_groups, lecture_cohorts))
+    for group in all_student_groups.values():
+        with trace.span('group hours', group=group['id']):
+            problems.extend(check_group_hours(group, all_courses, avail['groups'][group['id']], log))
+        with trace.span('lab slots', group=group['id']):
+            problems.extend(check_labs(group, all_courses, all_instructors, all_days, ts_parsed, lab_masks, avail, settings, log))
+        with trace.span('course overlap', group=group['id']):
+            problems.extend(check_course_overlap(group, all_courses, all_instructors, all_days, avail, log))
+
+    with trace.span('room capacity'):
+        problems.extend(check_room_capacity(all_student_groups, all_courses, avail, lecture_cohorts, log))
+
+    if not problems:
+        with trace.span('resource load'):
+            if room_eligibility is None:
+                room_eligibility = compute_room_eligibility(all_rooms, all_student_groups, all_courses, lecture_cohorts)
+            problems.extend(check_resource_load(all_student_groups, all_courses, all_instructors, all_days,
+                                                lab_masks, avail, room_eligibility, lecture_cohorts, log))
+    return problems
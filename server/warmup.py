@@ -0,0 +1,55 @@
+import threading
+import time
+
+# Set once the worker has imported OR-Tools and finished a throwaway solve
+_ready = threading.Event()
+_warmup_seconds = None
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def warm_up(log=print):
+    """
+    Preloads ortools.sat.python.cp_model and runs a tiny solve so the first
+    real request does not pay for library loading and solver initialisation.
+    """
+    global _warmup_seconds
+    started = time.monotonic()
+
+    from ortools.sat.python import cp_model
+
+    # Same building blocks as a real timetable: bools, exactly-one, objective
+    model = cp_model.CpModel()
+    slots = [model.NewBoolVar(f'warmup_{i}') for i in range(4)]
+    model.AddExactlyOne(slots)
+    model.Minimize(sum(i * v for i, v in enumerate(slots)))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 10.0
+    status = solver.Solve(model)
+
+    _warmup_seconds = time.monotonic() - started
+    log(f"Warm-up finished in {_warmup_seconds:.2f}s (status {solver.StatusName(status)})")
+    _ready.set()
+
+
+def start_warm_up(log=print):
+    """
+    Runs warm_up() in a background thread, so the worker serves /ready
+    (503 until done) while OR-Tools loads. Returns the thread; a warm-up
+    that is still running is not started twice.
+    """
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=warm_up, kwargs={'log': log}, name='warm-up', daemon=True)
+            _thread.start()
+        return _thread
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def warmup_seconds():
+    return _warmup_seconds
@@ -0,0 +1,14 @@
+"""
+Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Each worker imports this module, which reuses the app built by app.py and
+warms up OR-Tools in a background thread. GET /ready answers 503 until
+warm-up is done and 200 afterwards, so a readiness probe only routes
+traffic to warm workers.
+"""
+import warmup
+from app import app
+
+warmup.start_warm_up()
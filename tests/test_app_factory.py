@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import create_app
+import warmup
+
+class TestAppFactory(unittest.TestCase):
+    def test_factory_registers_routes(self):
+        app = create_app()
+        rules = {rule.rule for rule in app.url_map.iter_rules()}
+        self.assertIn('/generate-timetable', rules)
+        self.assertIn('/cancel/<request_id>', rules)
+        self.assertIn('/ready', rules)
+
+    def test_ready_after_warm_up(self):
+        warmup._ready.clear()
+        app = create_app(warm_up=True)
+        # Warm-up runs in the background; the probe says so until it is done
+        if not warmup.is_ready():
+            self.assertEqual(app.test_client().get('/ready').status_code, 503)
+        warmup.start_warm_up().join()
+        self.assertTrue(warmup.is_ready())
+
+        resp = app.test_client().get('/ready')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()['status'], 'ready')
+        self.assertGreaterEqual(resp.get_json()['warmupSeconds'], 0)
+
+    def test_not_ready_while_warming_up(self):
+        app = create_app()
+        warmup._ready.clear()
+        try:
+            resp = app.test_client().get('/ready')
+            self.assertEqual(resp.status_code, 503)
+            self.assertEqual(resp.get_json()['status'], 'warming_up')
+        finally:
+            warmup.start_warm_up().join()
+
+    def test_wsgi_reuses_the_module_app(self):
+        import app as app_module
+        import wsgi
+        self.assertIs(wsgi.app, app_module.app)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+from collections import Counter
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app
+import model_template
+
+# 12:00 - 01:00 is a break, so the last morning slot and the first afternoon slot are not consecutive
+TIMESLOTS = ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM',
+             '01:00 PM - 02:00 PM', '02:00 PM - 03:00 PM']
+
+def make_data(model_builder):
+    rooms = [{'id': f'CR{i}', 'capacity': 60, 'type': 'Classroom'} for i in range(3)]
+    rooms += [{'id': f'LAB{i}', 'capacity': 60, 'type': 'Computer Lab'} for i in range(2)]
+    return {
+        'days': ['Mon', 'Tue'],
+        'timeslots': TIMESLOTS,
+        'rooms': rooms,
+        'instructors': [{'id': f'I{i}', 'name': f'Inst{i}'} for i in range(3)],
+        'courses': [
+            {'id': 'C1', 'name': 'Calculus', 'lectureHours': 2, 'labHours': 0,
+             'qualifiedInstructors': ['I0', 'I1'], 'sharedLectureGroups': [['G1', 'G2']]},
+            {'id': 'C2', 'name': 'Programming', 'lectureHours': 1, 'labHours': 2,
+             'qualifiedInstructors': ['I1', 'I2']},
+        ],
+        'student_groups': [
+            {'id': 'G1', 'size': 30, 'enrolledCourses': ['C1', 'C2'], 'preferredRoomId': 'CR1'},
+            {'id': 'G2', 'size': 30, 'enrolledCourses': ['C1', 'C2'],
+             'availability': {'Mon': [0, 1, 1, 1, 1], 'Tue': [1, 1, 1, 1, 0]}},
+        ],
+        'settings': {'roomPools': True, 'modelBuilder': model_builder, 'timeLimitSeconds': 30}
+    }
+
+def canonical(proto):
+    """Variable domains in order, and the constraints as a multiset independent of their order."""
+    constraints = Counter()
+    for c in proto.constraints:
+        if c.has_linear():
+            constraints[('linear', tuple(sorted(zip(c.linear.vars, c.linear.coeffs))), tuple(c.linear.domain))] += 1
+        elif c.has_exactly_one():
+            constraints[('exactly_one', tuple(sorted(c.exactly_one.literals)))] += 1
+        elif c.has_at_most_one():
+            constraints[('at_most_one', tuple(sorted(c.at_most_one.literals)))] += 1
+        else:
+            constraints[('other', str(c))] += 1
+    return [tuple(v.domain) for v in proto.variables], constraints
+
+class TestArrayBuilder(unittest.TestCase):
+    def setUp(self):
+        model_template.clear_cache()
+        self.client = app.test_client()
+
+    def build(self, model_builder, unknown_instructor=False):
+        data = make_data(model_builder)
+        if unknown_instructor:
+            # Stale id that is not in `instructors`
+            data['courses'][1]['qualifiedInstructors'].append('GHOST')
+        resp = self.client.post('/generate-timetable', json=data)
+        self.assertEqual(resp.status_code, 200, resp.get_json().get('message'))
+        # Shared lectures are listed once per group
+        self.assertEqual(len(resp.get_json()['schedule']), 10)
+        template = model_template.get_template(model_template.structural_key(data))
+        return canonical(template.model.Proto())
+
+    def test_same_model_as_regular_builder(self):
+        variables, constraints = self.build('arrays')
+        regular_variables, regular_constraints = self.build(None)
+        self.assertEqual(variables, regular_variables)
+        self.assertEqual(constraints, regular_constraints)
+
+    def test_unknown_instructor_gets_no_variables(self):
+        variables, constraints = self.build('arrays', unknown_instructor=True)
+        regular_variables, regular_constraints = self.build(None, unknown_instructor=True)
+        self.assertEqual(variables, regular_variables)
+        self.assertEqual(constraints, regular_constraints)
+        self.assertEqual(variables, self.build(None)[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+from availability import build_availability, day_mask, pairs, popcount, total_slots
+from lab_preferences import mask_indexes
+
+TIMESLOTS = [
+    '08:30 AM - 09:30 AM',
+    '09:30 AM - 10:30 AM',
+    '11:00 AM - 12:00 PM',
+    '12:00 PM - 01:00 PM',
+]
+
+class TestAvailabilityMasks(unittest.TestCase):
+    def test_day_mask(self):
+        self.assertEqual(mask_indexes(day_mask([1, 0, 1, 1], 4)), [0, 2, 3])
+        # Missing days and short lists count as available
+        self.assertEqual(day_mask(None, 4), 0b1111)
+        self.assertEqual(mask_indexes(day_mask([0], 4)), [1, 2, 3])
+        # Extra entries are ignored
+        self.assertEqual(day_mask([1, 1, 1, 1, 0, 0], 4), 0b1111)
+
+    def test_pairs_and_counts(self):
+        mask = day_mask([1, 1, 0, 1], 4)
+        self.assertEqual(popcount(mask), 3)
+        self.assertEqual(mask_indexes(pairs(mask)), [0])
+
+        avail = build_availability(
+            {'I1': {'id': 'I1', 'availability': {'Mon': [0, 1, 1, 1], 'Tue': [0, 0, 0, 0]}}},
+            {'R1': {'id': 'R1'}},
+            {},
+            ['Mon', 'Tue'],
+            TIMESLOTS,
+        )
+        self.assertEqual(total_slots(avail['instructors']['I1']), 3)
+        self.assertEqual(total_slots(avail['rooms']['R1']), 8)
+
+    def test_model_respects_all_availabilities(self):
+        data = {
+            'days': ['Mon'],
+            'timeslots': TIMESLOTS,
+            'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom', 'availability': {'Mon': [1, 1, 1, 0]}}],
+            'instructors': [{'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [0, 1, 1, 1]}}],
+            'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 1, 'labHours': 0, 'qualifiedInstructors': ['I1']}],
+            'student_groups': [{
+                'id': 'G1',
+                'size': 20,
+                'enrolledCourses': ['C1'],
+                'availability': {'Mon': [1, 0, 1, 1]}
+            }],
+            'settings': {}
+        }
+
+        with app.test_request_context(json=data):
+            resp = generate_timetable()
+            status_code = 200
+            if isinstance(resp, tuple):
+                resp, status_code = resp
+
+            json_data = resp.get_json()
+            self.assertEqual(status_code, 200, f"Should succeed. Msg: {json_data.get('message')}")
+            # Slot 2 is the only one where group, instructor and room are all free
+            self.assertEqual([t['timeslot'] for t in json_data['schedule']], ['11:00 AM - 12:00 PM'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import csv
+import json
+import sys
+import os
+import tempfile
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from batch import PROFILES, instance_settings, load_profile, run_batch
+
+def make_data(lecture_hours):
+    return {
+        'days': ['Mon'],
+        'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM'],
+        'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}, {'id': 'R2', 'capacity': 50, 'type': 'Classroom'}],
+        'instructors': [{'id': 'I1', 'name': 'Inst1'}],
+        'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': lecture_hours, 'labHours': 0,
+                     'qualifiedInstructors': ['I1']}],
+        'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1'], 'preferredRoomId': 'R1'}],
+        'settings': {}
+    }
+
+class TestBatch(unittest.TestCase):
+    def test_load_profile(self):
+        self.assertEqual(load_profile('fast'), PROFILES['fast'])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'profile.json')
+            with open(path, 'w') as f:
+                json.dump({'timeLimitSeconds': 5}, f)
+            self.assertEqual(load_profile(path), {'timeLimitSeconds': 5})
+
+    def test_solver_workers_share(self):
+        data = make_data(1)
+        self.assertEqual(instance_settings(data, {'timeLimitSeconds': 5}, 2), {'timeLimitSeconds': 5, 'solverWorkers': 2})
+        # The request's or the profile's own solverWorkers wins over the share
+        data['settings'] = {'solverWorkers': 16}
+        self.assertEqual(instance_settings(data, {}, 1), {'solverWorkers': 16})
+        self.assertEqual(instance_settings(data, {'solverWorkers': 4}, 1), {'solverWorkers': 4})
+        self.assertEqual(instance_settings(make_data(1), {}), {})
+
+    def test_run_batch_writes_results_and_summary(self):
+        # Three lecture hours do not fit into two slots
+        payloads = [('ok.json', make_data(1)), ('too_many_hours.json', make_data(3))]
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = run_batch(payloads, tmp, {'timeLimitSeconds': 10}, log=lambda msg: None)
+            self.assertEqual([row['status'] for row in rows], ['success', 'error'])
+
+            with open(os.path.join(tmp, 'ok.result.json')) as f:
+                self.assertEqual(len(json.load(f)['schedule']), 1)
+            self.assertTrue(os.path.exists(os.path.join(tmp, 'too_many_hours.result.json')))
+
+            with open(os.path.join(tmp, 'summary.csv'), newline='') as f:
+                summary = list(csv.DictReader(f))
+        self.assertEqual([row['instance'] for row in summary], ['ok.json', 'too_many_hours.json'])
+        self.assertEqual(summary[0]['solver_status'], 'OPTIMAL')
+        self.assertEqual(float(summary[0]['objective']), 0.0)
+        self.assertGreater(int(summary[0]['variables']), 0)
+        self.assertEqual(summary[1]['http_status'], '400')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import patch
+import gzip
+import json
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app
+import response_encoding
+from response_encoding import encode_compact, decode_compact, sort_schedule
+
+class TestCompactResponse(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            'days': ['Mon', 'Tue'],
+            'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM', '12:00 PM - 01:00 PM'],
+            'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}, {'id': 'R2', 'capacity': 50, 'type': 'Classroom'}],
+            'instructors': [
+                {'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1, 1, 1, 1], 'Tue': [1, 1, 1, 1]}},
+                {'id': 'I2', 'name': 'Inst2', 'availability': {'Mon': [1, 1, 1, 1], 'Tue': [1, 1, 1, 1]}}
+            ],
+            'courses': [
+                {'id': 'C1', 'name': 'Course1', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I1']},
+                {'id': 'C2', 'name': 'Course2', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I2']}
+            ],
+            'student_groups': [
+                {'id': 'G2', 'size': 20, 'enrolledCourses': ['C1', 'C2'], 'availability': {'Mon': [1, 1, 1, 1], 'Tue': [1, 1, 1, 1]}},
+                {'id': 'G1', 'size': 20, 'enrolledCourses': ['C2'], 'availability': {'Mon': [1, 1, 1, 1], 'Tue': [1, 1, 1, 1]}}
+            ],
+            'settings': {}
+        }
+        self.client = app.test_client()
+
+    def test_compact_matches_verbose(self):
+        verbose = self.client.post('/generate-timetable', json=self.data).get_json()
+        self.assertEqual(verbose['status'], 'success')
+
+        compact = encode_compact(verbose['schedule'], self.data['days'], self.data['timeslots'])
+        self.assertEqual(decode_compact(compact), verbose['schedule'])
+
+        # Rows are sorted by group, day, slot
+        keys = [(compact['tables']['groups'][r[0]], r[1], r[2]) for r in compact['rows']]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_verbose_schedule_is_sorted(self):
+        schedule = self.client.post('/generate-timetable', json=self.data).get_json()['schedule']
+        self.assertEqual(schedule, sort_schedule(schedule, self.data['days'], self.data['timeslots']))
+        self.assertEqual(schedule[0]['group'], 'G1')
+
+    def test_compact_format_with_gzip(self):
+        # Compact bodies are tiny, so compress everything for this test
+        patcher = patch.object(response_encoding, 'MIN_COMPRESS_BYTES', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        resp = self.client.post('/generate-timetable?format=compact', json=self.data,
+                                headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers.get('Content-Encoding'), 'gzip')
+
+        body = json.loads(gzip.decompress(resp.data))
+        self.assertEqual(body['schedule']['format'], 'compact')
+        schedule = decode_compact(body['schedule'])
+        self.assertEqual(len(schedule), 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import create_app
+from dataset_store import DatasetError, apply_delta, parse_ref
+
+TIMESLOTS = ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM']
+
+def make_data():
+    return {
+        'days': ['Mon'],
+        'timeslots': TIMESLOTS,
+        'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}],
+        'instructors': [{'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1, 1, 1]}}],
+        'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 1, 'labHours': 0, 'qualifiedInstructors': ['I1']}],
+        'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1'], 'availability': {'Mon': [1, 1, 1]}}],
+        'settings': {}
+    }
+
+class TestDatasetStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = create_app(dataset_db=os.path.join(self.tmp.name, 'datasets.db')).test_client()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_ref(self):
+        self.assertEqual(parse_ref('abc@3'), ('abc', 3))
+        self.assertEqual(parse_ref('abc'), ('abc', None))
+        with self.assertRaises(DatasetError):
+            parse_ref('abc@x')
+
+    def test_apply_delta(self):
+        data = make_data()
+        result = apply_delta(data, {
+            'upsert': {'instructors': [{'id': 'I1', 'availability': {'Mon': [0, 0, 1]}},
+                                       {'id': 'I2', 'name': 'Inst2'}]},
+            'remove': {'courses': ['C1']},
+            'replace': {'days': ['Mon', 'Tue']},
+        })
+        self.assertEqual(result['instructors'][0], {'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [0, 0, 1]}})
+        self.assertEqual([i['id'] for i in result['instructors']], ['I1', 'I2'])
+        self.assertEqual(result['courses'], [])
+        self.assertEqual(result['days'], ['Mon', 'Tue'])
+        # The base payload is not modified
+        self.assertEqual(data['instructors'][0]['availability'], {'Mon': [1, 1, 1]})
+
+    def test_remove_needs_a_list_of_ids(self):
+        # A bare string would otherwise remove 'C' and '1'
+        for ids in ('C1', ['C1', {'id': 'C1'}], [True]):
+            with self.assertRaises(DatasetError):
+                apply_delta(make_data(), {'remove': {'courses': ids}})
+
+    def test_upload_delta_and_solve_by_reference(self):
+        resp = self.client.post('/datasets', json=make_data())
+        self.assertEqual(resp.status_code, 201)
+        dataset_id = resp.get_json()['datasetId']
+        self.assertEqual(resp.get_json()['dataset'], f'{dataset_id}@1')
+
+        # Only the last slot stays free for the group
+        resp = self.client.patch(f'/datasets/{dataset_id}', json={
+            'baseVersion': 1,
+            'upsert': {'student_groups': [{'id': 'G1', 'availability': {'Mon': [0, 0, 1]}}]},
+        })
+        self.assertEqual(resp.get_json()['version'], 2)
+
+        resp = self.client.patch(f'/datasets/{dataset_id}', json={'baseVersion': 1, 'remove': {'courses': ['C1']}})
+        self.assertEqual(resp.status_code, 409)
+
+        resp = self.client.post('/generate-timetable', json={'dataset': f'{dataset_id}@2'})
+        self.assertEqual(resp.status_code, 200, resp.get_json().get('message'))
+        self.assertEqual([t['timeslot'] for t in resp.get_json()['schedule']], ['11:00 AM - 12:00 PM'])
+
+        resp = self.client.get(f'/datasets/{dataset_id}?version=1')
+        self.assertEqual(resp.get_json()['payload']['student_groups'][0]['availability'], {'Mon': [1, 1, 1]})
+        resp = self.client.get(f'/datasets/{dataset_id}')
+        self.assertEqual(resp.get_json()['version'], 2)
+
+    def test_unknown_dataset(self):
+        resp = self.client.post('/generate-timetable', json={'dataset': 'missing@1'})
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.post('/validate', json={'dataset': 'missing'})
+        self.assertEqual(resp.status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+from preprocess import preprocess
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu']
+
+def make_data():
+    return {
+        'days': DAYS,
+        'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM'],
+        'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}],
+        'instructors': [{'id': 'I1', 'name': 'Inst1'}, {'id': 'I2', 'name': 'Inst2'}],
+        'courses': [
+            {'id': 'C1', 'name': 'Course1', 'lectureHours': 3, 'labHours': 0, 'qualifiedInstructors': ['I1']},
+            {'id': 'C2', 'name': 'Course2', 'lectureHours': 1, 'labHours': 0, 'qualifiedInstructors': ['I2']},
+        ],
+        'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1', 'C2']}],
+        'settings': {'gapPriority': 1}
+    }
+
+class TestDaySymmetry(unittest.TestCase):
+    def run_request(self, data):
+        with app.test_request_context(json=data):
+            resp = generate_timetable()
+            self.assertNotIsInstance(resp, tuple)
+            return resp.get_json()
+
+    def test_day_classes(self):
+        self.assertEqual(preprocess(make_data())['day_classes'], [DAYS])
+
+        data = make_data()
+        data['instructors'][1]['availability'] = {'Thu': [0, 0, 1]}
+        data['rooms'][0]['availability'] = {'Mon': [1, 1, 0], 'Wed': [1, 1, 0]}
+        # Tue and Thu differ from every other day
+        self.assertEqual(preprocess(data)['day_classes'], [['Mon', 'Wed']])
+
+    def test_days_numbered_by_first_use(self):
+        body = self.run_request(make_data())
+        # One C1 lecture per day; the earliest tasks take the earliest days
+        c1_days = sorted(DAYS.index(s['day']) for s in body['schedule'] if s['courseId'] == 'C1')
+        self.assertEqual(c1_days, [0, 1, 2])
+
+    def test_can_be_disabled(self):
+        data = make_data()
+        data['settings']['daySymmetryBreaking'] = False
+        body = self.run_request(data)
+        self.assertEqual(len(body['schedule']), 4)
+
+if __name__ == '__main__':
+    unittest.main()
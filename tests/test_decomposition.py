@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+
+TIMESLOTS = ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM',
+             '01:00 PM - 02:00 PM', '02:00 PM - 03:00 PM']
+
+def make_data(engine):
+    rooms = [{'id': f'R{i}', 'capacity': 50, 'type': 'Classroom'} for i in range(2)]
+    rooms.append({'id': 'LAB1', 'capacity': 50, 'type': 'Computer Lab'})
+    instructors = [{'id': f'I{i}', 'name': f'Inst{i}'} for i in range(3)]
+    courses = [
+        {'id': 'C1', 'name': 'Algebra', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I0', 'I1']},
+        {'id': 'C2', 'name': 'Physics', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I1', 'I2']},
+        {'id': 'C3', 'name': 'Programming', 'lectureHours': 1, 'labHours': 2, 'qualifiedInstructors': ['I2', 'I0']},
+    ]
+    groups = [{'id': f'G{i}', 'size': 40, 'enrolledCourses': ['C1', 'C2', 'C3']} for i in range(3)]
+    return {
+        'days': ['Mon', 'Tue', 'Wed'],
+        'timeslots': TIMESLOTS,
+        'rooms': rooms,
+        'instructors': instructors,
+        'courses': courses,
+        'student_groups': groups,
+        'settings': {'engine': engine}
+    }
+
+class TestDecomposition(unittest.TestCase):
+    def solve(self, engine):
+        with app.test_request_context(json=make_data(engine)):
+            resp = generate_timetable()
+            status_code = 200
+            if isinstance(resp, tuple):
+                resp, status_code = resp
+
+            json_data = resp.get_json()
+            self.assertEqual(status_code, 200, f"Should succeed. Msg: {json_data.get('message')}")
+            return json_data['schedule']
+
+    def test_decomposed_engine_is_conflict_free(self):
+        schedule = self.solve('decomposed')
+        self.assertEqual(len(schedule), len(self.solve('full')))
+        self.assertEqual(len(schedule), 21)
+
+        for key in ('group', 'instructor', 'room'):
+            seen = set()
+            for e in schedule:
+                slot = (e['day'], e['timeslot'], e[key])
+                self.assertNotIn(slot, seen, f'{key} double booked')
+                seen.add(slot)
+
+        for g in range(3):
+            labs = [e for e in schedule if e['group'] == f'G{g}' and e['type'] == 'lab']
+            self.assertEqual(len({(e['day'], e['instructor'], e['room']) for e in labs}), 1)
+            self.assertEqual(labs[0]['room'], 'LAB1')
+
+if __name__ == '__main__':
+    unittest.main()
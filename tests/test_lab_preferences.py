@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+from lab_preferences import parse_lab_preference, lab_start_mask, lab_single_mask, mask_indexes
+from timeslots import parse_timeslot, timeslot_gaps
+
+TIMESLOTS = [
+    '08:30 AM - 09:30 AM',
+    '09:30 AM - 10:30 AM',
+    '11:00 AM - 12:00 PM',
+    '12:00 PM - 01:00 PM',
+    '02:00 PM - 03:00 PM',
+    '03:00 PM - 04:00 PM',
+    '04:00 PM - 05:00 PM',
+]
+
+class TestLabPreferences(unittest.TestCase):
+    def setUp(self):
+        self.ts_parsed = [parse_timeslot(ts) for ts in TIMESLOTS]
+        self.ts_gaps = timeslot_gaps(self.ts_parsed)
+
+    def starts(self, pref):
+        return mask_indexes(lab_start_mask(parse_lab_preference(pref), self.ts_parsed, self.ts_gaps))
+
+    def test_any_time_uses_continuous_pairs_only(self):
+        # 09:30 -> 11:00 and 01:00 -> 02:00 are breaks
+        self.assertEqual(self.starts(None), [0, 2, 4, 5])
+
+    def test_legacy_strings(self):
+        self.assertEqual(self.starts('08:30 AM - 10:30 AM'), [0])
+        self.assertEqual(self.starts('11:00 AM - 01:00 PM'), [2])
+        self.assertEqual(self.starts('02:00 PM - 04:00 PM'), [4])
+        self.assertEqual(self.starts('03:00 PM - 05:00 PM'), [5])
+        self.assertEqual(self.starts('2 to 4'), [4])
+        self.assertEqual(self.starts('8:30 - 10:30'), [0])
+        # Dash ranges keep the exact start of the first time
+        self.assertEqual(parse_lab_preference('12 - 2')['windows'], [(720, 720, None)])
+        self.assertEqual(parse_lab_preference('10:30 - 12:30')['windows'], [(630, 630, None)])
+        self.assertEqual(self.starts('Afternoon'), [4, 5])
+        # Free text without a time does not restrict anything
+        self.assertEqual(self.starts('whenever'), [0, 2, 4, 5])
+
+    def test_free_text_times(self):
+        # The "a" of a following word is not an AM suffix
+        self.assertEqual(parse_lab_preference('after 2 at lab')['windows'], [(840, 840, None)])
+        self.assertEqual(parse_lab_preference('2 am')['windows'], [(120, 120, None)])
+        self.assertEqual(parse_lab_preference('2 p.m.')['windows'], [(840, 840, None)])
+        # "X to Y" and "X and Y" are ranges the lab has to fit in
+        self.assertEqual(parse_lab_preference('between 3 and 5')['windows'], [(900, None, 1020)])
+        self.assertEqual(parse_lab_preference('from 2 to 4')['windows'], [(840, None, 960)])
+        self.assertEqual(self.starts('between 2 and 5'), [4, 5])
+        self.assertEqual(self.starts('between 3 and 5'), [5])
+        self.assertEqual(self.starts('11:00 AM to 01:00 PM'), [2])
+
+    def test_structured_preferences(self):
+        self.assertEqual(self.starts({'startSlots': [2, 5]}), [2, 5])
+        self.assertEqual(self.starts({'windows': [{'start': '02:00 PM', 'end': '05:00 PM'}]}), [4, 5])
+        self.assertEqual(self.starts({'windows': [{'start': 840, 'end': 960}]}), [4])
+        self.assertEqual(self.starts({'windows': [{'start': 510, 'end': 630}, {'start': '03:00 PM'}]}), [0, 5])
+
+    def test_single_mask(self):
+        norm = parse_lab_preference('Afternoon')
+        self.assertEqual(mask_indexes(lab_single_mask(norm, self.ts_parsed)), [3, 4, 5, 6])
+
+    def test_model_honours_structured_preference(self):
+        data = {
+            'days': ['Mon'],
+            'timeslots': TIMESLOTS,
+            'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Lab'}],
+            'instructors': [{'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1] * 7}}],
+            'courses': [{'id': 'C1', 'name': 'LabCourse', 'lectureHours': 0, 'labHours': 2, 'qualifiedInstructors': ['I1']}],
+            'student_groups': [{
+                'id': 'G1',
+                'size': 20,
+                'enrolledCourses': ['C1'],
+                'availability': {'Mon': [1] * 7},
+                'labTimingPreferences': {'C1': {'windows': [{'start': '03:00 PM', 'end': '05:00 PM'}]}}
+            }],
+            'settings': {}
+        }
+
+        with app.test_request_context(json=data):
+            resp = generate_timetable()
+            status_code = 200
+            if isinstance(resp, tuple):
+                resp, status_code = resp
+
+            json_data = resp.get_json()
+            self.assertEqual(status_code, 200, f"Should succeed. Msg: {json_data.get('message')}")
+            times = sorted(t['timeslot'] for t in json_data['schedule'])
+            self.assertEqual(times, ['03:00 PM - 04:00 PM', '04:00 PM - 05:00 PM'])
+
+    def test_validation_rejects_unsatisfiable_structured_preference(self):
+        data = {
+            'days': ['Mon'],
+            'timeslots': TIMESLOTS,
+            'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Lab'}],
+            'instructors': [{'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1] * 7}}],
+            'courses': [{'id': 'C1', 'name': 'LabCourse', 'lectureHours': 0, 'labHours': 2, 'qualifiedInstructors': ['I1']}],
+            'student_groups': [{
+                'id': 'G1',
+                'size': 20,
+                'enrolledCourses': ['C1'],
+                'availability': {'Mon': [1] * 7},
+                # Slot 1 -> 2 spans the 10:30 break
+                'labTimingPreferences': {'C1': {'startSlots': [1]}}
+            }],
+            'settings': {}
+        }
+        resp = app.test_client().post('/validate', json=data)
+        problems = resp.get_json()['problems']
+        self.assertEqual([p['check'] for p in problems], ['lab_slots'])
+        self.assertIn('start slots 1', problems[0]['message'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+from lexicographic import objective_tiers
+
+TIMESLOTS = ['08:30 AM - 09:30 AM', '09:30 AM - 10:30 AM', '01:00 PM - 02:00 PM', '02:00 PM - 03:00 PM']
+
+def make_data(settings):
+    return {
+        'days': ['Mon'],
+        'timeslots': TIMESLOTS,
+        'rooms': [{'id': 'LAB1', 'capacity': 40, 'type': 'Computer Lab'}],
+        'instructors': [{'id': 'I1', 'name': 'Inst1'}],
+        'courses': [{'id': 'C1', 'name': 'Programming', 'lectureHours': 0, 'labHours': 2, 'qualifiedInstructors': ['I1']}],
+        'student_groups': [{'id': 'G1', 'size': 30, 'enrolledCourses': ['C1']}],
+        # Morning means 8:30 labs, afternoon misses the morning preference
+        'settings': dict({'disallow830Labs': True, 'preferredMorningCourses': ['C1'],
+                          'objectiveMode': 'lexicographic'}, **settings)
+    }
+
+class TestLexicographic(unittest.TestCase):
+    def lab_slots(self, settings):
+        with app.test_request_context(json=make_data(settings)):
+            resp = generate_timetable()
+            status_code = 200
+            if isinstance(resp, tuple):
+                resp, status_code = resp
+
+            json_data = resp.get_json()
+            self.assertEqual(status_code, 200, f"Should succeed. Msg: {json_data.get('message')}")
+            return sorted(e['timeslot'] for e in json_data['schedule'])
+
+    def test_objective_tiers(self):
+        objectives = {'gaps': ['g'], 'workload': ['w'], 'roomPreference': ['r'], 'custom': ['c']}
+        self.assertEqual(objective_tiers(objectives, {}),
+                         [('gaps', ['g']), ('workload+roomPreference', ['w', 'r']), ('other', ['c'])])
+        self.assertEqual(objective_tiers(objectives, {'objectiveTiers': ['workload', ['gaps']]}),
+                         [('workload', ['w']), ('gaps', ['g']), ('other', ['r', 'c'])])
+
+    def test_tier_order_decides(self):
+        # Default: avoiding 8:30 labs comes first
+        self.assertEqual(self.lab_slots({}), ['01:00 PM - 02:00 PM', '02:00 PM - 03:00 PM'])
+        # Morning preference ranked above the 8:30 rule
+        self.assertEqual(self.lab_slots({'objectiveTiers': [['morning'], ['lab830']]}),
+                         ['08:30 AM - 09:30 AM', '09:30 AM - 10:30 AM'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import gzip
+import json
+import sys
+import os
+import tempfile
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from loadtest import generate_payload, load_corpus, percentile, summarize
+from validation import collect_problems
+
+class TestLoadTest(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50.5)
+        self.assertAlmostEqual(percentile(values, 99), 99.01)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_summarize(self):
+        results = [
+            {'status_code': 200, 'latency': 1.0, 'timings': {'build': 0.2, 'solve': 0.7}},
+            {'status_code': 200, 'latency': 3.0, 'timings': {'build': 0.4, 'solve': 2.5}},
+            {'status_code': 400, 'latency': 0.1, 'timings': {}},
+        ]
+        summary = summarize(results, wall=2.0)
+        self.assertEqual(summary['requests'], 3)
+        self.assertEqual(summary['throughput_rps'], 1.5)
+        self.assertEqual(summary['status_codes'], {'200': 2, '400': 1})
+        self.assertEqual(summary['latency']['p50'], 1.0)
+        self.assertEqual(summary['server_timings']['build']['p50'], 0.3)
+
+    def test_generated_payloads_pass_prechecks(self):
+        # Resources grow with the number of groups
+        for groups in (4, 12, 24):
+            payload = generate_payload(seed=groups, groups=groups)
+            self.assertEqual(len(payload['instructors']), 2 * groups)
+            self.assertEqual(collect_problems(payload), [])
+
+    def test_corpus_reads_plain_and_gzipped_payloads(self):
+        payload = generate_payload(seed=1, groups=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'a.json'), 'w') as f:
+                json.dump(payload, f)
+            with gzip.open(os.path.join(tmp, 'b.json.gz'), 'wt') as f:
+                json.dump({'payload': payload, 'outcome': 'success'}, f)
+            with open(os.path.join(tmp, 'not_a_request.json'), 'w') as f:
+                json.dump({'hello': 'world'}, f)
+
+            corpus = load_corpus(tmp)
+        self.assertEqual([name for name, _ in corpus], ['a.json', 'b.json.gz'])
+        self.assertEqual(len(corpus[1][1]['student_groups']), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app
+import metrics
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.data = {
+            'days': ['Mon'],
+            'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM'],
+            'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}],
+            'instructors': [{'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1, 1]}}],
+            'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 1, 'labHours': 0, 'qualifiedInstructors': ['I1']}],
+            'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1'], 'availability': {'Mon': [1, 1]}}],
+            'settings': {}
+        }
+        self.client = app.test_client()
+
+    def test_request_outcomes_are_counted(self):
+        success_before = metrics.REQUESTS.value(outcome='success')
+        validation_before = metrics.REQUESTS.value(outcome='validation_error')
+        solves_before = metrics.SOLVE_SECONDS.count()
+
+        self.assertEqual(self.client.post('/generate-timetable', json=self.data).status_code, 200)
+
+        # Group needs more hours than it has slots -> validation 400
+        self.data['courses'][0]['lectureHours'] = 5
+        self.assertEqual(self.client.post('/generate-timetable', json=self.data).status_code, 400)
+
+        self.assertEqual(metrics.REQUESTS.value(outcome='success'), success_before + 1)
+        self.assertEqual(metrics.REQUESTS.value(outcome='validation_error'), validation_before + 1)
+        self.assertEqual(metrics.SOLVE_SECONDS.count(), solves_before + 1)
+        self.assertEqual(metrics.INFLIGHT_SOLVES.value(), 0)
+
+    def test_solver_statuses_map_to_outcomes(self):
+        self.assertEqual(metrics.solve_outcome('INFEASIBLE'), 'infeasible')
+        self.assertEqual(metrics.solve_outcome('MODEL_INVALID'), 'model_invalid')
+        # Time limit or stagnation without a solution
+        self.assertEqual(metrics.solve_outcome('UNKNOWN'), 'no_solution')
+
+    def test_proven_infeasible_solve_is_counted(self):
+        infeasible_before = metrics.REQUESTS.value(outcome='infeasible')
+        # The pre-checks pass, but Inst1 cannot teach both slots without a break
+        self.data['timeslots'] = ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM']
+        self.data['rooms'].append({'id': 'R2', 'capacity': 50, 'type': 'Classroom'})
+        self.data['courses'].append({'id': 'C2', 'name': 'Course2', 'lectureHours': 1, 'labHours': 0, 'qualifiedInstructors': ['I1']})
+        self.data['student_groups'].append({'id': 'G2', 'size': 20, 'enrolledCourses': ['C2']})
+        self.assertEqual(self.client.post('/generate-timetable', json=self.data).status_code, 400)
+        self.assertEqual(metrics.REQUESTS.value(outcome='infeasible'), infeasible_before + 1)
+
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        self.client.post('/generate-timetable', json=self.data)
+        resp = self.client.get('/metrics')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.content_type.startswith('text/plain'))
+
+        text = resp.get_data(as_text=True)
+        self.assertIn('# TYPE timely_requests_total counter', text)
+        self.assertIn('timely_requests_total{outcome="success"}', text)
+        self.assertIn('timely_solver_status_total{status="OPTIMAL"}', text)
+        self.assertIn('timely_build_seconds_bucket{le="+Inf"}', text)
+        self.assertIn('timely_model_variables_count', text)
+        self.assertIn('timely_inflight_solves 0', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = metrics.Histogram('test_seconds', 'Test histogram.', (1, 5))
+        for value in (0.5, 1, 3, 10):
+            hist.observe(value)
+        lines = hist.render()
+        self.assertIn('test_seconds_bucket{le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{le="5"} 3', lines)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn('test_seconds_count 4', lines)
+
+if __name__ == '__main__':
+    unittest.main()
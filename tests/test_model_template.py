@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, create_app
+import metrics
+import model_template
+
+TIMESLOTS = ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '01:00 PM - 02:00 PM', '02:00 PM - 03:00 PM']
+
+class TestModelTemplate(unittest.TestCase):
+    def setUp(self):
+        model_template.clear_cache()
+        self.data = {
+            'days': ['Mon', 'Tue'],
+            'timeslots': TIMESLOTS,
+            'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}],
+            'instructors': [{'id': 'I1', 'name': 'Inst1'}],
+            'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I1']}],
+            'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1']}],
+            'settings': {'timeLimitSeconds': 30}
+        }
+        self.client = app.test_client()
+
+    def test_structural_key_ignores_objective_settings(self):
+        key = model_template.structural_key(self.data)
+        self.data['settings'].update({'gapPriority': 2, 'fairWorkload': True, 'timeLimitSeconds': 5})
+        self.assertEqual(model_template.structural_key(self.data), key)
+        self.data['settings']['roomPools'] = True
+        self.assertNotEqual(model_template.structural_key(self.data), key)
+        self.data['settings'].pop('roomPools')
+        self.data['rooms'][0]['capacity'] = 60
+        self.assertNotEqual(model_template.structural_key(self.data), key)
+
+    def test_settings_only_change_reuses_structure(self):
+        hits = metrics.MODEL_TEMPLATE_LOOKUPS.value(result='hit')
+        misses = metrics.MODEL_TEMPLATE_LOOKUPS.value(result='miss')
+
+        self.assertEqual(self.client.post('/generate-timetable', json=self.data).status_code, 200)
+        template = model_template.get_template(model_template.structural_key(self.data))
+        self.assertIsNotNone(template)
+        self.assertEqual(sum(value for _, value in template.hint), 2)
+
+        # Only the objective changes: the cached model is cloned and the new objective applies
+        self.data['settings']['preferredMorningCourses'] = ['C1']
+        resp = self.client.post('/generate-timetable', json=self.data)
+        self.assertEqual(resp.status_code, 200)
+        schedule = resp.get_json()['schedule']
+        self.assertEqual(len(schedule), 2)
+        self.assertTrue(all('AM' in e['timeslot'] for e in schedule))
+
+        self.assertEqual(metrics.MODEL_TEMPLATE_LOOKUPS.value(result='hit'), hits + 1)
+        self.assertEqual(metrics.MODEL_TEMPLATE_LOOKUPS.value(result='miss'), misses + 1)
+
+        # Structural change: built from scratch
+        self.data['rooms'].append({'id': 'R2', 'capacity': 50, 'type': 'Classroom'})
+        self.assertEqual(self.client.post('/generate-timetable', json=self.data).status_code, 200)
+        self.assertEqual(metrics.MODEL_TEMPLATE_LOOKUPS.value(result='miss'), misses + 2)
+
+    def assert_reuses_structure(self, settings):
+        hits = metrics.MODEL_TEMPLATE_LOOKUPS.value(result='hit')
+        self.assertEqual(self.client.post('/generate-timetable', json=self.data).status_code, 200)
+        key = model_template.structural_key(self.data)
+
+        self.data['settings'].update(settings)
+        self.assertEqual(model_template.structural_key(self.data), key)
+        self.assertEqual(self.client.post('/generate-timetable', json=self.data).status_code, 200)
+        self.assertEqual(metrics.MODEL_TEMPLATE_LOOKUPS.value(result='hit'), hits + 1)
+
+    def test_objective_mode_reuses_structure(self):
+        self.assert_reuses_structure({'objectiveMode': 'lexicographic', 'objectiveTiers': ['morning', 'gaps']})
+
+    def test_solver_workers_reuse_structure(self):
+        # batch.py sets solverWorkers whenever it runs more than one job
+        self.assert_reuses_structure({'solverWorkers': 2})
+
+    def test_traced_request_reuses_structure(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.client = create_app(trace_dir=tmp).test_client()
+            self.assert_reuses_structure({'trace': True})
+            self.assertEqual(len(os.listdir(tmp)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
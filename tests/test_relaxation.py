@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+from relaxation import RELAXABLE_FAMILIES, relaxed_families
+
+TIMESLOTS = ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM', '01:00 PM - 02:00 PM']
+
+def make_data(relaxed_mode=None):
+    data = {
+        'days': ['Mon', 'Tue'],
+        'timeslots': TIMESLOTS,
+        'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}],
+        # I1 can only teach on Monday morning
+        'instructors': [{'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1, 0, 0, 0], 'Tue': [0, 0, 0, 0]}}],
+        'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I1']}],
+        'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1']}],
+        'settings': {'timeLimitSeconds': 30}
+    }
+    if relaxed_mode is not None:
+        data['settings']['relaxedMode'] = relaxed_mode
+    return data
+
+class TestRelaxation(unittest.TestCase):
+    def run_request(self, data):
+        with app.test_request_context(json=data):
+            resp = generate_timetable()
+            status_code = 200
+            if isinstance(resp, tuple):
+                resp, status_code = resp
+            return status_code, resp.get_json()
+
+    def test_relaxed_families(self):
+        self.assertEqual(relaxed_families({}), frozenset())
+        self.assertEqual(relaxed_families({'relaxedMode': True}), frozenset(RELAXABLE_FAMILIES))
+        self.assertEqual(relaxed_families({'relaxedMode': ['capacity', 'unknown']}), frozenset(['capacity']))
+
+    def test_availability_violation_reported(self):
+        status_code, _ = self.run_request(make_data())
+        self.assertEqual(status_code, 400)
+
+        status_code, body = self.run_request(make_data(['availability']))
+        self.assertEqual(status_code, 200, body.get('message'))
+        self.assertEqual(len(body['schedule']), 2)
+        # One of the two lectures has to leave I1's only free slot
+        [violation] = body['violations']
+        self.assertEqual((violation['family'], violation['entity'], violation['entityId']),
+                         ('availability', 'instructor', 'I1'))
+        self.assertEqual(violation['courseId'], 'C1')
+        self.assertNotEqual((violation['day'], violation['timeslot']), ('Mon', TIMESLOTS[0]))
+
+    def test_capacity_and_labs_per_day(self):
+        data = make_data(True)
+        data['instructors'][0].pop('availability')
+        data['days'] = ['Mon']
+        data['rooms'].append({'id': 'LAB1', 'capacity': 10, 'type': 'Computer Lab'})
+        data['courses'] = [
+            {'id': 'C1', 'name': 'Course1', 'lectureHours': 0, 'labHours': 1, 'qualifiedInstructors': ['I1']},
+            {'id': 'C2', 'name': 'Course2', 'lectureHours': 0, 'labHours': 1, 'qualifiedInstructors': ['I1']},
+        ]
+        data['student_groups'][0]['enrolledCourses'] = ['C1', 'C2']
+
+        status_code, body = self.run_request(data)
+        self.assertEqual(status_code, 200, body.get('message'))
+        families = sorted((v['family'], v.get('entityId'), v.get('excess')) for v in body['violations'])
+        # Both labs in the only, too small lab room, on the only day
+        self.assertEqual(families, [('capacity', 'LAB1', None), ('capacity', 'LAB1', None), ('labsPerDay', None, 1)])
+
+    def test_no_violations_when_feasible(self):
+        data = make_data(True)
+        data['instructors'][0].pop('availability')
+        status_code, body = self.run_request(data)
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body['violations'], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import gzip
+import json
+import sys
+import os
+import tempfile
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import create_app
+from loadtest import load_corpus
+from request_capture import RequestCapture, anonymize
+
+def make_data():
+    return {
+        'request_id': 'req-1',
+        'days': ['Mon'],
+        'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM', '01:00 PM - 02:00 PM'],
+        'rooms': [{'id': 'Hall A', 'name': 'Main Hall', 'capacity': 80, 'type': 'Classroom'},
+                  {'id': 'Lab B', 'capacity': 40, 'type': 'Computer Lab'}],
+        'instructors': [{'id': 'jsmith', 'name': 'Jane Smith'}],
+        'courses': [{'id': 'CS101', 'name': 'Programming', 'lectureHours': 1, 'labHours': 2,
+                     'qualifiedInstructors': ['jsmith'], 'sharedLectureGroups': [['BSc1', 'BSc2']]}],
+        'student_groups': [
+            {'id': 'BSc1', 'size': 30, 'enrolledCourses': ['CS101'], 'preferredRoomId': 'Hall A',
+             'instructorPreferences': {'CS101': 'jsmith'}, 'labRoomPreferences': {'CS101': 'Lab B'}},
+            {'id': 'BSc2', 'size': 30, 'enrolledCourses': [], 'labTimingPreferences': {'CS101': 'Afternoon'}},
+        ],
+        'settings': {'preferredMorningCourses': ['CS101']}
+    }
+
+class TestRequestCapture(unittest.TestCase):
+    def test_anonymize_renames_consistently(self):
+        data = anonymize(make_data())
+        self.assertEqual([r['id'] for r in data['rooms']], ['ROOM001', 'ROOM002'])
+        self.assertEqual(data['rooms'][0]['name'], 'ROOM001')
+        self.assertEqual(data['instructors'], [{'id': 'INS001', 'name': 'INS001'}])
+        course = data['courses'][0]
+        self.assertEqual((course['id'], course['name'], course['qualifiedInstructors']), ('CRS001', 'CRS001', ['INS001']))
+        self.assertEqual(course['sharedLectureGroups'], [['GRP001', 'GRP002']])
+        group = data['student_groups'][0]
+        self.assertEqual(group['enrolledCourses'], ['CRS001'])
+        self.assertEqual(group['preferredRoomId'], 'ROOM001')
+        self.assertEqual(group['instructorPreferences'], {'CRS001': 'INS001'})
+        self.assertEqual(group['labRoomPreferences'], {'CRS001': 'ROOM002'})
+        self.assertEqual(data['student_groups'][1]['labTimingPreferences'], {'CRS001': 'Afternoon'})
+        self.assertEqual(data['settings']['preferredMorningCourses'], ['CRS001'])
+        self.assertNotIn('Jane Smith', json.dumps(data))
+
+    def test_rotation_keeps_newest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            capture = RequestCapture(tmp, rate=1.0, max_files=2)
+            paths = [capture.record(make_data(), 'success', {'build': 0.1}) for _ in range(3)]
+            self.assertEqual(sorted(os.listdir(tmp)), sorted(os.path.basename(p) for p in paths[1:]))
+            self.assertIsNone(RequestCapture(tmp, rate=0.0).record(make_data(), 'success', {}))
+
+    def test_sampled_requests_form_a_replay_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app(capture=RequestCapture(tmp, rate=1.0, anonymize=True))
+            resp = app.test_client().post('/generate-timetable', json=make_data())
+            self.assertEqual(resp.status_code, 200)
+
+            [name] = os.listdir(tmp)
+            with gzip.open(os.path.join(tmp, name), 'rt') as f:
+                record = json.load(f)
+            self.assertEqual(record['outcome'], 'success')
+            self.assertIn('solve', record['timings'])
+            self.assertNotIn('request_id', record['payload'])
+
+            [(_, payload)] = load_corpus(tmp, outcomes=['success'])
+            self.assertEqual(load_corpus(tmp, outcomes=['infeasible']), [])
+
+        # The anonymized request still solves to the same timetable shape
+        replay = app.test_client().post('/generate-timetable', json=payload)
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(len(replay.get_json()['schedule']), len(resp.get_json()['schedule']))
+
+if __name__ == '__main__':
+    unittest.main()
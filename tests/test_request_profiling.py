@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import create_app
+
+DATA = {
+    'days': ['Mon'],
+    'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM'],
+    'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}],
+    'instructors': [{'id': 'I1', 'name': 'Inst1'}],
+    'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 1, 'labHours': 0, 'qualifiedInstructors': ['I1']}],
+    'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1']}],
+    'settings': {}
+}
+
+class TestRequestProfiling(unittest.TestCase):
+    def post(self, app, headers):
+        return app.test_client().post('/generate-timetable', json=DATA, headers=headers)
+
+    def test_admin_request_is_profiled(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app(admin_token='secret', profile_dir=tmp)
+            resp = self.post(app, {'X-Timely-Profile': '1', 'X-Admin-Token': 'secret'})
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(len(resp.get_json()['schedule']), 1)
+
+            profile_id = resp.headers['X-Profile-ID']
+            self.assertEqual(sorted(os.listdir(tmp)), [f'{profile_id}.prof', f'{profile_id}.txt'])
+            with open(os.path.join(tmp, f'{profile_id}.txt')) as f:
+                report = f.read()
+            self.assertIn('generate_timetable', report)
+            self.assertIn('allocation sites', report)
+
+    def test_profiling_needs_the_admin_token(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app(admin_token='secret', profile_dir=tmp)
+            resp = self.post(app, {'X-Timely-Profile': '1', 'X-Admin-Token': 'wrong'})
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('X-Profile-ID', resp.headers)
+
+            # No token configured: profiling is off
+            app = create_app(profile_dir=tmp)
+            resp = self.post(app, {'X-Timely-Profile': '1', 'X-Admin-Token': ''})
+            self.assertNotIn('X-Profile-ID', resp.headers)
+            self.assertEqual(os.listdir(tmp), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+
+TIMESLOTS = ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM', '12:00 PM - 01:00 PM']
+
+def make_data():
+    # Every course fits on its own; I1 and LAB1 cannot serve all of them
+    return {
+        'days': ['Mon', 'Tue'],
+        'timeslots': TIMESLOTS,
+        'rooms': [
+            {'id': 'CR1', 'capacity': 50, 'type': 'Classroom'},
+            {'id': 'LAB1', 'capacity': 50, 'type': 'Computer Lab', 'availability': {'Mon': [1, 1, 0, 0], 'Tue': [0, 0, 0, 0]}},
+        ],
+        'instructors': [
+            {'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1, 1, 0, 0], 'Tue': [1, 0, 0, 0]}},
+            {'id': 'I2', 'name': 'Inst2'},
+            {'id': 'I3', 'name': 'Inst3'},
+        ],
+        'courses': [
+            {'id': 'C1', 'name': 'Algebra', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I1']},
+            {'id': 'C2', 'name': 'Geometry', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I1']},
+            {'id': 'C3', 'name': 'Programming', 'lectureHours': 0, 'labHours': 2, 'qualifiedInstructors': ['I2']},
+            {'id': 'C4', 'name': 'Databases', 'lectureHours': 0, 'labHours': 2, 'qualifiedInstructors': ['I3']},
+        ],
+        'student_groups': [
+            {'id': 'G1', 'size': 20, 'enrolledCourses': ['C1']},
+            {'id': 'G2', 'size': 20, 'enrolledCourses': ['C2']},
+        ],
+        'settings': {}
+    }
+
+class TestResourceLoad(unittest.TestCase):
+    def problems(self, data):
+        return app.test_client().post('/validate', json=data).get_json()['problems']
+
+    def test_instructor_bottleneck(self):
+        # Four lecture hours, at most one per course and day, in I1's three free slots
+        [problem] = self.problems(make_data())
+        self.assertEqual(problem['check'], 'instructor_load')
+        self.assertEqual(problem['instructors'], ['I1'])
+        self.assertEqual(sorted(problem['courses']), ['C1', 'C2'])
+        self.assertEqual((problem['required'], problem['available']), (4, 3))
+        self.assertIn("'Inst1'", problem['message'])
+
+    def test_room_bottleneck(self):
+        data = make_data()
+        data['instructors'][0].pop('availability')
+        data['student_groups'][0]['enrolledCourses'].append('C3')
+        data['student_groups'][1]['enrolledCourses'].append('C4')
+        # Both labs can only start at Mon 9:00 in LAB1
+        [problem] = self.problems(data)
+        self.assertEqual(problem['check'], 'room_load')
+        self.assertEqual(problem['rooms'], ['LAB1'])
+        self.assertEqual(sorted(problem['courses']), ['C3', 'C4'])
+
+    def test_rejected_before_model_building(self):
+        with app.test_request_context(json=make_data()):
+            resp, status_code = generate_timetable()
+            body = resp.get_json()
+        self.assertEqual(status_code, 400)
+        self.assertIn("Instructors 'Inst1'", body['message'])
+        self.assertNotIn('build', body.get('timings', {}))
+
+    def test_feasible_load_passes(self):
+        data = make_data()
+        data['instructors'][0]['availability']['Tue'] = [1, 1, 0, 0]
+        self.assertEqual(self.problems(data), [])
+
+if __name__ == '__main__':
+    unittest.main()
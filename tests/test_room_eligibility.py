@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+import room_eligibility
+from room_eligibility import compute_room_eligibility, get_catalog
+
+ROOMS = {
+    'CR1': {'id': 'CR1', 'capacity': 60, 'type': 'Classroom'},
+    'CR2': {'id': 'CR2', 'capacity': 30, 'type': 'Classroom', 'equipment': ['Projector']},
+    'CL1': {'id': 'CL1', 'capacity': 60, 'type': 'Computer Lab'},
+    'CL2': {'id': 'CL2', 'capacity': 60, 'type': 'Lab'},
+    'HW1': {'id': 'HW1', 'capacity': 60, 'type': 'Hardware Lab'},
+}
+
+class TestRoomEligibility(unittest.TestCase):
+    def setUp(self):
+        room_eligibility.clear_cache()
+
+    def test_eligibility_table(self):
+        courses = {
+            'C1': {'id': 'C1', 'lectureHours': 2, 'labHours': 2},
+            'C2': {'id': 'C2', 'lectureHours': 1, 'labHours': 2, 'labType': 'Hardware Lab'},
+            'C3': {'id': 'C3', 'lectureHours': 1, 'labHours': 0, 'equipment': ['Projector']},
+        }
+        groups = {
+            'G1': {'id': 'G1', 'size': 25, 'enrolledCourses': ['C1', 'C2', 'C3'],
+                   'labRoomPreferences': {'C1': 'CL2'}},
+            'G2': {'id': 'G2', 'size': 50, 'enrolledCourses': ['C1', 'C3']},
+        }
+        table = compute_room_eligibility(ROOMS, groups, courses)
+
+        self.assertEqual(table[('G1', 'C1', 'lecture')], ('CR1', 'CR2'))
+        self.assertEqual(table[('G1', 'C1', 'lab')], ('CL2',))
+        self.assertEqual(table[('G1', 'C2', 'lab')], ('HW1',))
+        self.assertEqual(table[('G1', 'C3', 'lecture')], ('CR2',))
+        self.assertEqual(table[('G2', 'C1', 'lecture')], ('CR1',))
+        self.assertEqual(table[('G2', 'C1', 'lab')], ('CL1', 'CL2'))
+        # Too big for the only room with a projector
+        self.assertEqual(table[('G2', 'C3', 'lecture')], ())
+
+    def test_catalog_is_memoized_by_content(self):
+        catalog = get_catalog(ROOMS)
+        same_rooms = {r_id: dict(room) for r_id, room in ROOMS.items()}
+        self.assertIs(get_catalog(same_rooms), catalog)
+
+        bigger = dict(same_rooms)
+        bigger['CR2'] = dict(bigger['CR2'], capacity=80)
+        self.assertIsNot(get_catalog(bigger), catalog)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+from availability import build_availability
+from room_pools import build_room_pools
+
+TIMESLOTS = ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM']
+
+def make_data(room_pools):
+    rooms = [{'id': f'CR{i}', 'capacity': 60, 'type': 'Classroom'} for i in range(6)]
+    rooms += [{'id': f'LAB{i}', 'capacity': 60, 'type': 'Computer Lab'} for i in range(3)]
+    instructors = [{'id': f'I{i}', 'name': f'Inst{i}'} for i in range(4)]
+    courses = []
+    groups = []
+    for g in range(4):
+        courses.append({'id': f'C{g}', 'name': f'Course{g}', 'lectureHours': 1, 'labHours': 2,
+                        'qualifiedInstructors': [f'I{g}']})
+        groups.append({'id': f'G{g}', 'size': 40, 'enrolledCourses': [f'C{g}']})
+    groups[0]['preferredRoomId'] = 'CR4'
+    groups[1]['labRoomPreferences'] = {'C1': 'LAB2'}
+    return {
+        'days': ['Mon', 'Tue'],
+        'timeslots': TIMESLOTS,
+        'rooms': rooms,
+        'instructors': instructors,
+        'courses': courses,
+        'student_groups': groups,
+        'settings': {'roomPools': room_pools}
+    }
+
+class TestRoomPools(unittest.TestCase):
+    def test_build_pools(self):
+        data = make_data(True)
+        rooms = {r['id']: r for r in data['rooms']}
+        rooms['CR5']['availability'] = {'Mon': [0, 1, 1]}
+        avail = build_availability({}, rooms, {}, data['days'], TIMESLOTS)
+        pools = build_room_pools(rooms, avail, data['days'], pinned={'LAB2'})
+        self.assertEqual(dict(pools), {
+            'pool_CR0': ['CR0', 'CR1', 'CR2', 'CR3', 'CR4'],
+            'CR5': ['CR5'],
+            'pool_LAB0': ['LAB0', 'LAB1'],
+            'LAB2': ['LAB2'],
+        })
+
+    def test_pooled_solve_matches_rooms(self):
+        with app.test_request_context(json=make_data(True)):
+            resp = generate_timetable()
+            status_code = 200
+            if isinstance(resp, tuple):
+                resp, status_code = resp
+
+            json_data = resp.get_json()
+            self.assertEqual(status_code, 200, f"Should succeed. Msg: {json_data.get('message')}")
+            schedule = json_data['schedule']
+            self.assertEqual(len(schedule), 12)
+
+            # Concrete rooms only, never double booked
+            rooms = {r['id'] for r in make_data(True)['rooms']}
+            used = set()
+            for e in schedule:
+                self.assertIn(e['room'], rooms)
+                self.assertNotIn((e['day'], e['timeslot'], e['room']), used)
+                used.add((e['day'], e['timeslot'], e['room']))
+
+            for g in range(4):
+                labs = [e for e in schedule if e['group'] == f'G{g}' and e['type'] == 'lab']
+                self.assertEqual(len({e['room'] for e in labs}), 1, 'Both lab hours share a room')
+                self.assertTrue(labs[0]['room'].startswith('LAB'))
+                lectures = [e for e in schedule if e['group'] == f'G{g}' and e['type'] == 'lecture']
+                self.assertTrue(lectures[0]['room'].startswith('CR'))
+
+            self.assertEqual([e['room'] for e in schedule if e['group'] == 'G0' and e['type'] == 'lecture'], ['CR4'])
+            self.assertEqual({e['room'] for e in schedule if e['group'] == 'G1' and e['type'] == 'lab'}, {'LAB2'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+from shared_lectures import compute_lecture_cohorts
+
+TIMESLOTS = ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM']
+
+def make_data():
+    return {
+        'days': ['Mon', 'Tue'],
+        'timeslots': TIMESLOTS,
+        'rooms': [
+            {'id': 'SMALL', 'capacity': 40, 'type': 'Classroom'},
+            {'id': 'HALL', 'capacity': 100, 'type': 'Classroom'},
+        ],
+        'instructors': [{'id': 'I1', 'name': 'Inst1'}],
+        'courses': [{'id': 'C1', 'name': 'Calculus', 'lectureHours': 2, 'labHours': 0,
+                     'qualifiedInstructors': ['I1'], 'sharedLectureGroups': [['G1', 'G2', 'G3']]}],
+        'student_groups': [
+            {'id': 'G1', 'size': 30, 'enrolledCourses': ['C1'], 'availability': {'Mon': [1, 1, 1], 'Tue': [1, 1, 1]}},
+            # G2 is only free in the last slot on Monday
+            {'id': 'G2', 'size': 30, 'enrolledCourses': ['C1'], 'availability': {'Mon': [0, 0, 1], 'Tue': [1, 1, 1]}},
+            # Listed in the cohort but not enrolled
+            {'id': 'G3', 'size': 30, 'enrolledCourses': []},
+        ],
+        'settings': {}
+    }
+
+class TestSharedLectures(unittest.TestCase):
+    def test_cohorts(self):
+        data = make_data()
+        groups = {g['id']: g for g in data['student_groups']}
+        courses = {c['id']: c for c in data['courses']}
+        cohorts = compute_lecture_cohorts(groups, courses)
+        self.assertEqual(cohorts, {('G1', 'C1'): ('G1', 'G2'), ('G2', 'C1'): ('G1', 'G2')})
+
+    def test_joint_lecture_blocks_all_members(self):
+        with app.test_request_context(json=make_data()):
+            resp = generate_timetable()
+            status_code = 200
+            if isinstance(resp, tuple):
+                resp, status_code = resp
+
+            json_data = resp.get_json()
+            self.assertEqual(status_code, 200, f"Should succeed. Msg: {json_data.get('message')}")
+            schedule = json_data['schedule']
+            # Two joint sessions, each listed for both groups
+            self.assertEqual(len(schedule), 4)
+            sessions = {}
+            for entry in schedule:
+                sessions.setdefault((entry['day'], entry['timeslot']), []).append(entry)
+            self.assertEqual(len(sessions), 2)
+            for (day, timeslot), entries in sessions.items():
+                self.assertEqual(sorted(e['group'] for e in entries), ['G1', 'G2'])
+                # Only the hall fits the combined 60 students
+                self.assertEqual({e['room'] for e in entries}, {'HALL'})
+                if day == 'Mon':
+                    self.assertEqual(timeslot, '11:00 AM - 12:00 PM')
+
+    def test_plus_in_group_id_is_rejected(self):
+        data = make_data()
+        # Its lectures would get the same task ids as the G1+G2 joint lectures
+        data['student_groups'][2].update({'id': 'G1+G2', 'enrolledCourses': ['C1']})
+        for relaxed_mode in (None, True):
+            if relaxed_mode:
+                data['settings']['relaxedMode'] = relaxed_mode
+            with app.test_request_context(json=data):
+                resp, status_code = generate_timetable()
+                self.assertEqual(status_code, 400)
+                problems = resp.get_json()['problems']
+                self.assertEqual([(p['check'], p['groupId']) for p in problems], [('cohort_id', 'G1+G2')])
+
+if __name__ == '__main__':
+    unittest.main()
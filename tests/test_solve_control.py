@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import time
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+from ortools.sat.python import cp_model
+import solve_control
+from solve_control import SolveControl, SolveCancelled, DeadlineExceeded
+
+class TestSolveControl(unittest.TestCase):
+    def test_settings_are_parsed(self):
+        control = SolveControl.from_request({'request_id': 'abc'}, {'timeLimitSeconds': 5, 'stagnationSeconds': '2'})
+        self.assertEqual(control.request_id, 'abc')
+        self.assertEqual(control.time_limit, 5.0)
+        self.assertEqual(control.stagnation_seconds, 2.0)
+
+        # Garbage falls back to defaults
+        control = SolveControl.from_request({}, {'timeLimitSeconds': 'soon', 'stagnationSeconds': -1})
+        self.assertEqual(control.time_limit, solve_control.DEFAULT_TIME_LIMIT_SECONDS)
+        self.assertIsNone(control.stagnation_seconds)
+
+    def test_checkpoint_raises_on_cancel(self):
+        control = SolveControl(request_id='req-1')
+        solve_control.register(control)
+        try:
+            control.checkpoint('validation')  # Nothing happens yet
+            self.assertTrue(solve_control.cancel('req-1'))
+            with self.assertRaises(SolveCancelled):
+                control.checkpoint('variable creation')
+        finally:
+            solve_control.unregister(control)
+        self.assertFalse(solve_control.cancel('req-1'))
+
+    def test_checkpoint_raises_after_deadline(self):
+        control = SolveControl(time_limit=0.0)
+        with self.assertRaises(DeadlineExceeded):
+            control.checkpoint('validation')
+
+    def test_solve_with_stagnation(self):
+        # n pigeons, n-1 holes: leaving one pigeon out is found at once, but proving
+        # that is optimal is a pigeonhole proof, out of reach without LP or presolve
+        n = 12
+        model = cp_model.CpModel()
+        placed = [[model.NewBoolVar(f'x_{p}_{h}') for h in range(n - 1)] for p in range(n)]
+        unplaced = [model.NewBoolVar(f'unplaced_{p}') for p in range(n)]
+        for p in range(n):
+            model.AddExactlyOne(placed[p] + [unplaced[p]])
+        for h in range(n - 1):
+            model.AddAtMostOne(row[h] for row in placed)
+        model.Minimize(sum(unplaced))
+
+        solver = cp_model.CpSolver()
+        solver.parameters.linearization_level = 0
+        solver.parameters.cp_model_presolve = False
+        solver.parameters.symmetry_level = 0
+        control = SolveControl(time_limit=30, stagnation_seconds=1, num_workers=1)
+        start = time.monotonic()
+        status = control.solve(solver, model)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(status, cp_model.FEASIBLE)
+        self.assertEqual(solver.ObjectiveValue(), 1)
+        self.assertEqual(control.stop_reason, 'stagnation')
+        self.assertLess(elapsed, 10)
+
+    def test_generate_timetable_deadline_before_build(self):
+        data = {
+            'days': ['Mon'],
+            'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM'],
+            'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}],
+            'instructors': [{'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1, 1]}}],
+            'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 1, 'labHours': 0, 'qualifiedInstructors': ['I1']}],
+            'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1'], 'availability': {'Mon': [1, 1]}}],
+            'settings': {'timeLimitSeconds': 1e-9}
+        }
+
+        with app.test_request_context(json=data):
+            resp, status_code = generate_timetable()
+            self.assertEqual(status_code, 408)
+            self.assertIn("time limit", resp.get_json()['message'])
+
+    def test_cancel_unknown_request(self):
+        client = app.test_client()
+        resp = client.post('/cancel/does-not-exist')
+        self.assertEqual(resp.status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+from ortools.sat.python import cp_model
+from portfolio import solve_portfolio
+
+class TestSolverPortfolio(unittest.TestCase):
+    def test_portfolio_returns_optimal(self):
+        # x + y == 1, minimize x -> optimum is x=0, y=1
+        model = cp_model.CpModel()
+        x = model.NewBoolVar('x')
+        y = model.NewBoolVar('y')
+        model.AddExactlyOne([x, y])
+        model.Minimize(x)
+
+        result = solve_portfolio(model, time_limit=10.0, log=lambda msg: None)
+        self.assertEqual(result.status, cp_model.OPTIMAL)
+        self.assertEqual(result.Value(x), 0)
+        self.assertEqual(result.Value(y), 1)
+        self.assertIsNotNone(result.config_name)
+
+    def test_portfolio_reports_infeasible(self):
+        model = cp_model.CpModel()
+        x = model.NewBoolVar('x')
+        model.Add(x == 1)
+        model.Add(x == 0)
+
+        result = solve_portfolio(model, time_limit=10.0, log=lambda msg: None)
+        self.assertEqual(result.status, cp_model.INFEASIBLE)
+
+    def test_generate_timetable_with_portfolio(self):
+        data = {
+            'days': ['Mon', 'Tue'],
+            'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM', '12:00 PM - 01:00 PM'],
+            'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Lab'}, {'id': 'R2', 'capacity': 50, 'type': 'Classroom'}],
+            'instructors': [{'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1, 1, 1, 1], 'Tue': [1, 1, 1, 1]}}],
+            'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 2, 'labHours': 2, 'qualifiedInstructors': ['I1']}],
+            'student_groups': [{
+                'id': 'G1',
+                'size': 20,
+                'enrolledCourses': ['C1'],
+                'availability': {'Mon': [1, 1, 1, 1], 'Tue': [1, 1, 1, 1]}
+            }],
+            'settings': {'solverPortfolio': True}
+        }
+
+        with app.test_request_context(json=data):
+            resp = generate_timetable()
+            status_code = 200
+            if isinstance(resp, tuple):
+                resp, status_code = resp
+
+            json_data = resp.get_json()
+            self.assertEqual(status_code, 200, f"Should succeed. Msg: {json_data.get('message')}")
+            self.assertEqual(len(json_data['schedule']), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import create_app
+from tracing import Trace
+
+def make_data():
+    return {
+        'days': ['Mon', 'Tue'],
+        'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM'],
+        'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}],
+        'instructors': [{'id': 'I1', 'name': 'Inst1'}],
+        'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I1']}],
+        'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1']}],
+        'settings': {}
+    }
+
+class TestTracing(unittest.TestCase):
+    def load(self, directory, trace_id):
+        self.assertEqual(os.listdir(directory), [f'{trace_id}.trace.json'])
+        with open(os.path.join(directory, f'{trace_id}.trace.json')) as f:
+            return json.load(f)['traceEvents']
+
+    def test_requested_trace_is_written(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app(trace_dir=tmp)
+            resp = app.test_client().post('/generate-timetable', json=make_data(), headers={'X-Timely-Trace': '1'})
+            self.assertEqual(resp.status_code, 200)
+            events = self.load(tmp, resp.headers['X-Trace-ID'])
+
+        names = [e['name'] for e in events if e['ph'] == 'B']
+        # One span per validation check
+        for name in ('parse request', 'validation', 'group hours', 'lab slots', 'course overlap', 'room capacity',
+                     'resource load', 'create variables', '1. exactly once', '8. faculty break', 'objectives',
+                     'CP-SAT solve', 'response serialization'):
+            self.assertIn(name, names)
+        self.assertTrue(any(e['ph'] == 'i' and e['name'] == 'solution' for e in events))
+        # Every begin has its end
+        self.assertEqual(sum(e['ph'] == 'B' for e in events), sum(e['ph'] == 'E' for e in events))
+
+    def test_trace_setting_and_default(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app(trace_dir=tmp)
+            resp = app.test_client().post('/generate-timetable', json=make_data())
+            self.assertNotIn('X-Trace-ID', resp.headers)
+            self.assertEqual(os.listdir(tmp), [])
+
+            data = make_data()
+            data['settings']['trace'] = True
+            resp = app.test_client().post('/generate-timetable', json=data)
+            self.load(tmp, resp.headers['X-Trace-ID'])
+
+    def test_steps_nest_and_close(self):
+        trace = Trace()
+        trace.step('build')
+        trace.step('family 1', level=1)
+        trace.step('family 2', level=1)
+        trace.step('solve')
+        events = trace.to_json()['traceEvents']
+        phases = [(e['ph'], e['name']) for e in events if e['ph'] in ('B', 'E')]
+        self.assertEqual(phases, [('B', 'build'), ('B', 'family 1'), ('E', ''), ('B', 'family 2'), ('E', ''),
+                                  ('E', ''), ('B', 'solve'), ('E', '')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+
+def make_data(settings):
+    return {
+        'days': ['Mon', 'Tue'],
+        'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM'],
+        'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Classroom'}],
+        'instructors': [{'id': 'I1', 'name': 'Inst1'}],
+        # GHOST is a stale id that is not in `instructors`
+        'courses': [{'id': 'C1', 'name': 'Course1', 'lectureHours': 2, 'labHours': 0, 'qualifiedInstructors': ['I1', 'GHOST']}],
+        'student_groups': [{'id': 'G1', 'size': 20, 'enrolledCourses': ['C1']}],
+        'settings': dict(settings, gapPriority=1, timeLimitSeconds=30)
+    }
+
+class TestUnknownInstructor(unittest.TestCase):
+    def test_unknown_qualified_instructor_is_ignored(self):
+        for settings in ({}, {'engine': 'decomposed'}, {'relaxedMode': True}, {'objectiveMode': 'lexicographic'}):
+            with self.subTest(settings=settings), app.test_request_context(json=make_data(settings)):
+                resp = generate_timetable()
+                self.assertNotIsInstance(resp, tuple, resp[0].get_json() if isinstance(resp, tuple) else None)
+                schedule = resp.get_json()['schedule']
+                self.assertEqual([s['instructor'] for s in schedule], ['Inst1', 'Inst1'])
+
+if __name__ == '__main__':
+    unittest.main()
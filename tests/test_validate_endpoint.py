@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+
+# Add server directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../server'))
+from app import app, generate_timetable
+
+class TestValidateEndpoint(unittest.TestCase):
+    def setUp(self):
+        # Three independent problems:
+        # - G1 needs 6 hours but has 4 slots
+        # - C2's lab has no consecutive slots for G2 ([1, 0, 1, 0])
+        # - C3's instructor is never available when G3 is
+        self.data = {
+            'days': ['Mon'],
+            'timeslots': ['09:00 AM - 10:00 AM', '10:00 AM - 11:00 AM', '11:00 AM - 12:00 PM', '12:00 PM - 01:00 PM'],
+            'rooms': [{'id': 'R1', 'capacity': 50, 'type': 'Lab'}, {'id': 'R2', 'capacity': 50, 'type': 'Classroom'}],
+            'instructors': [
+                {'id': 'I1', 'name': 'Inst1', 'availability': {'Mon': [1, 1, 1, 1]}},
+                {'id': 'I2', 'name': 'Inst2', 'availability': {'Mon': [1, 1, 0, 0]}}
+            ],
+            'courses': [
+                {'id': 'C1', 'name': 'Course1', 'lectureHours': 6, 'labHours': 0, 'qualifiedInstructors': ['I1']},
+                {'id': 'C2', 'name': 'LabCourse', 'lectureHours': 0, 'labHours': 2, 'qualifiedInstructors': ['I1']},
+                {'id': 'C3', 'name': 'Course3', 'lectureHours': 1, 'labHours': 0, 'qualifiedInstructors': ['I2']}
+            ],
+            'student_groups': [
+                {'id': 'G1', 'size': 20, 'enrolledCourses': ['C1'], 'availability': {'Mon': [1, 1, 1, 1]}},
+                {'id': 'G2', 'size': 20, 'enrolledCourses': ['C2'], 'availability': {'Mon': [1, 0, 1, 0]}},
+                {'id': 'G3', 'size': 20, 'enrolledCourses': ['C3'], 'availability': {'Mon': [0, 0, 1, 1]}}
+            ],
+            'settings': {}
+        }
+        self.client = app.test_client()
+
+    def test_validate_reports_every_problem(self):
+        resp = self.client.post('/validate', json=self.data)
+        self.assertEqual(resp.status_code, 200)
+        body = resp.get_json()
+        self.assertFalse(body['valid'])
+
+        checks = [(p['check'], p.get('groupId'), p.get('courseId')) for p in body['problems']]
+        self.assertIn(('group_hours', 'G1', None), checks)
+        self.assertIn(('course_overlap', 'G1', 'C1'), checks)
+        self.assertIn(('lab_instructor', 'G2', 'C2'), checks)
+        self.assertIn(('course_overlap', 'G3', 'C3'), checks)
+        self.assertIn('room_capacity', [c[0] for c in checks])
+
+    def test_validate_clean_dataset(self):
+        self.data['courses'][0]['lectureHours'] = 1
+        self.data['student_groups'][1]['availability']['Mon'] = [1, 1, 1, 1]
+        self.data['instructors'][1]['availability']['Mon'] = [1, 1, 1, 1]
+        body = self.client.post('/validate', json=self.data).get_json()
+        self.assertTrue(body['valid'])
+        self.assertEqual(body['problems'], [])
+
+    def test_validate_rejects_non_object(self):
+        resp = self.client.post('/validate', data='not json', content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_generate_returns_first_problem_and_all_problems(self):
+        with app.test_request_context(json=self.data):
+            resp, status_code = generate_timetable()
+            body = resp.get_json()
+            self.assertEqual(status_code, 400)
+            self.assertIn("Student Group 'G1' requires 6 hours", body['message'])
+            self.assertGreaterEqual(len(body['problems']), 4)
+
+if __name__ == '__main__':
+    unittest.main()